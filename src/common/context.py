@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Annotated
+from typing import Annotated, Literal
 
 from . import prompts
 
@@ -37,6 +37,35 @@ class Context:
         },
     )
 
+    search_timeout: float = field(
+        default=10.0,
+        metadata={
+            "description": "Seconds to wait for each web search, including time queued "
+            "behind other searches. On timeout the search returns the results so far, "
+            "marked partial.",
+            "json_schema_extra": {"langgraph_nodes": ["tools"]},
+        },
+    )
+
+    search_backends: str = field(
+        default="duckduckgo",
+        metadata={
+            "description": "Comma-separated web search backends to query concurrently "
+            "(duckduckgo, tavily). Tavily needs the TAVILY_API_KEY env var.",
+            "json_schema_extra": {"langgraph_nodes": ["tools"]},
+        },
+    )
+
+    search_strategy: Literal["first", "merge"] = field(
+        default="first",
+        metadata={
+            "description": "How results of several search backends are combined: "
+            "'first' returns the fastest complete response, 'merge' merges all "
+            "responses within the search timeout, deduplicated by URL.",
+            "json_schema_extra": {"langgraph_nodes": ["tools"]},
+        },
+    )
+
     enable_deepwiki: bool = field(
         default=False,
         metadata={
@@ -45,6 +74,45 @@ class Context:
         },
     )
 
+    mcp_output_max_tokens: int = field(
+        default=4000,
+        metadata={
+            "description": "Estimated tokens an MCP tool output may take in the conversation. "
+            "Longer outputs keep the sections most relevant to the question; the full "
+            "output can be paged in with read_mcp_output. 0 keeps outputs whole.",
+            "json_schema_extra": {"langgraph_nodes": ["tools"]},
+        },
+    )
+
+    llm_cache_path: str = field(
+        default="",
+        metadata={
+            "description": "Path of a local SQLite file used to cache model responses. "
+            "Identical requests are replayed from the cache instead of calling the provider. "
+            "Leave empty to disable caching.",
+            "json_schema_extra": {"langgraph_nodes": ["call_model"]},
+        },
+    )
+
+    enable_metrics: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether to record node, model and tool latency histograms. "
+            "Set METRICS_PORT to serve them in the Prometheus text format.",
+            "json_schema_extra": {"langgraph_nodes": ["call_model", "tools"]},
+        },
+    )
+
+    run_mode: Literal["full", "lean"] = field(
+        default="full",
+        metadata={
+            "description": "How much message history a run keeps. 'full' keeps every message. "
+            "'lean' is for stateless bulk verification: completed tool exchanges are compacted "
+            "into `tool_summary` and the run returns only the final report.",
+            "json_schema_extra": {"langgraph_nodes": ["call_model"]},
+        },
+    )
+
     def __post_init__(self) -> None:
         """Fetch env vars for attributes that were not passed as args."""
         import os
@@ -66,5 +134,8 @@ class Context:
                     # Handle boolean environment variables
                     env_bool_value = env_value.lower() in ("true", "1", "yes", "on")
                     setattr(self, f.name, env_bool_value)
+                elif isinstance(default_value, (int, float)):
+                    # Parse numeric environment variables as the field's type
+                    setattr(self, f.name, type(default_value)(env_value))
                 else:
                     setattr(self, f.name, env_value)
@@ -1,17 +1,133 @@
-"""MCP Client setup and management for LangGraph ReAct Agent."""
+"""MCP Client setup and management for LangGraph ReAct Agent.
 
+Tools loaded here call their server through a pool of long-lived sessions
+(``MCPSessionPool``), one pool per event loop. A tool call borrows an idle
+session of its server, or opens one if fewer than ``MCP_MAX_SESSIONS``
+(default 4) are open, else waits for one to be returned. Sessions idle for
+more than ``MCP_HEALTH_CHECK_INTERVAL`` seconds (default 30) are pinged
+before reuse and replaced if the ping fails. Failed connects are retried
+with exponential backoff.
+
+Tool lists are cached per server for ``MCP_TOOLS_TTL`` seconds (default
+3600, or the ``tools_ttl`` given to ``add_mcp_server``). Only the first load
+of a server waits for it, and concurrent callers share that one load. After that, an expired list is still returned and
+refreshed in the background, so graph nodes never wait for a refresh. A
+failed load is cached as a negative entry: it returns the previous tools, or
+none, and is retried in the background after a backoff that starts at
+``NEGATIVE_CACHE_TTL`` seconds and doubles with each failure in a row.
+``get_mcp_tools_cache_state`` shows the cache state.
+
+``get_all_mcp_tools`` discovers all servers concurrently. A server that does
+not answer within ``MCP_DISCOVERY_TIMEOUT`` seconds (default 10) is left
+out, and its load goes on in the background. Discovery latency per server
+is recorded in the ``agent_mcp_discovery_seconds{server,result}`` histogram.
+
+Set ``MCP_SCHEMA_CACHE_PATH`` to keep the discovered tool schemas in a local
+JSON file. A new worker then builds its tools from that file without
+contacting the server, and revalidates them against the server in the
+background. The file is versioned; entries of another format version, or of a
+server whose URL or transport changed, are ignored.
+
+Tool calls go through the result cache of ``common.mcp_cache``, so repeated
+DeepWiki calls for the same repository are answered without the server.
+Their text outputs are then cut down to the token budget of the run by
+``common.mcp_output``.
+"""
+
+import asyncio
+import json
 import logging
-from typing import Any, Callable, Dict, List, Optional, cast
+import os
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar, cast
 
+from langchain_core.tools import BaseTool, StructuredTool
 from langchain_mcp_adapters.client import (  # type: ignore[import-untyped]
     MultiServerMCPClient,
 )
+from langchain_mcp_adapters.sessions import (  # type: ignore[import-untyped]
+    create_session,
+)
+from langchain_mcp_adapters.tools import (  # type: ignore[import-untyped]
+    convert_mcp_tool_to_langchain_tool,
+)
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, Tool, ToolAnnotations
+
+from common.mcp_cache import MCPResultCache, get_result_cache
+from common.mcp_output import shape_result
+from common.metrics import Histogram, get_counter, get_histogram
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Open sessions per server and event loop, unless MCP_MAX_SESSIONS is set
+DEFAULT_MAX_SESSIONS = 4
+
+# Idle seconds after which a session is pinged before reuse, unless
+# MCP_HEALTH_CHECK_INTERVAL is set
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+
+# Seconds to wait for a session to connect, or for a health-check ping
+CONNECT_TIMEOUT = 10.0
+PING_TIMEOUT = 5.0
+
+# Connect attempts per session, and the backoff between them (seconds)
+CONNECT_ATTEMPTS = 3
+RECONNECT_BACKOFF = 0.5
+MAX_RECONNECT_BACKOFF = 10.0
+
+# Seconds a loaded tool list is fresh, unless MCP_TOOLS_TTL is set
+DEFAULT_TOOLS_TTL = 3600.0
+
+# Seconds until a failed tool load is retried, doubling per failure in a row
+NEGATIVE_CACHE_TTL = 30.0
+MAX_NEGATIVE_CACHE_TTL = 600.0
+
+
+@dataclass
+class _ToolsEntry:
+    """Cached tools of one server; a negative entry after a failed load."""
+
+    tools: List[Callable[..., Any]] = field(default_factory=list)
+    loaded_at: Optional[float] = None
+    expires_at: float = 0.0
+    failures: int = 0
+    last_error: Optional[str] = None
+    discovery_seconds: Optional[float] = None
+    source: str = "server"
+
+
+# Seconds get_all_mcp_tools waits for each server, unless
+# MCP_DISCOVERY_TIMEOUT is set
+DEFAULT_DISCOVERY_TIMEOUT = 10.0
+
+# Format version of the tool schema cache file; other versions are ignored
+SCHEMA_CACHE_VERSION = 1
+
+# Connection settings that identify a server in the tool schema cache
+_SCHEMA_CACHE_CONFIG_KEYS = ("url", "transport", "command", "args")
+
 # Global MCP client and tools cache
 _mcp_client: Optional[MultiServerMCPClient] = None
-_mcp_tools_cache: Dict[str, List[Callable[..., Any]]] = {}
+_mcp_tools_cache: Dict[str, _ToolsEntry] = {}
+
+# Tool loads in flight, by server: first loads and background refreshes
+_tools_loads: Dict[str, "asyncio.Task[List[Callable[..., Any]]]"] = {}
+
+# Servers section of the tool schema cache file, once read
+_schema_cache: Optional[Dict[str, Any]] = None
+
+# Bumped by clear_mcp_cache; loads started before a clear drop their results
+_cache_generation = 0
+
+# Tool list TTLs of servers added with ``add_mcp_server(..., tools_ttl=...)``
+_tools_ttls: Dict[str, float] = {}
 
 # MCP Server configurations
 MCP_SERVERS = {
@@ -27,6 +143,412 @@ MCP_SERVERS = {
 }
 
 
+@dataclass
+class _PooledSession:
+    """An initialized session, owned by a task that keeps it open."""
+
+    session: ClientSession
+    owner: "asyncio.Task[None]"
+    close_event: asyncio.Event
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def closed(self) -> bool:
+        return self.owner.done() or self.close_event.is_set()
+
+    def close(self) -> None:
+        self.close_event.set()
+
+
+@dataclass
+class _ServerSessions:
+    """Sessions of one server: idle ones, and the count of open ones."""
+
+    idle: Deque[_PooledSession] = field(default_factory=deque)
+    open: int = 0
+    available: asyncio.Condition = field(default_factory=asyncio.Condition)
+    failures: int = 0
+    retry_at: float = 0.0
+
+
+class MCPSessionPool:
+    """Long-lived MCP sessions per server, shared by the tool calls of a loop.
+
+    MCP sessions live in the task that opened them, so each session is
+    opened and closed by a task of its own. Create and use a pool on a single
+    event loop; ``get_session_pool`` returns the one of the running loop.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        health_check_interval: Optional[float] = None,
+    ) -> None:
+        """Create an empty pool; None arguments come from env vars or defaults."""
+        if max_sessions is None:
+            max_sessions = int(os.getenv("MCP_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+        if health_check_interval is None:
+            health_check_interval = float(
+                os.getenv("MCP_HEALTH_CHECK_INTERVAL", DEFAULT_HEALTH_CHECK_INTERVAL)
+            )
+        self.max_sessions = max(1, max_sessions)
+        self.health_check_interval = health_check_interval
+        self._servers: Dict[str, _ServerSessions] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, server_name: str, event: str) -> None:
+        counts = self._metrics.setdefault(server_name, {})
+        counts[event] = counts.get(event, 0) + 1
+        get_counter(
+            "agent_mcp_session_events_total",
+            "MCP session pool events: opened, reused, unhealthy, broken or "
+            "connect_failed.",
+            ("server", "event"),
+        ).inc(server_name, event)
+
+    async def _open(self, server_name: str) -> _PooledSession:
+        """Open and initialize a session in a task that owns it."""
+        connection = MCP_SERVERS[server_name]
+        loop = asyncio.get_running_loop()
+        ready: asyncio.Future[ClientSession] = loop.create_future()
+        close_event = asyncio.Event()
+
+        async def own() -> None:
+            try:
+                async with create_session(connection) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await close_event.wait()
+            except asyncio.CancelledError:
+                ready.cancel()
+                raise
+            except BaseException as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                else:
+                    logger.debug("MCP session to '%s' ended: %s", server_name, e)
+
+        owner = loop.create_task(own(), name=f"mcp-session-{server_name}")
+        try:
+            session = await asyncio.wait_for(asyncio.shield(ready), CONNECT_TIMEOUT)
+        except BaseException:
+            owner.cancel()
+            raise
+        return _PooledSession(session, owner, close_event)
+
+    async def _connect(
+        self, server_name: str, state: _ServerSessions
+    ) -> _PooledSession:
+        """Open a session, retrying with exponential backoff."""
+        for attempt in range(1, CONNECT_ATTEMPTS + 1):
+            delay = state.retry_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                pooled = await self._open(server_name)
+            except Exception as e:
+                state.failures += 1
+                backoff = min(
+                    MAX_RECONNECT_BACKOFF,
+                    RECONNECT_BACKOFF * 2 ** (state.failures - 1),
+                )
+                state.retry_at = time.monotonic() + backoff
+                self._count(server_name, "connect_failed")
+                logger.warning(
+                    "Failed to connect to MCP server '%s' (attempt %d/%d): %s",
+                    server_name,
+                    attempt,
+                    CONNECT_ATTEMPTS,
+                    e,
+                )
+                if attempt == CONNECT_ATTEMPTS:
+                    raise
+                continue
+            state.failures = 0
+            state.retry_at = 0.0
+            self._count(server_name, "opened")
+            return pooled
+        raise AssertionError("unreachable")
+
+    async def _healthy(self, pooled: _PooledSession) -> bool:
+        if pooled.closed:
+            return False
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            await asyncio.wait_for(pooled.session.send_ping(), PING_TIMEOUT)
+        except Exception:
+            return False
+        return True
+
+    async def acquire(self, server_name: str) -> _PooledSession:
+        """Borrow a healthy session of ``server_name``; return it with ``release``."""
+        state = self._servers.setdefault(server_name, _ServerSessions())
+        while True:
+            async with state.available:
+                while not state.idle and state.open >= self.max_sessions:
+                    await state.available.wait()
+                pooled = state.idle.pop() if state.idle else None
+                if pooled is None:
+                    state.open += 1
+            if pooled is None:
+                break
+            try:
+                healthy = await self._healthy(pooled)
+            except BaseException:
+                # Cancelled during the ping: the session is neither borrowed
+                # nor idle, so close it or its slot is never freed
+                await self._discard(state, pooled)
+                raise
+            if healthy:
+                self._count(server_name, "reused")
+                return pooled
+            self._count(server_name, "unhealthy")
+            await self._discard(state, pooled)
+        try:
+            return await self._connect(server_name, state)
+        except BaseException:
+            async with state.available:
+                state.open -= 1
+                state.available.notify()
+            raise
+
+    async def release(
+        self, server_name: str, pooled: _PooledSession, broken: bool = False
+    ) -> None:
+        """Return a borrowed session; a broken one is closed instead."""
+        state = self._servers[server_name]
+        if broken or pooled.closed:
+            self._count(server_name, "broken")
+            await self._discard(state, pooled)
+            return
+        pooled.last_used = time.monotonic()
+        async with state.available:
+            state.idle.append(pooled)
+            state.available.notify()
+
+    async def _discard(self, state: _ServerSessions, pooled: _PooledSession) -> None:
+        pooled.close()
+        async with state.available:
+            state.open -= 1
+            state.available.notify()
+
+    async def call_tool(
+        self, server_name: str, name: str, arguments: Optional[Dict[str, Any]]
+    ) -> CallToolResult:
+        """Call tool ``name`` of ``server_name`` on a pooled session."""
+        pooled = await self.acquire(server_name)
+        broken = True
+        try:
+            result = await pooled.session.call_tool(name, arguments)
+            broken = False
+            return result
+        except McpError:
+            # An error response: the session itself is fine
+            broken = False
+            raise
+        finally:
+            await self.release(server_name, pooled, broken)
+
+    async def close(self) -> None:
+        """Close all idle sessions; borrowed ones close when returned."""
+        owners = []
+        for state in self._servers.values():
+            while state.idle:
+                pooled = state.idle.pop()
+                pooled.close()
+                owners.append(pooled.owner)
+                state.open -= 1
+        if owners:
+            await asyncio.wait(owners, timeout=CONNECT_TIMEOUT)
+
+    def get_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Return session events and open/idle session counts per server."""
+        return {
+            server_name: {
+                **self._metrics.get(server_name, {}),
+                "open": state.open,
+                "idle": len(state.idle),
+            }
+            for server_name, state in self._servers.items()
+        }
+
+
+# One session pool per event loop
+_session_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MCPSessionPool]" = weakref.WeakKeyDictionary()
+
+
+def get_session_pool() -> MCPSessionPool:
+    """Return the session pool of the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool = _session_pools.get(loop)
+    if pool is None:
+        pool = _session_pools[loop] = MCPSessionPool()
+    return pool
+
+
+class _PoolSession:
+    """Stands in for a ``ClientSession`` and calls tools on a pooled session."""
+
+    def __init__(self, server_name: str) -> None:
+        self.server_name = server_name
+
+    async def call_tool(
+        self, name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> CallToolResult:
+        cache = get_result_cache()
+        if cache is None or cache.ttl(self.server_name, name) <= 0:
+            result = await get_session_pool().call_tool(
+                self.server_name, name, arguments
+            )
+            return shape_result(name, arguments, result)
+        cached = await _result_cache_call(
+            cache, cache.get, self.server_name, name, arguments
+        )
+        if cached is not None:
+            return shape_result(name, arguments, cached)
+        result = await get_session_pool().call_tool(self.server_name, name, arguments)
+        # The full output is cached; it is shaped for each call's question
+        await _result_cache_call(
+            cache, cache.put, self.server_name, name, arguments, result
+        )
+        return shape_result(name, arguments, result)
+
+
+async def _result_cache_call(
+    cache: MCPResultCache, func: Callable[..., T], *args: Any
+) -> T:
+    """Call a result cache method, in a thread if it may hit the disk tier."""
+    if cache.path:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+def _tool_schema(tool: Any) -> Optional[Dict[str, Any]]:
+    """Return the MCP schema of an adapter tool, or None for other tools."""
+    if not isinstance(tool, StructuredTool) or not isinstance(tool.args_schema, dict):
+        return None
+    return {
+        "name": tool.name,
+        "description": tool.description,
+        "inputSchema": tool.args_schema,
+        "annotations": tool.metadata,
+    }
+
+
+def _pooled_tool(server_name: str, schema: Dict[str, Any]) -> BaseTool:
+    """Build a tool from its MCP schema that calls through the session pool."""
+    annotations = schema.get("annotations")
+    mcp_tool = Tool(
+        name=schema["name"],
+        description=schema.get("description"),
+        inputSchema=schema["inputSchema"],
+        annotations=ToolAnnotations(**annotations) if annotations else None,
+    )
+    tool: BaseTool = convert_mcp_tool_to_langchain_tool(
+        _PoolSession(server_name), mcp_tool
+    )
+    return tool
+
+
+def _use_session_pool(server_name: str, tool: Any) -> Any:
+    """Rebuild an adapter tool so its calls go through the session pool."""
+    schema = _tool_schema(tool)
+    return tool if schema is None else _pooled_tool(server_name, schema)
+
+
+def _schema_cache_identity(server_name: str) -> Dict[str, Any]:
+    config = MCP_SERVERS.get(server_name, {})
+    return {key: config[key] for key in _SCHEMA_CACHE_CONFIG_KEYS if key in config}
+
+
+def _read_schema_cache(path: str) -> Dict[str, Any]:
+    """Return the servers section of the schema cache file, or {} if unusable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable MCP tool schema cache '{path}': %s", e)
+        return {}
+    if not isinstance(data, dict) or data.get("version") != SCHEMA_CACHE_VERSION:
+        logger.info(f"Ignoring MCP tool schema cache '{path}' of another version")
+        return {}
+    servers = data.get("servers")
+    return servers if isinstance(servers, dict) else {}
+
+
+def _write_schema_cache(
+    path: str, server_name: str, entry: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Store the schemas of one server, keeping other servers' entries."""
+    servers = _read_schema_cache(path)
+    servers[server_name] = entry
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Written to a temporary file first, so readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SCHEMA_CACHE_VERSION, "servers": servers}, f, indent=1)
+    os.replace(tmp_path, path)
+    return servers
+
+
+async def _cached_tools_entry(server_name: str) -> Optional[_ToolsEntry]:
+    """Build an expired tools entry from the schema cache file, if it has one."""
+    global _schema_cache
+    path = os.getenv("MCP_SCHEMA_CACHE_PATH")
+    if not path:
+        return None
+    if _schema_cache is None:
+        generation = _cache_generation
+        servers = await asyncio.to_thread(_read_schema_cache, path)
+        if generation != _cache_generation:
+            return None
+        _schema_cache = servers
+    cached = _schema_cache.get(server_name)
+    if not isinstance(cached, dict):
+        return None
+    if cached.get("config") != _schema_cache_identity(server_name):
+        return None
+    try:
+        tools = [_pooled_tool(server_name, schema) for schema in cached["tools"]]
+    except Exception as e:
+        logger.warning(f"Ignoring cached tool schemas of '{server_name}': %s", e)
+        return None
+    logger.info(
+        f"Loaded {len(tools)} cached tool schemas of MCP server '{server_name}'"
+    )
+    return _ToolsEntry(cast(List[Callable[..., Any]], tools), source="disk")
+
+
+async def _save_tool_schemas(server_name: str, tools: List[Callable[..., Any]]) -> None:
+    """Write the schemas of a server's tools to the cache file if they changed."""
+    global _schema_cache
+    path = os.getenv("MCP_SCHEMA_CACHE_PATH")
+    if not path:
+        return
+    schemas = [_tool_schema(tool) for tool in tools]
+    if any(schema is None for schema in schemas):
+        return
+    identity = _schema_cache_identity(server_name)
+    cached = (_schema_cache or {}).get(server_name)
+    if isinstance(cached, dict) and cached.get("config") == identity:
+        if cached.get("tools") == schemas:
+            return
+    entry = {"config": identity, "saved_at": time.time(), "tools": schemas}
+    generation = _cache_generation
+    try:
+        servers = await asyncio.to_thread(_write_schema_cache, path, server_name, entry)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Failed to write MCP tool schema cache '{path}': %s", e)
+        return
+    if generation == _cache_generation:
+        _schema_cache = servers
+
+
 async def get_mcp_client(
     server_configs: Optional[Dict[str, Any]] = None,
 ) -> Optional[MultiServerMCPClient]:
@@ -62,39 +584,162 @@ async def get_mcp_client(
     return _mcp_client
 
 
-async def get_mcp_tools(server_name: str) -> List[Callable[..., Any]]:
-    """Get MCP tools for a specific server, initializing client if needed."""
-    global _mcp_tools_cache
+def _tools_ttl(server_name: str) -> float:
+    if server_name in _tools_ttls:
+        return _tools_ttls[server_name]
+    return float(os.getenv("MCP_TOOLS_TTL", DEFAULT_TOOLS_TTL))
+
 
-    # Return cached tools if available
-    if server_name in _mcp_tools_cache:
-        return _mcp_tools_cache[server_name]
+async def _load_mcp_tools(server_name: str) -> List[Callable[..., Any]]:
+    """Load the tools of a server; raises if they cannot be loaded."""
+    # Create server-specific client instead of using global singleton
+    server_config = {server_name: MCP_SERVERS[server_name]}
+    client = await get_mcp_client(server_config)
+    if client is None:
+        raise RuntimeError("MCP client unavailable")
+
+    # Get all tools from this specific server; calls reuse pooled sessions
+    all_tools = await client.get_tools()
+    return cast(
+        List[Callable[..., Any]],
+        [_use_session_pool(server_name, tool) for tool in all_tools],
+    )
+
+
+def _discovery_histogram() -> Histogram:
+    return get_histogram(
+        "agent_mcp_discovery_seconds",
+        "MCP tool discovery latency per server, by result: ok, error or timeout.",
+        ("server", "result"),
+    )
+
+
+async def _refresh_mcp_tools(server_name: str) -> List[Callable[..., Any]]:
+    """Load the tools of a server into the cache, or record the failure."""
+    generation = _cache_generation
+    start = time.perf_counter()
+    try:
+        tools = await _load_mcp_tools(server_name)
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        _discovery_histogram().observe(elapsed, server_name, "error")
+        if generation != _cache_generation:
+            return []
+        now = time.monotonic()
+        entry = _mcp_tools_cache.get(server_name) or _ToolsEntry()
+        entry.discovery_seconds = elapsed
+        entry.failures += 1
+        entry.last_error = str(e) or type(e).__name__
+        retry_in = min(
+            MAX_NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_TTL * 2 ** (entry.failures - 1)
+        )
+        entry.expires_at = now + retry_in
+        _mcp_tools_cache[server_name] = entry
+        logger.warning(
+            f"Failed to load tools from MCP server '{server_name}', "
+            f"retrying in {retry_in:g}s: %s",
+            e,
+        )
+        return entry.tools
 
+    elapsed = time.perf_counter() - start
+    _discovery_histogram().observe(elapsed, server_name, "ok")
+    await _save_tool_schemas(server_name, tools)
+    if generation != _cache_generation:
+        # Cleared while loading: the tools may be of an old configuration
+        return tools
+    now = time.monotonic()
+    _mcp_tools_cache[server_name] = _ToolsEntry(
+        tools,
+        loaded_at=now,
+        expires_at=now + _tools_ttl(server_name),
+        discovery_seconds=elapsed,
+    )
+    logger.info(
+        f"Loaded {len(tools)} tools from MCP server '{server_name}' "
+        f"in {elapsed * 1e3:.0f} ms"
+    )
+    return tools
+
+
+async def _first_mcp_tools_load(server_name: str) -> List[Callable[..., Any]]:
+    """Load the tools of a server from the schema cache file, else the server.
+
+    Tools from the file are revalidated by a background refresh, which takes
+    this load's place in flight before it returns, so callers join it.
+    """
+    generation = _cache_generation
+    cached = await _cached_tools_entry(server_name)
+    if generation != _cache_generation:
+        return [] if cached is None else cached.tools
+    if cached is None:
+        return await _refresh_mcp_tools(server_name)
+    _mcp_tools_cache[server_name] = cached
+    _tools_loads.pop(server_name, None)
+    _start_tools_load(server_name)
+    return cached.tools
+
+
+def _start_tools_load(
+    server_name: str, first: bool = False
+) -> "asyncio.Task[List[Callable[..., Any]]]":
+    """Start loading the tools of a server, or join the load in flight.
+
+    ``first`` starts a first load, which may come from the schema cache file.
+    """
+    loop = asyncio.get_running_loop()
+    task = _tools_loads.get(server_name)
+    if task is None or task.done() or task.get_loop() is not loop:
+        load = _first_mcp_tools_load if first else _refresh_mcp_tools
+        task = _tools_loads[server_name] = loop.create_task(
+            load(server_name), name=f"mcp-tools-load-{server_name}"
+        )
+    return task
+
+
+async def get_mcp_tools(server_name: str) -> List[Callable[..., Any]]:
+    """Get MCP tools for a specific server, initializing client if needed.
+
+    Waits only for the first load of a server, which concurrent callers
+    share, unless the schema cache file has its tools. Expired or cached
+    tools are returned as they are and refreshed in the background.
+    """
     # Check if server exists in configuration
     if server_name not in MCP_SERVERS:
         logger.warning(f"MCP server '{server_name}' not found in configuration")
-        _mcp_tools_cache[server_name] = []
         return []
 
-    try:
-        # Create server-specific client instead of using global singleton
-        server_config = {server_name: MCP_SERVERS[server_name]}
-        client = await get_mcp_client(server_config)
-        if client is None:
-            _mcp_tools_cache[server_name] = []
-            return []
+    entry = _mcp_tools_cache.get(server_name)
+    if entry is None:
+        # Shielded: a cancelled caller must not cancel the load for the others
+        return await asyncio.shield(_start_tools_load(server_name, first=True))
+    if time.monotonic() >= entry.expires_at:
+        _start_tools_load(server_name)
+    return entry.tools
 
-        # Get all tools from this specific server
-        all_tools = await client.get_tools()
-        tools = cast(List[Callable[..., Any]], all_tools)
 
-        _mcp_tools_cache[server_name] = tools
-        logger.info(f"Loaded {len(tools)} tools from MCP server '{server_name}'")
-        return tools
-    except Exception as e:
-        logger.warning(f"Failed to load tools from MCP server '{server_name}': %s", e)
-        _mcp_tools_cache[server_name] = []
-        return []
+def get_mcp_tools_cache_state() -> Dict[str, Dict[str, Any]]:
+    """Return the tools cache state of each server, for inspection.
+
+    ``age``, ``expires_in`` and ``discovery_seconds`` (of the latest load)
+    are in seconds; ``failures`` counts failed loads in a row, and
+    ``last_error`` is the latest one.
+    """
+    now = time.monotonic()
+    state = {}
+    for server_name, entry in _mcp_tools_cache.items():
+        task = _tools_loads.get(server_name)
+        state[server_name] = {
+            "tools": len(entry.tools),
+            "age": None if entry.loaded_at is None else now - entry.loaded_at,
+            "expires_in": entry.expires_at - now,
+            "failures": entry.failures,
+            "last_error": entry.last_error,
+            "discovery_seconds": entry.discovery_seconds,
+            "source": entry.source,
+            "refreshing": task is not None and not task.done(),
+        }
+    return state
 
 
 async def get_deepwiki_tools() -> List[Callable[..., Any]]:
@@ -102,18 +747,55 @@ async def get_deepwiki_tools() -> List[Callable[..., Any]]:
     return await get_mcp_tools("deepwiki")
 
 
-async def get_all_mcp_tools() -> List[Callable[..., Any]]:
-    """Get all tools from all configured MCP servers."""
-    all_tools = []
-    for server_name in MCP_SERVERS.keys():
-        tools = await get_mcp_tools(server_name)
-        all_tools.extend(tools)
-    return all_tools
+async def _get_mcp_tools_within(
+    server_name: str, timeout: float
+) -> List[Callable[..., Any]]:
+    """Get the tools of a server, or none if it takes over ``timeout`` seconds."""
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(get_mcp_tools(server_name), timeout)
+    except TimeoutError:
+        _discovery_histogram().observe(
+            time.perf_counter() - start, server_name, "timeout"
+        )
+        logger.warning(
+            f"MCP server '{server_name}' did not answer within {timeout:g}s, "
+            "continuing without its tools"
+        )
+    except Exception as e:
+        logger.warning(f"Failed to get tools from MCP server '{server_name}': %s", e)
+    return []
+
+
+async def get_all_mcp_tools(
+    timeout: Optional[float] = None,
+) -> List[Callable[..., Any]]:
+    """Get all tools from all configured MCP servers, discovered concurrently.
+
+    Servers that take longer than ``timeout`` seconds (default: env var
+    MCP_DISCOVERY_TIMEOUT) are left out; their discovery goes on in the
+    background, so their tools are included by a later call.
+    """
+    if timeout is None:
+        timeout = float(os.getenv("MCP_DISCOVERY_TIMEOUT", DEFAULT_DISCOVERY_TIMEOUT))
+    results = await asyncio.gather(
+        *(_get_mcp_tools_within(name, timeout) for name in list(MCP_SERVERS))
+    )
+    return [tool for tools in results for tool in tools]
+
 
+def add_mcp_server(
+    name: str, config: Dict[str, Any], tools_ttl: Optional[float] = None
+) -> None:
+    """Add a new MCP server configuration.
 
-def add_mcp_server(name: str, config: Dict[str, Any]) -> None:
-    """Add a new MCP server configuration."""
+    ``tools_ttl`` overrides MCP_TOOLS_TTL for the server's tool list.
+    """
     MCP_SERVERS[name] = config
+    if tools_ttl is None:
+        _tools_ttls.pop(name, None)
+    else:
+        _tools_ttls[name] = tools_ttl
     # Clear client to force reinitialization with new config
     clear_mcp_cache()
 
@@ -122,12 +804,36 @@ def remove_mcp_server(name: str) -> None:
     """Remove an MCP server configuration."""
     if name in MCP_SERVERS:
         del MCP_SERVERS[name]
+        _tools_ttls.pop(name, None)
         # Clear client to force reinitialization with new config
         clear_mcp_cache()
 
 
 def clear_mcp_cache() -> None:
-    """Clear the MCP client and tools cache (useful for testing)."""
-    global _mcp_client, _mcp_tools_cache
+    """Clear the MCP client, tools cache and session pools (useful for testing).
+
+    Idle pooled sessions are closed once their event loop runs again.
+    """
+    global _mcp_client, _mcp_tools_cache, _schema_cache, _cache_generation
     _mcp_client = None
     _mcp_tools_cache = {}
+    _schema_cache = None
+    _cache_generation += 1
+    try:
+        running: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    for task in _tools_loads.values():
+        loop = task.get_loop()
+        if task.done() or loop.is_closed():
+            continue
+        if loop is running:
+            task.cancel()
+        else:
+            loop.call_soon_threadsafe(task.cancel)
+    _tools_loads.clear()
+    for pool in list(_session_pools.values()):
+        for state in pool._servers.values():
+            for pooled in state.idle:
+                pooled.close()
+    _session_pools.clear()
@@ -0,0 +1,352 @@
+"""Cache of MCP tool results, in memory and optionally on disk.
+
+Results are cached by server, tool and canonicalized arguments: keys are
+sorted, ``None`` arguments dropped, strings stripped, and repository names
+lowercased. Each tool has its own TTL; tools without one are not cached,
+since a tool call may have side effects. The defaults cover DeepWiki, whose
+answers for a repository change rarely: wiki structure and contents are
+cached for a day, answers to questions for an hour. Override them with
+``MCP_RESULT_CACHE_TTLS`` (e.g. ``ask_question=0,read_wiki_contents=3600``)
+or the ``ttls`` of ``MCPResultCache``; ``server/tool`` entries apply to one
+server only.
+
+Entries are stored as zlib-compressed JSON. The memory tier keeps at most
+``MCP_RESULT_CACHE_MB`` megabytes of them (default 64, 0 disables the cache),
+least recently used first out. Set ``MCP_RESULT_CACHE_PATH`` to also keep
+them in a SQLite file, bounded by ``MCP_RESULT_CACHE_DISK_MB`` (default 512)
+and shared across processes and restarts. Only successful results are
+cached, never error results.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from mcp.types import CallToolResult
+
+from common.metrics import get_counter
+
+logger = logging.getLogger(__name__)
+
+# Seconds a result is cached, by tool; tools without a TTL are not cached
+DEFAULT_RESULT_TTLS: Dict[str, float] = {
+    "read_wiki_structure": 86400.0,
+    "read_wiki_contents": 86400.0,
+    "ask_question": 3600.0,
+}
+
+# Megabytes of compressed results in memory, unless MCP_RESULT_CACHE_MB is set
+DEFAULT_MEMORY_MB = 64.0
+
+# Megabytes of compressed results on disk, unless MCP_RESULT_CACHE_DISK_MB is set
+DEFAULT_DISK_MB = 512.0
+
+# Arguments naming GitHub repositories, whose names are case-insensitive
+_CASE_INSENSITIVE_ARGUMENTS = frozenset({"repoName"})
+
+# Expiry time (epoch seconds) and compressed result
+_Entry = Tuple[float, bytes]
+
+
+def canonical_arguments(arguments: Optional[Mapping[str, Any]]) -> str:
+    """Serialize tool arguments so equivalent calls share a cache entry."""
+    canonical: Dict[str, Any] = {}
+    for name, value in (arguments or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if name in _CASE_INSENSITIVE_ARGUMENTS:
+                value = value.lower()
+        canonical[name] = value
+    return json.dumps(
+        canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+
+
+class MCPResultCache:
+    """Successful MCP tool results by server, tool and arguments.
+
+    With a ``path``, entries are also stored in a SQLite file and memory
+    misses fall back to it; those calls block on disk I/O, so callers on an
+    event loop run them in a thread.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Mapping[str, float]] = None,
+        max_bytes: int = int(DEFAULT_MEMORY_MB * 1024 * 1024),
+        path: Optional[str] = None,
+        max_disk_bytes: int = int(DEFAULT_DISK_MB * 1024 * 1024),
+    ) -> None:
+        """Create an empty cache, or open the one stored at ``path``."""
+        self.ttls = {**DEFAULT_RESULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.path = path
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        # Key -> entry, least recently used first
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mcp_results ("
+                "key TEXT PRIMARY KEY, server TEXT NOT NULL, tool TEXT NOT NULL, "
+                "result BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def ttl(self, server_name: str, tool_name: str) -> float:
+        """Return the seconds results of a tool are cached; 0 if they are not."""
+        ttl = self.ttls.get(f"{server_name}/{tool_name}")
+        if ttl is None:
+            ttl = self.ttls.get(tool_name, 0.0)
+        return max(ttl, 0.0)
+
+    @staticmethod
+    def _key(
+        server_name: str, tool_name: str, arguments: Optional[Mapping[str, Any]]
+    ) -> str:
+        canonical = canonical_arguments(arguments)
+        digest = hashlib.sha256(canonical.encode()).hexdigest()
+        return f"{server_name}/{tool_name}/{digest}"
+
+    def _record(self, tool_name: str, result: str) -> None:
+        get_counter(
+            "agent_mcp_result_cache_lookups_total",
+            "MCP tool result cache lookups by result: memory_hit, disk_hit or miss.",
+            ("tool", "result"),
+        ).inc(tool_name, result)
+
+    def get(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Optional[Mapping[str, Any]],
+    ) -> Optional[CallToolResult]:
+        """Return the cached result of a call, or None on a miss."""
+        key = self._key(server_name, tool_name, arguments)
+        now = time.time()
+        blob = None
+        with self._lock:
+            entry = self._entries.get(key)
+            tier = "memory_hit"
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires, result FROM mcp_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    tier = "disk_hit"
+                    self._conn.execute(
+                        "UPDATE mcp_results SET accessed = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    self._conn.commit()
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                tier = "miss"
+            else:
+                self._store(key, entry)
+                blob = entry[1]
+                if tier == "disk_hit":
+                    self.disk_hits += 1
+                else:
+                    self.memory_hits += 1
+        self._record(tool_name, tier)
+        if blob is None:
+            return None
+        try:
+            return CallToolResult.model_validate_json(zlib.decompress(blob))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Dropping unreadable cached result of '{tool_name}': %s", e)
+            with self._lock:
+                self._remove(key)
+            return None
+
+    def put(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Optional[Mapping[str, Any]],
+        result: CallToolResult,
+    ) -> None:
+        """Cache the result of a call, unless it is an error or not cacheable."""
+        ttl = self.ttl(server_name, tool_name)
+        if ttl <= 0 or result.isError:
+            return
+        key = self._key(server_name, tool_name, arguments)
+        now = time.time()
+        entry = (
+            now + ttl,
+            zlib.compress(
+                result.model_dump_json(by_alias=True, exclude_none=True).encode()
+            ),
+        )
+        with self._lock:
+            self._store(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO mcp_results "
+                    "(key, server, tool, result, size, expires, accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        server_name,
+                        tool_name,
+                        entry[1],
+                        len(entry[1]),
+                        entry[0],
+                        now,
+                    ),
+                )
+                self._conn.execute("DELETE FROM mcp_results WHERE expires <= ?", (now,))
+                self._evict_disk()
+                self._conn.commit()
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        """Put an entry in the memory tier as most recently used; hold the lock."""
+        self._remove_from_memory(key)
+        if len(entry[1]) > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.bytes += len(entry[1])
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def _remove_from_memory(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[1])
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry from both tiers; hold the lock."""
+        self._remove_from_memory(key)
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM mcp_results WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used rows beyond ``max_disk_bytes``; hold the lock."""
+        assert self._conn is not None
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM mcp_results"
+        ).fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        evicted = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM mcp_results ORDER BY accessed"
+        ).fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM mcp_results WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def clear(self) -> None:
+        """Delete all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM mcp_results")
+                self._conn.commit()
+
+    def close(self) -> None:
+        """Close the disk tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Return hit/miss counters, the hit rate and the memory tier size."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
+
+
+# The cache, until configure_result_cache resets it; None when disabled
+_cache: Optional[MCPResultCache] = None
+_cache_loaded = False
+_cache_lock = threading.Lock()
+
+
+def _parse_ttls(value: str) -> Dict[str, float]:
+    """Parse ``tool=seconds`` pairs separated by commas."""
+    ttls = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, seconds = item.partition("=")
+            ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+def configure_result_cache(cache: Optional[MCPResultCache]) -> None:
+    """Set the result cache; None means the env vars or defaults."""
+    global _cache, _cache_loaded
+    with _cache_lock:
+        if _cache is not None and _cache is not cache:
+            _cache.close()
+        _cache = cache
+        _cache_loaded = cache is not None
+
+
+def get_result_cache() -> Optional[MCPResultCache]:
+    """Return the process-wide MCP result cache, or None if it is disabled."""
+    global _cache, _cache_loaded
+    with _cache_lock:
+        if not _cache_loaded:
+            _cache_loaded = True
+            try:
+                ttls = _parse_ttls(os.getenv("MCP_RESULT_CACHE_TTLS", ""))
+                memory_mb = float(os.getenv("MCP_RESULT_CACHE_MB", DEFAULT_MEMORY_MB))
+                disk_mb = float(os.getenv("MCP_RESULT_CACHE_DISK_MB", DEFAULT_DISK_MB))
+            except ValueError:
+                logger.error(
+                    "Invalid MCP_RESULT_CACHE_* env var, MCP result cache disabled"
+                )
+                memory_mb = 0
+            if memory_mb > 0:
+                _cache = MCPResultCache(
+                    ttls,
+                    int(memory_mb * 1024 * 1024),
+                    os.getenv("MCP_RESULT_CACHE_PATH") or None,
+                    int(disk_mb * 1024 * 1024),
+                )
+        return _cache
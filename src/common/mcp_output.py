@@ -0,0 +1,301 @@
+"""Shaping of large MCP tool outputs to a token budget.
+
+DeepWiki's ``read_wiki_contents`` can return whole wikis, which would then
+be sent along with every later model call of the run. Text outputs longer
+than the ``mcp_output_max_tokens`` context field (default 4000, 0 disables
+shaping) are cut down to that budget. The output is split into sections at
+Markdown headings, sections are scored against the question with BM25, and
+the best-scoring ones are kept in their original order. Without query terms
+the output is cut from the end. Tokens are estimated at four characters each.
+
+The question is the latest user message of the run (set by the tools node
+with ``output_query``) plus the string arguments of the tool call. The full
+output is kept out of the message history, in a process-wide store of the
+``STORED_OUTPUTS`` most recently shaped outputs. The ``read_mcp_output`` tool
+pages through it.
+"""
+
+import contextlib
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set
+
+from langgraph.runtime import Runtime, get_runtime
+from mcp.types import CallToolResult, TextContent
+
+from common.context import Context
+from common.metrics import get_counter
+
+logger = logging.getLogger(__name__)
+
+# Characters per token, for a cheap estimate without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Full outputs kept for read_mcp_output, least recently shaped first out
+STORED_OUTPUTS = 64
+
+# Tokens of the budget kept free for the truncation notes
+NOTE_TOKENS = 80
+
+# BM25 parameters: term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_HEADING_RE = re.compile(r"^#{1,6}\s", re.MULTILINE)
+_TERM_RE = re.compile(r"\w+")
+
+# Words too common to tell sections apart
+_STOPWORDS = frozenset(
+    "the and for are but not you with this that from have what how does when "
+    "where which who why can its into about use used using".split()
+)
+
+# Question of the current tool calls, set by the tools node
+_query: ContextVar[str] = ContextVar("mcp_output_query", default="")
+
+# Output ID -> full text
+_outputs: "OrderedDict[str, str]" = OrderedDict()
+_outputs_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@contextlib.contextmanager
+def output_query(query: str) -> Iterator[None]:
+    """Score shaped outputs of tool calls in this context against ``query``."""
+    token = _query.set(query)
+    try:
+        yield
+    finally:
+        _query.reset(token)
+
+
+def _terms(text: str) -> List[str]:
+    return [
+        term
+        for term in _TERM_RE.findall(text.lower())
+        if len(term) > 2 and term not in _STOPWORDS
+    ]
+
+
+def _split_long(section: str, max_chars: int) -> List[str]:
+    """Split text at blank lines, then lines, into parts of ``max_chars``."""
+    parts: List[str] = []
+    current = ""
+    for piece in section.split("\n\n"):
+        while len(piece) > max_chars:
+            cut = piece.rfind("\n", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(piece[:cut])
+            piece = piece[cut:].lstrip("\n")
+        if current and len(current) + 2 + len(piece) > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_sections(text: str, max_tokens: int) -> List[str]:
+    """Split text at Markdown headings into sections of at most ``max_tokens``."""
+    starts = [match.start() for match in _HEADING_RE.finditer(text)]
+    bounds = [0, *[start for start in starts if start > 0], len(text)]
+    max_chars = max(max_tokens, 1) * CHARS_PER_TOKEN
+    sections = []
+    for start, end in zip(bounds, bounds[1:]):
+        section = text[start:end].strip("\n")
+        if section:
+            sections.extend(_split_long(section, max_chars))
+    return sections
+
+
+def score_sections(sections: Sequence[str], query: str) -> List[float]:
+    """Score sections against a query with BM25."""
+    query_terms = set(_terms(query))
+    if not query_terms:
+        return [0.0] * len(sections)
+    counts = [Counter(_terms(section)) for section in sections]
+    lengths = [sum(count.values()) for count in counts]
+    average = sum(lengths) / len(lengths) if lengths else 0.0
+    # Number of sections containing each query term
+    documents = Counter(
+        term for count in counts for term in query_terms.intersection(count)
+    )
+    idf = {
+        term: math.log(1 + (len(sections) - df + 0.5) / (df + 0.5))
+        for term, df in documents.items()
+    }
+    scores = []
+    for count, length in zip(counts, lengths):
+        score = 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average or 1))
+        for term in query_terms:
+            frequency = count[term]
+            if not frequency:
+                continue
+            score += idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+        scores.append(score)
+    return scores
+
+
+def _store_output(text: str) -> str:
+    output_id = hashlib.sha256(text.encode()).hexdigest()[:16]
+    with _outputs_lock:
+        _outputs[output_id] = text
+        _outputs.move_to_end(output_id)
+        while len(_outputs) > STORED_OUTPUTS:
+            _outputs.popitem(last=False)
+    return output_id
+
+
+def _pages(text: str, page_tokens: int) -> List[str]:
+    return _split_long(text, max(page_tokens, 1) * CHARS_PER_TOKEN) or [""]
+
+
+def shape_text(text: str, query: str, max_tokens: int) -> str:
+    """Cut text down to ``max_tokens``, keeping the sections most relevant to query.
+
+    Text within the budget is returned unchanged. Otherwise the full text is
+    stored for ``read_mcp_output`` and the result says how to page through it.
+    """
+    total = estimate_tokens(text)
+    if max_tokens <= 0 or total <= max_tokens:
+        return text
+    budget = max(max_tokens - NOTE_TOKENS, 1)
+    sections = split_sections(text, max(budget // 4, 1))
+    scores = score_sections(sections, query)
+    relevant = any(scores)
+    # Best score first; ties keep the document order
+    ranked = sorted(range(len(sections)), key=lambda i: (-scores[i], i))
+    kept: Set[int] = set()
+    used = 0
+    for index in ranked:
+        tokens = estimate_tokens(sections[index])
+        if used + tokens <= budget:
+            kept.add(index)
+            used += tokens
+        elif not relevant:
+            break
+
+    output_id = _store_output(text)
+    pages = len(_pages(text, max_tokens))
+    note = (
+        f"sections {'most relevant to the question' if relevant else 'first'}. "
+        f'Call read_mcp_output with output_id="{output_id}" and page 1 to '
+        f"{pages} to read all of it.]"
+    )
+    shaped = _render(sections, kept, total, note)
+    # The omission markers count too: drop the least relevant until it fits
+    for index in reversed([i for i in ranked if i in kept]):
+        if estimate_tokens(shaped) <= max_tokens:
+            break
+        kept.discard(index)
+        shaped = _render(sections, kept, total, note)
+    return shaped
+
+
+def _render(sections: Sequence[str], kept: Set[int], total: int, note: str) -> str:
+    parts = []
+    omitted = 0
+    for index, section in enumerate(sections):
+        if index in kept:
+            if omitted:
+                parts.append(f"[... {omitted} section(s) omitted ...]")
+                omitted = 0
+            parts.append(section)
+        else:
+            omitted += 1
+    if omitted:
+        parts.append(f"[... {omitted} section(s) omitted ...]")
+    used = sum(estimate_tokens(sections[index]) for index in kept)
+    parts.append(
+        f"[Output shortened to about {used} of {total} tokens, keeping the {note}"
+    )
+    return "\n\n".join(parts)
+
+
+def _max_tokens() -> int:
+    try:
+        runtime: Optional[Runtime[Context]] = get_runtime(Context)
+    except RuntimeError:
+        runtime = None
+    # Outside a graph run: env var or default
+    context = runtime.context if runtime is not None else None
+    if not isinstance(context, Context):
+        context = Context()
+    return context.mcp_output_max_tokens
+
+
+def shape_result(
+    tool_name: str,
+    arguments: Optional[Mapping[str, Any]],
+    result: CallToolResult,
+) -> CallToolResult:
+    """Return the result with its text cut down to the token budget of the run."""
+    texts = [item.text for item in result.content if isinstance(item, TextContent)]
+    text = "\n\n".join(texts)
+    max_tokens = _max_tokens()
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return result
+    query = " ".join(
+        [_query.get()]
+        + [value for value in (arguments or {}).values() if isinstance(value, str)]
+    )
+    shaped = shape_text(text, query, max_tokens)
+    get_counter(
+        "agent_mcp_outputs_shaped_total",
+        "MCP tool outputs cut down to the token budget.",
+        ("tool",),
+    ).inc(tool_name)
+    logger.info(
+        f"Shortened output of MCP tool '{tool_name}' from about "
+        f"{estimate_tokens(text)} to {estimate_tokens(shaped)} tokens"
+    )
+    content = [item for item in result.content if not isinstance(item, TextContent)]
+    return result.model_copy(
+        update={"content": [TextContent(type="text", text=shaped), *content]}
+    )
+
+
+async def read_mcp_output(output_id: str, page: int = 1) -> str:
+    """Read one page of a shortened MCP tool output.
+
+    Use this when a tool output says it was shortened and the omitted
+    sections are needed.
+
+    Args:
+        output_id: The output_id given in the shortened output
+        page: Page number, starting at 1
+    """
+    with _outputs_lock:
+        text = _outputs.get(output_id)
+    if text is None:
+        return f"Unknown output_id '{output_id}'; the output is no longer stored."
+    pages = _pages(text, _max_tokens() or estimate_tokens(text))
+    if not 1 <= page <= len(pages):
+        return f"Page {page} does not exist; output '{output_id}' has {len(pages)}."
+    return f"[Page {page} of {len(pages)} of output {output_id}]\n\n{pages[page - 1]}"
+
+
+def get_stored_outputs() -> Dict[str, int]:
+    """Return the estimated token count of each stored output, by ID."""
+    with _outputs_lock:
+        return {key: estimate_tokens(text) for key, text in _outputs.items()}
+
+
+def clear_stored_outputs() -> None:
+    """Forget all stored outputs."""
+    with _outputs_lock:
+        _outputs.clear()
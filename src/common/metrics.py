@@ -0,0 +1,335 @@
+"""Lightweight in-process latency metrics shared by agent components.
+
+Besides rolling-window latency trackers, this module keeps Prometheus-style
+histograms and counters. ``render_prometheus`` dumps them in the Prometheus
+text exposition format and ``start_metrics_server`` serves that dump from a
+local ``/metrics`` endpoint.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the default latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _nearest_rank(sorted_samples: List[float], q: float) -> float:
+    """Return the nearest-rank ``q``-th percentile of a sorted, non-empty list."""
+    rank = max(0, math.ceil(q / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+class LatencyTracker:
+    """Rolling window of latency samples (in seconds) with percentile queries.
+
+    The tracker keeps the most recent ``window`` observations, so percentiles
+    follow the current behaviour of a provider instead of its whole history.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        """Create a tracker that keeps at most ``window`` samples."""
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record a single latency sample."""
+        with self._lock:
+            self._samples.append(seconds)
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        """Total number of samples observed since creation."""
+        return self._count
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the ``q``-th percentile (0-100) of the window, or None if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return _nearest_rank(samples, q)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return count, p50, p95 and p99 of the current window."""
+        with self._lock:
+            samples = sorted(self._samples)
+        result: Dict[str, float] = {"count": float(self._count)}
+        for q in (50, 95, 99):
+            result[f"p{q}"] = _nearest_rank(samples, q) if samples else 0.0
+        return result
+
+    def reset(self) -> None:
+        """Drop all samples."""
+        with self._lock:
+            self._samples.clear()
+            self._count = 0
+
+
+# Process-wide trackers keyed by name (e.g. "hedge:qwen:qwen-flash")
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    """Get or create the process-wide latency tracker registered under ``name``."""
+    with _trackers_lock:
+        tracker = _trackers.get(name)
+        if tracker is None:
+            tracker = _trackers[name] = LatencyTracker()
+        return tracker
+
+
+def list_latency_trackers() -> List[str]:
+    """Return the names of all registered latency trackers."""
+    with _trackers_lock:
+        return sorted(_trackers)
+
+
+def clear_latency_trackers() -> None:
+    """Remove all registered latency trackers (useful for testing)."""
+    with _trackers_lock:
+        _trackers.clear()
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set such as ``{node="tools",le="0.5"}``."""
+    pairs = [
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int) -> None:
+        # Per-bucket (non-cumulative) counts; the last one is the +Inf bucket
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels, cheap enough for hot paths.
+
+    An observation is a binary search over the bucket bounds plus a few
+    increments under a lock; nothing is allocated after the first observation
+    of a label set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        """Create a histogram with the given (sorted) bucket upper bounds."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record one observation for the given label values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = _HistogramSeries(
+                    len(self.buckets)
+                )
+            series.counts[index] += 1
+            series.sum += value
+            series.count += 1
+
+    def snapshot(self, *label_values: str) -> Dict[str, float]:
+        """Return count and sum of one label set."""
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                return {"count": 0.0, "sum": 0.0}
+            return {"count": float(series.count), "sum": series.sum}
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = sorted(
+                (labels, list(data.counts), data.sum, data.count)
+                for labels, data in self._series.items()
+            )
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = _format_labels(
+                    self.label_names, labels, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_set = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_set} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_set} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> None:
+        """Create a counter."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        """Increase the counter of the given label values by ``amount``."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        """Return the current value of one label set."""
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            label_set = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}{label_set} {_format_value(value)}")
+        return lines
+
+
+# Process-wide histograms and counters keyed by metric name
+_metrics: Dict[str, Union[Histogram, Counter]] = {}
+_metrics_lock = threading.Lock()
+
+
+def get_histogram(
+    name: str,
+    documentation: str,
+    label_names: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+) -> Histogram:
+    """Get or create the process-wide histogram registered under ``name``."""
+    with _metrics_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Histogram(
+                name, documentation, label_names, buckets
+            )
+        if not isinstance(metric, Histogram):
+            raise ValueError(f"Metric '{name}' is already registered as a counter")
+        return metric
+
+
+def get_counter(
+    name: str, documentation: str, label_names: Sequence[str] = ()
+) -> Counter:
+    """Get or create the process-wide counter registered under ``name``."""
+    with _metrics_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Counter(name, documentation, label_names)
+        if not isinstance(metric, Counter):
+            raise ValueError(f"Metric '{name}' is already registered as a histogram")
+        return metric
+
+
+def render_prometheus() -> str:
+    """Dump all histograms and counters in the Prometheus text format."""
+    with _metrics_lock:
+        metrics = [_metrics[name] for name in sorted(_metrics)]
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def clear_metrics() -> None:
+    """Remove all registered histograms and counters (useful for testing)."""
+    with _metrics_lock:
+        _metrics.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        logger.debug("metrics endpoint: " + format, *args)
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``render_prometheus()`` at ``http://addr:port/metrics``.
+
+    The server runs in a daemon thread; call ``shutdown()`` on the returned
+    server to stop it.
+    """
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    )
+    thread.start()
+    logger.info("Serving metrics on http://%s:%d/metrics", addr, server.server_port)
+    return server
@@ -1,9 +1,27 @@
 """Model integrations for the ReAct agent."""
 
+from .hedge import HedgedChatModel, create_hedged_model
 from .qwen import create_qwen_model
+from .ratelimit import TokenBucketRateLimiter, configure_rate_limit
+from .scripted import (
+    ScriptedChatModel,
+    create_scripted_model,
+    register_script,
+    sop_script,
+)
 from .siliconflow import create_siliconflow_model
+from .usage import configure_model_price
 
 __all__ = [
     "create_qwen_model",
     "create_siliconflow_model",
+    "HedgedChatModel",
+    "create_hedged_model",
+    "TokenBucketRateLimiter",
+    "configure_rate_limit",
+    "configure_model_price",
+    "ScriptedChatModel",
+    "create_scripted_model",
+    "register_script",
+    "sop_script",
 ]
@@ -0,0 +1,306 @@
+"""Persistent LLM response cache keyed on a normalized request hash."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import warnings
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+logger = logging.getLogger(__name__)
+
+# Default time-to-live of a cached response (seconds)
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+# Default on-disk size budget before least-recently-used entries are evicted
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# response_metadata key set on responses replayed from the cache
+CACHE_HIT_KEY = "cache_hit"
+
+# Object addresses appear in serialized model params and differ per process
+_ADDRESS_RE = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a serialized message list so equivalent requests hash equally.
+
+    Message IDs, provider metadata and raw ``additional_kwargs`` differ between
+    runs and are dropped. Tool call IDs are renumbered in order of appearance,
+    consistently across AI tool calls and the matching tool messages.
+    """
+    try:
+        messages = json.loads(prompt)
+    except json.JSONDecodeError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+
+    call_ids: Dict[str, str] = {}
+
+    def call_id(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        return call_ids.setdefault(value, f"call_{len(call_ids)}")
+
+    normalized = []
+    for message in messages:
+        if not isinstance(message, dict) or "kwargs" not in message:
+            normalized.append(message)
+            continue
+        kwargs = message["kwargs"]
+        entry: Dict[str, Any] = {
+            "type": kwargs.get("type", message.get("id", [""])[-1]),
+            "content": kwargs.get("content"),
+        }
+        if kwargs.get("name"):
+            entry["name"] = kwargs["name"]
+        if kwargs.get("tool_calls"):
+            entry["tool_calls"] = [
+                {
+                    "name": c.get("name"),
+                    "args": c.get("args"),
+                    "id": call_id(c.get("id")),
+                }
+                for c in kwargs["tool_calls"]
+            ]
+        if "tool_call_id" in kwargs:
+            entry["tool_call_id"] = call_id(kwargs["tool_call_id"])
+            entry["status"] = kwargs.get("status", "success")
+        normalized.append(entry)
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+def request_key(prompt: str, llm_string: str) -> str:
+    """Return the cache key for a serialized prompt and model parameters."""
+    payload = normalize_prompt(prompt) + "\x00" + _ADDRESS_RE.sub("", llm_string)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _strip_ids(generation: Generation) -> Generation:
+    """Drop the message ID so a replayed response gets a fresh one."""
+    if isinstance(generation, ChatGeneration):
+        message = generation.message.model_copy(update={"id": None})
+        return generation.model_copy(update={"message": message})
+    return generation
+
+
+def _refresh_tool_call_ids(generation: Generation) -> Generation:
+    """Give replayed tool calls new IDs so they never collide within a thread."""
+    if not isinstance(generation, ChatGeneration):
+        return generation
+    message = generation.message
+    if not isinstance(message, AIMessage) or not message.tool_calls:
+        return generation
+    mapping = {
+        call["id"]: f"call_{uuid.uuid4().hex[:24]}"
+        for call in message.tool_calls
+        if call.get("id")
+    }
+    tool_calls = [
+        {**call, "id": mapping.get(call["id"], call["id"])} if call.get("id") else call
+        for call in message.tool_calls
+    ]
+    additional_kwargs = dict(message.additional_kwargs)
+    if isinstance(additional_kwargs.get("tool_calls"), list):
+        additional_kwargs["tool_calls"] = [
+            {**raw, "id": mapping.get(raw.get("id"), raw.get("id"))}
+            for raw in additional_kwargs["tool_calls"]
+        ]
+    message = message.model_copy(
+        update={"tool_calls": tool_calls, "additional_kwargs": additional_kwargs}
+    )
+    return generation.model_copy(update={"message": message})
+
+
+def _mark_cache_hit(generation: Generation) -> Generation:
+    """Flag a replayed response, so it is not billed again."""
+    if not isinstance(generation, ChatGeneration):
+        return generation
+    message = generation.message
+    metadata = {**message.response_metadata, CACHE_HIT_KEY: True}
+    message = message.model_copy(update={"response_metadata": metadata})
+    return generation.model_copy(update={"message": message})
+
+
+class SQLiteResponseCache(BaseCache):
+    """LLM response cache stored in a local SQLite file.
+
+    Entries expire after ``ttl`` seconds. Once the stored payloads exceed
+    ``max_bytes``, the least recently used entries are evicted. The async
+    methods inherited from ``BaseCache`` run lookups in a thread pool, so the
+    event loop is never blocked on disk I/O.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ) -> None:
+        """Open (or create) the cache database at ``path``."""
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+        )
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return cached generations for the request, or None on a miss."""
+        key = request_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created = row
+            if now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", LangChainBetaWarning)
+                generations: List[Generation] = loads(value.decode("utf-8"))
+        except Exception as e:
+            logger.warning("Dropping unreadable LLM cache entry: %s", e)
+            return None
+        return [_mark_cache_hit(_refresh_tool_call_ids(g)) for g in generations]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store generations for the request and evict if over budget."""
+        key = request_key(prompt, llm_string)
+        value = dumps([_strip_ids(g) for g in return_val]).encode("utf-8")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Delete expired entries, then least recently used ones over budget."""
+        cursor = self._conn.execute(
+            "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+        )
+        self.expired += max(cursor.rowcount, 0)
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ).fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self, **kwargs: Any) -> None:
+        """Delete all cached responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Return hit/miss counters, hit rate and stored size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+# Open caches keyed by database path
+_response_caches: Dict[str, SQLiteResponseCache] = {}
+_response_caches_lock = threading.Lock()
+
+
+def get_response_cache(path: str) -> SQLiteResponseCache:
+    """Get the process-wide response cache stored at ``path``.
+
+    TTL and size budget default to env vars LLM_CACHE_TTL (seconds) and
+    LLM_CACHE_MAX_MB.
+    """
+    with _response_caches_lock:
+        cache = _response_caches.get(path)
+        if cache is None:
+            ttl = float(os.getenv("LLM_CACHE_TTL", str(DEFAULT_CACHE_TTL)))
+            max_mb = os.getenv("LLM_CACHE_MAX_MB")
+            max_bytes = (
+                int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_CACHE_MAX_BYTES
+            )
+            cache = _response_caches[path] = SQLiteResponseCache(
+                path, ttl=ttl, max_bytes=max_bytes
+            )
+        return cache
+
+
+def list_response_caches() -> Sequence[SQLiteResponseCache]:
+    """Return all open response caches."""
+    with _response_caches_lock:
+        return list(_response_caches.values())
+
+
+def clear_response_caches() -> None:
+    """Close and forget all open response caches (useful for testing)."""
+    with _response_caches_lock:
+        for cache in _response_caches.values():
+            cache._conn.close()
+        _response_caches.clear()
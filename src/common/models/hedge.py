@@ -0,0 +1,444 @@
+"""Hedged chat model that races a primary model against backup providers."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForLLMRun,
+    BaseCallbackManager,
+    CallbackManager,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    BaseMessageChunk,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
+from pydantic import ConfigDict, Field
+
+from ..metrics import Counter, LatencyTracker, get_counter, get_latency_tracker
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Percentile of the primary's latency after which a hedge request is fired
+DEFAULT_HEDGE_PERCENTILE = 95.0
+# Hedge delay (seconds) used until enough latency samples have been collected
+DEFAULT_HEDGE_INITIAL_DELAY = 2.0
+# Minimum number of samples before the observed percentile is trusted
+MIN_HEDGE_SAMPLES = 20
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that hedges slow requests across providers.
+
+    The request is sent to ``models[0]``. If no valid response arrives within
+    the configured latency percentile of that model, the same request is sent
+    to the next model, and so on. The first valid response wins and the
+    remaining in-flight requests are cancelled. A model that fails before the
+    hedge delay elapses triggers the next model immediately, so the chain also
+    acts as a fallback.
+
+    Streaming races the models to their first chunk and then streams the
+    winner's; a failure after the first chunk fails the stream.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    models: List[Runnable[LanguageModelInput, BaseMessage]]
+    """Models to try, in priority order."""
+
+    model_names: List[str]
+    """Fully specified names of ``models``, used as metric labels."""
+
+    hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE
+    """Latency percentile (0-100) of the primary after which a hedge is fired."""
+
+    initial_delay: float = DEFAULT_HEDGE_INITIAL_DELAY
+    """Hedge delay in seconds used while too few samples exist."""
+
+    min_samples: int = MIN_HEDGE_SAMPLES
+    """Number of primary samples required before the percentile is used."""
+
+    metrics_prefix: str = Field(default="hedge")
+    """Prefix of the latency trackers this model reports to.
+
+    ``create_hedged_model`` sets it to the full hedge spec, so every distinct
+    model chain keeps its own latency history across graph steps.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        # Include the inner models' settings and bound tools, which the
+        # response cache key is built from
+        return {
+            "model_names": self.model_names,
+            "hedge_percentile": self.hedge_percentile,
+            "models": [_model_params(model) for model in self.models],
+        }
+
+    def _tracker(self, label: str) -> LatencyTracker:
+        return get_latency_tracker(f"{self.metrics_prefix}:{label}")
+
+    def _count(self, event: str) -> None:
+        _hedge_events().inc(self.metrics_prefix, event)
+
+    def hedge_delay(self) -> float:
+        """Return the current delay before a hedge request is fired."""
+        tracker = self._tracker(self.model_names[0])
+        if tracker.count < self.min_samples:
+            return self.initial_delay
+        observed = tracker.percentile(self.hedge_percentile)
+        return self.initial_delay if observed is None else observed
+
+    def bind_tools(
+        self,
+        tools: Sequence[Any],
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Bind tools to every underlying model."""
+        bound = [
+            model.bind_tools(tools, **kwargs)  # type: ignore[attr-defined]
+            for model in self.models
+        ]
+        return self.model_copy(update={"models": bound})
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Call the models sequentially, falling back on failure.
+
+        Hedging needs concurrency, so the synchronous path only provides the
+        fallback half of the behaviour.
+        """
+        config = _child_config(run_manager)
+        last_error: Optional[BaseException] = None
+        for name, model in zip(self.model_names, self.models):
+            start = time.perf_counter()
+            try:
+                message = model.invoke(messages, config, stop=stop, **kwargs)
+            except Exception as e:
+                logger.warning("Hedged model '%s' failed: %s", name, e)
+                last_error = e
+                continue
+            elapsed = time.perf_counter() - start
+            self._tracker(name).observe(elapsed)
+            self._tracker("total").observe(elapsed)
+            return _to_chat_result(message, name)
+        assert last_error is not None
+        raise last_error
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Race the models, firing a hedge each time the hedge delay elapses."""
+        config = _child_config(run_manager)
+        message, name = await self._race(
+            lambda model: model.ainvoke(messages, config, stop=stop, **kwargs)
+        )
+        return _to_chat_result(message, name)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Race the models to their first chunk, then stream the winner's.
+
+        The hedge delay is still taken from full response latencies, and no
+        latencies are recorded for streamed calls.
+        """
+        config = _child_config(run_manager)
+
+        async def first_chunk(
+            model: Runnable[LanguageModelInput, BaseMessage],
+        ) -> Tuple[BaseMessageChunk, AsyncIterator[BaseMessageChunk]]:
+            stream = cast(
+                AsyncIterator[BaseMessageChunk],
+                model.astream(messages, config, stop=stop, **kwargs),
+            )
+            try:
+                chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                raise ValueError("Model returned no chunks") from None
+            except BaseException:
+                await _aclose(stream)
+                raise
+            return chunk, stream
+
+        (chunk, stream), name = await self._race(
+            first_chunk, timed=False, discard=lambda result: _aclose(result[1])
+        )
+        try:
+            yield _to_generation_chunk(chunk)
+            async for chunk in stream:
+                yield _to_generation_chunk(chunk)
+        finally:
+            await _aclose(stream)
+        # Named once at the end: merged chunks concatenate string metadata
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", response_metadata={"model_name": name})
+        )
+
+    async def _race(
+        self,
+        call: Callable[[Runnable[LanguageModelInput, BaseMessage]], Awaitable[_T]],
+        timed: bool = True,
+        discard: Optional[Callable[[_T], Awaitable[None]]] = None,
+    ) -> Tuple[_T, str]:
+        """Race ``call`` over the models and return the first result and model.
+
+        ``timed`` records the latency of each call, and ``discard`` releases
+        the result of a call that succeeded after another one won.
+        """
+        start = time.perf_counter()
+        delay = self.hedge_delay()
+        pending: Dict[asyncio.Task[_T], str] = {}
+        last_error: Optional[BaseException] = None
+        next_index = 0
+
+        def launch() -> None:
+            nonlocal next_index
+            name = self.model_names[next_index]
+            awaitable = call(self.models[next_index])
+            next_index += 1
+            if timed:
+                awaitable = _timed(awaitable, self._tracker(name))
+            pending[asyncio.ensure_future(awaitable)] = name
+            if next_index > 1:
+                self._count("hedges_fired")
+
+        launch()
+        try:
+            while pending:
+                can_hedge = next_index < len(self.models)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # The hedge delay elapsed without a response
+                    launch()
+                    continue
+                # Retrieve every finished task's outcome, even after a winner,
+                # so failed losers do not log "exception was never retrieved"
+                winner: Optional[asyncio.Task[_T]] = None
+                winner_name = ""
+                for task in done:
+                    name = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if winner is None:
+                            winner, winner_name = task, name
+                        elif discard is not None:
+                            await discard(task.result())
+                        continue
+                    logger.warning("Hedged model '%s' failed: %s", name, error)
+                    last_error = error
+                if winner is not None:
+                    if winner_name != self.model_names[0]:
+                        self._count("hedge_wins")
+                    if timed:
+                        self._tracker("total").observe(time.perf_counter() - start)
+                    return winner.result(), winner_name
+                if not pending and next_index < len(self.models):
+                    # Everything in flight failed; fall back immediately
+                    launch()
+        finally:
+            for task, name in pending.items():
+                task.cancel()
+                if timed and name == self.model_names[0]:
+                    # Record the censored primary latency as a lower bound so
+                    # the percentile does not drift down while hedges win
+                    self._tracker(name).observe(time.perf_counter() - start)
+            # Wait for the losers to unwind, so none outlives this call
+            results = await asyncio.gather(*pending, return_exceptions=True)
+            if discard is not None:
+                # A loser may have finished after the last wait
+                for result in results:
+                    if not isinstance(result, BaseException):
+                        await discard(result)
+        assert last_error is not None
+        raise last_error
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Return p50/p95/p99 latency snapshots for this hedged model.
+
+        Per-model entries and ``total`` hold response latencies; the
+        ``hedges_fired`` and ``hedge_wins`` entries hold only a ``count``.
+        """
+        metrics = {
+            label: self._tracker(label).snapshot()
+            for label in [*self.model_names, "total"]
+        }
+        for event in ("hedges_fired", "hedge_wins"):
+            metrics[event] = {
+                "count": _hedge_events().value(self.metrics_prefix, event)
+            }
+        return metrics
+
+
+def _hedge_events() -> Counter:
+    return get_counter(
+        "agent_hedge_events_total",
+        "Hedged model events: hedges_fired or hedge_wins.",
+        ("hedge", "event"),
+    )
+
+
+def _child_config(
+    run_manager: Optional[
+        Union[CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun]
+    ],
+) -> Optional[RunnableConfig]:
+    """Trace the inner calls as children of the hedged run.
+
+    Model run managers have no ``get_child``, so this builds the child
+    manager the same way. The inner runs are tagged not to be streamed:
+    the hedged run streams the winner itself.
+    """
+    if run_manager is None:
+        return None
+    manager: BaseCallbackManager
+    if isinstance(run_manager, AsyncCallbackManagerForLLMRun):
+        manager = AsyncCallbackManager(handlers=[], parent_run_id=run_manager.run_id)
+    else:
+        manager = CallbackManager(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    manager.add_tags([TAG_NOSTREAM], inherit=False)
+    return {"callbacks": manager}
+
+
+async def _timed(awaitable: Awaitable[_T], tracker: LatencyTracker) -> _T:
+    """Await ``awaitable`` and record its latency if it succeeds."""
+    start = time.perf_counter()
+    result = await awaitable
+    tracker.observe(time.perf_counter() - start)
+    return result
+
+
+async def _aclose(stream: AsyncIterator[Any]) -> None:
+    """Close an async generator stream, running its cleanup."""
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+def _model_params(model: Runnable[LanguageModelInput, BaseMessage]) -> Dict[str, Any]:
+    """Return the identifying params of a model and the kwargs bound to it."""
+    params: Dict[str, Any] = {}
+    while isinstance(model, RunnableBinding):
+        params = {**model.kwargs, **params}
+        model = model.bound
+    if isinstance(model, BaseChatModel):
+        params = {"_type": model._llm_type, **model._identifying_params, **params}
+    return params
+
+
+def _to_chat_result(message: BaseMessage, name: str) -> ChatResult:
+    """Wrap the winning message, naming the model that produced it."""
+    if not isinstance(message, AIMessage):
+        message = AIMessage(content=message.content)
+    metadata = {**message.response_metadata, "model_name": name}
+    message = message.model_copy(update={"response_metadata": metadata})
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _to_generation_chunk(chunk: BaseMessageChunk) -> ChatGenerationChunk:
+    """Wrap a streamed chunk, leaving naming the model to the final chunk."""
+    if not isinstance(chunk, AIMessageChunk):
+        chunk = AIMessageChunk(content=chunk.content)
+    if "model_name" in chunk.response_metadata:
+        metadata = dict(chunk.response_metadata)
+        del metadata["model_name"]
+        chunk = chunk.model_copy(update={"response_metadata": metadata})
+    return ChatGenerationChunk(message=chunk)
+
+
+def create_hedged_model(
+    spec: str,
+    hedge_percentile: Optional[float] = None,
+    initial_delay: Optional[float] = None,
+    **kwargs: Any,
+) -> HedgedChatModel:
+    """Create a hedged model from a ``|``-separated list of model names.
+
+    Args:
+        spec: Fully specified model names separated by ``|``, primary first
+              (e.g., 'qwen:qwen-flash|siliconflow:Qwen/Qwen3-8B')
+        hedge_percentile: Primary latency percentile (0-100) after which a hedge
+                          request is fired. Defaults to env var HEDGE_PERCENTILE
+        initial_delay: Hedge delay in seconds used until enough latency samples
+                       exist. Defaults to env var HEDGE_INITIAL_DELAY
+        **kwargs: Additional HedgedChatModel parameters
+
+    Returns:
+        Configured HedgedChatModel instance
+    """
+    from ..utils import load_chat_model
+
+    model_names = [name.strip() for name in spec.split("|") if name.strip()]
+    if len(model_names) < 2:
+        raise ValueError(
+            f"Hedged model spec needs at least two models separated by '|': {spec!r}"
+        )
+
+    if hedge_percentile is None:
+        hedge_percentile = float(
+            os.getenv("HEDGE_PERCENTILE", str(DEFAULT_HEDGE_PERCENTILE))
+        )
+    if initial_delay is None:
+        initial_delay = float(
+            os.getenv("HEDGE_INITIAL_DELAY", str(DEFAULT_HEDGE_INITIAL_DELAY))
+        )
+
+    return HedgedChatModel(
+        models=[load_chat_model(name) for name in model_names],
+        model_names=model_names,
+        hedge_percentile=hedge_percentile,
+        initial_delay=initial_delay,
+        metrics_prefix=kwargs.pop("metrics_prefix", "hedge:" + "|".join(model_names)),
+        **kwargs,
+    )
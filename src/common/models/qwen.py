@@ -6,6 +6,7 @@ from typing import Any, Optional, Union
 from langchain_qwq import ChatQwen, ChatQwQ
 
 from ..utils import normalize_region
+from .ratelimit import apply_rate_limit
 
 
 def create_qwen_model(
@@ -20,7 +21,8 @@ def create_qwen_model(
     Args:
         model_name: The model name (e.g., 'qwq-32b-preview', 'qwen-plus')
         api_key: DashScope API key (defaults to env var DASHSCOPE_API_KEY)
-        base_url: Custom base URL for API (optional)
+        base_url: Custom base URL for API (defaults to env var DASHSCOPE_API_BASE, else the
+                  endpoint of the region)
         region: Region setting ('prc'/'cn' for China, 'international'/'en' for global)
                 Defaults to env var REGION
         **kwargs: Additional model parameters
@@ -36,6 +38,10 @@ def create_qwen_model(
     if region is None:
         region = os.getenv("REGION")
 
+    # Get base URL from env if not provided (e.g., a local OpenAI-compatible server)
+    if base_url is None:
+        base_url = os.getenv("DASHSCOPE_API_BASE") or None
+
     # Set base URL based on region if not explicitly provided
     if base_url is None and region:
         # Normalize region aliases
@@ -53,6 +59,9 @@ def create_qwen_model(
     if base_url:
         config["base_url"] = base_url
 
+    # Queue requests behind the process-wide limiter if one is configured
+    apply_rate_limit(config, "qwen", model_name)
+
     # Select the appropriate chat model based on model name
     # Use ChatQwQ for QwQ and QvQ models, ChatQwen for other Qwen models
     if model_name.startswith(("qwq", "qvq")):
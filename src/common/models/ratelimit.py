@@ -0,0 +1,346 @@
+"""Process-wide admission control for model provider rate limits."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from ..metrics import LatencyTracker, get_latency_tracker
+from .cache import CACHE_HIT_KEY
+
+logger = logging.getLogger(__name__)
+
+# Token estimate charged per request before any usage has been observed
+DEFAULT_TOKENS_PER_REQUEST = 2000
+
+# Queue waits of the model calls started in the current context. The usage
+# callback puts a list here when a call starts and keeps it under the call's
+# run ID; the limiter appends each admission's wait. A list is shared with the
+# tasks that ``agenerate`` starts for the call, whereas a value set inside
+# those tasks would not be visible to the callback.
+_queue_waits: ContextVar[Optional[List[float]]] = ContextVar(
+    "rate_limit_queue_waits", default=None
+)
+
+
+class TokenBucketRateLimiter(BaseRateLimiter):
+    """Token-bucket limiter on requests per second and tokens per minute.
+
+    Admission uses reservations: each caller books the earliest start time
+    that fits both buckets and then sleeps until it. Bookings are made in
+    arrival order under a lock, so callers are served first-come first-served
+    across threads and event loops and are never rejected.
+
+    The token cost of a request is unknown until the response arrives, so
+    each admission is charged the running average usage of this limiter. The
+    ``callback`` handler then corrects the bucket with the real usage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst: int = 1,
+        tokens_per_request: float = DEFAULT_TOKENS_PER_REQUEST,
+    ) -> None:
+        """Create a limiter.
+
+        Args:
+            name: Label used for metrics (e.g., 'qwen' or 'qwen:qwen-flash')
+            requests_per_second: Sustained request rate, or None for no limit
+            tokens_per_minute: Sustained token rate, or None for no limit
+            burst: Number of requests that may start back to back
+            tokens_per_request: Initial token estimate charged per request
+        """
+        self.name = name
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.burst = max(1, burst)
+        self._estimate = tokens_per_request
+        self._observed_requests = 0
+        # Theoretical arrival times of the two buckets (GCRA)
+        self._request_tat = 0.0
+        self._token_tat = 0.0
+        self._lock = threading.Lock()
+        self.callback = RateLimitUsageCallback(self)
+
+    @property
+    def queue_wait(self) -> LatencyTracker:
+        """Time callers spent queued before admission."""
+        return get_latency_tracker(f"ratelimit:{self.name}:queue_wait")
+
+    @property
+    def model_latency(self) -> LatencyTracker:
+        """Model call duration excluding queue wait."""
+        return get_latency_tracker(f"ratelimit:{self.name}:model_latency")
+
+    def _slot(self, book: bool) -> float:
+        """Return the earliest start time for a new caller, booking it if asked."""
+        with self._lock:
+            now = time.monotonic()
+            start = now
+            if self.requests_per_second:
+                interval = 1.0 / self.requests_per_second
+                tat = max(self._request_tat, now)
+                start = max(start, tat - (self.burst - 1) * interval)
+                if book:
+                    self._request_tat = tat + interval
+            if self.tokens_per_minute:
+                per_token = 60.0 / self.tokens_per_minute
+                cost = min(self._estimate, self.tokens_per_minute)
+                tat = max(self._token_tat, now)
+                # The bucket holds one minute of tokens
+                start = max(start, tat + (cost - self.tokens_per_minute) * per_token)
+                if book:
+                    self._token_tat = tat + cost * per_token
+            return start
+
+    def _admit(self, start: float) -> float:
+        wait = max(0.0, start - time.monotonic())
+        self.queue_wait.observe(wait)
+        waits = _queue_waits.get()
+        if waits is not None:
+            waits.append(wait)
+        return wait
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Block until the caller's reserved slot starts."""
+        if not blocking and self._slot(book=False) > time.monotonic():
+            return False
+        wait = self._admit(self._slot(book=True))
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Wait without blocking the event loop until the reserved slot starts."""
+        if not blocking and self._slot(book=False) > time.monotonic():
+            return False
+        wait = self._admit(self._slot(book=True))
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    def record_usage(self, total_tokens: int) -> None:
+        """Correct the token bucket with the real usage of an admitted request."""
+        with self._lock:
+            charged = min(self._estimate, self.tokens_per_minute or self._estimate)
+            if self.tokens_per_minute:
+                per_token = 60.0 / self.tokens_per_minute
+                self._token_tat += (total_tokens - charged) * per_token
+            # Running average keeps later estimates close to real usage
+            self._observed_requests += 1
+            self._estimate += (total_tokens - self._estimate) / self._observed_requests
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Return queue-wait and model-latency snapshots."""
+        return {
+            "queue_wait": self.queue_wait.snapshot(),
+            "model_latency": self.model_latency.snapshot(),
+        }
+
+
+class RateLimitUsageCallback(BaseCallbackHandler):
+    """Feed response token usage and model latency back to a limiter."""
+
+    # Run in the caller's context, so the queue-wait list set at the start of a
+    # call is the one its admission appends to
+    run_inline = True
+
+    def __init__(self, limiter: TokenBucketRateLimiter) -> None:
+        """Attach the callback to ``limiter``."""
+        self.limiter = limiter
+        # Run ID -> start time and the queue waits of its admission
+        self._runs: Dict[UUID, Tuple[float, List[float]]] = {}
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Remember when the model call started."""
+        waits = _queue_waits.get()
+        # Calls of one batch start together and share a list; a later call
+        # in the same context gets a fresh one
+        if waits is None or all(w is not waits for _, w in self._runs.values()):
+            waits = []
+            _queue_waits.set(waits)
+        self._runs[run_id] = (time.monotonic(), waits)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record model latency and reconcile the token bucket."""
+        run = self._runs.pop(run_id, None)
+        if _is_cache_hit(response):
+            # Never admitted: no provider latency, and no tokens were spent
+            return
+        if run is not None:
+            start, waits = run
+            wait = waits.pop(0) if waits else 0.0
+            elapsed = time.monotonic() - start - wait
+            self.limiter.model_latency.observe(max(0.0, elapsed))
+        total_tokens = _total_tokens(response)
+        if total_tokens is not None:
+            self.limiter.record_usage(total_tokens)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Forget the failed call."""
+        run = self._runs.pop(run_id, None)
+        if run is not None and run[1]:
+            run[1].pop(0)
+
+
+def _is_cache_hit(response: LLMResult) -> bool:
+    return any(
+        isinstance(generation, ChatGeneration)
+        and bool(generation.message.response_metadata.get(CACHE_HIT_KEY))
+        for generations in response.generations
+        for generation in generations
+    )
+
+
+def _total_tokens(response: LLMResult) -> Optional[int]:
+    for generations in response.generations:
+        for generation in generations:
+            if isinstance(generation, ChatGeneration) and isinstance(
+                generation.message, AIMessage
+            ):
+                usage = generation.message.usage_metadata
+                if usage:
+                    return int(usage["total_tokens"])
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    total = token_usage.get("total_tokens")
+    return int(total) if total is not None else None
+
+
+# Limiter configuration keyed by 'provider' or 'provider:model'
+_rate_limit_configs: Dict[str, Dict[str, Any]] = {}
+_rate_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def configure_rate_limit(
+    provider: str,
+    model: Optional[str] = None,
+    *,
+    requests_per_second: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    burst: int = 1,
+) -> None:
+    """Configure a process-wide rate limit.
+
+    A limit configured for a provider only is shared by all of its models. A
+    limit configured for a provider and model applies to that model alone and
+    takes precedence over the provider limit.
+    """
+    key = f"{provider.lower()}:{model}" if model else provider.lower()
+    with _rate_limiters_lock:
+        _rate_limit_configs[key] = {
+            "requests_per_second": requests_per_second,
+            "tokens_per_minute": tokens_per_minute,
+            "burst": burst,
+        }
+        _rate_limiters.pop(key, None)
+
+
+def _load_env_configs() -> Dict[str, Dict[str, Any]]:
+    """Return the limits of the RATE_LIMITS env var, parsed once per value."""
+    return _parse_rate_limits(os.getenv("RATE_LIMITS", ""))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_rate_limits(raw: str) -> Dict[str, Dict[str, Any]]:
+    """Parse and validate a RATE_LIMITS value.
+
+    Example: '{"qwen": {"rps": 5, "tpm": 100000}, "siliconflow:Qwen/Qwen3-8B": {"rps": 2}}'
+
+    Raises:
+        ValueError: If the value is not a JSON object of valid limits
+    """
+    if not raw:
+        return {}
+    try:
+        entries = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid RATE_LIMITS env var: {e}") from e
+    if not isinstance(entries, dict):
+        raise ValueError("Invalid RATE_LIMITS env var: expected a JSON object")
+    configs: Dict[str, Dict[str, Any]] = {}
+    for key, entry in entries.items():
+        if not isinstance(entry, dict) or not set(entry) <= {"rps", "tpm", "burst"}:
+            raise ValueError(
+                f"Invalid RATE_LIMITS entry {key!r}: expected an object with "
+                f"'rps', 'tpm' and 'burst' only, got {entry!r}"
+            )
+        rps, tpm, burst = entry.get("rps"), entry.get("tpm"), entry.get("burst", 1)
+        for name, value in (("rps", rps), ("tpm", tpm)):
+            if value is not None and not _is_positive_number(value):
+                raise ValueError(
+                    f"Invalid RATE_LIMITS entry {key!r}: '{name}' must be a "
+                    f"positive number, got {value!r}"
+                )
+        if not isinstance(burst, int) or isinstance(burst, bool) or burst < 1:
+            raise ValueError(
+                f"Invalid RATE_LIMITS entry {key!r}: 'burst' must be a "
+                f"positive integer, got {burst!r}"
+            )
+        provider, _, model = key.partition(":")
+        key = f"{provider.lower()}:{model}" if model else provider.lower()
+        configs[key] = {
+            "requests_per_second": rps,
+            "tokens_per_minute": tpm,
+            "burst": burst,
+        }
+    return configs
+
+
+def _is_positive_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def get_rate_limiter(provider: str, model: str) -> Optional[TokenBucketRateLimiter]:
+    """Return the shared limiter for a provider and model, or None if unlimited."""
+    provider = provider.lower()
+    configs = {**_load_env_configs(), **_rate_limit_configs}
+    for key in (f"{provider}:{model}", provider):
+        if key in configs:
+            with _rate_limiters_lock:
+                limiter = _rate_limiters.get(key)
+                if limiter is None:
+                    limiter = _rate_limiters[key] = TokenBucketRateLimiter(
+                        key, **configs[key]
+                    )
+                return limiter
+    return None
+
+
+def apply_rate_limit(config: Dict[str, Any], provider: str, model: str) -> None:
+    """Attach the configured limiter and its usage callback to a model config."""
+    if "rate_limiter" in config:
+        return
+    limiter = get_rate_limiter(provider, model)
+    if limiter is None:
+        return
+    config["rate_limiter"] = limiter
+    config["callbacks"] = [*(config.get("callbacks") or []), limiter.callback]
+
+
+def clear_rate_limiters() -> None:
+    """Drop all configured rate limits and limiter state (useful for testing)."""
+    with _rate_limiters_lock:
+        _rate_limit_configs.clear()
+        _rate_limiters.clear()
+    _parse_rate_limits.cache_clear()
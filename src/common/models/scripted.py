@@ -0,0 +1,432 @@
+"""Scripted chat model that replays tool calls and answers without a network."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LangSmithParams
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Streamed tokens: words with their trailing whitespace
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+# One record of data/test_set_with_outputs.csv, for the built-in SOP script
+_SOP_RECORD: Dict[str, Any] = {
+    "aircraft_id": "a_00127",
+    "tail_number": "N12349",
+    "maintenance_record_id": "mr_010014",
+    "expected_departure_time": "2025-04-18T17:30:00Z",
+    "actual_inspection_time": "2025-04-18T16:30:00Z",
+    "inspection_location_id": "loc_00127",
+    "component_serial_number": "cs_0006",
+    "installed_component_serial_number": "cs_0006",
+    "installation_time": "2025-04-17T14:00:00Z",
+    "component_weight": 70.1,
+    "expected_component_weight": 70,
+    "physical_condition_observation": "no damage",
+    "battery_status": "operational",
+    "circuit_continuity_check": "success",
+    "avionics_diagnostics_response": "success",
+}
+
+# Expected outputs of the SOP report, for records without them
+_SOP_OUTPUTS: Dict[str, Any] = {
+    "aircraft_ready": True,
+    "mechanical_inspection_result": "success",
+    "electrical_inspection_result": "success",
+    "component_incident_response": "success",
+    "component_mismatch_response": "success",
+    "cross_check_response": "success",
+    "cross_check_reporting_response": "success",
+}
+
+
+def _sop_call(record: Dict[str, Any], name: str, *fields: str) -> Dict[str, Any]:
+    return {"name": name, "args": {field: record[field] for field in fields}}
+
+
+def sop_script(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build the SOP verification script of one aircraft.
+
+    Args:
+        record: A row of ``data/test_set_with_outputs.csv`` as a dict. The
+                expected outputs (``mechanical_inspection_result`` etc.) are
+                optional and default to ``success``
+
+    Returns:
+        Script steps for ``register_script``; the mechanical and electrical
+        checks are requested together, as parallel tool calls
+    """
+    outputs = {
+        field: record.get(field, default) for field, default in _SOP_OUTPUTS.items()
+    }
+    report = "".join(f"{field}: {value}\n" for field, value in outputs.items())
+    return [
+        {
+            "tool_calls": [
+                _sop_call(
+                    record,
+                    "VerifyAircraftClearance",
+                    "aircraft_id",
+                    "tail_number",
+                    "maintenance_record_id",
+                    "expected_departure_time",
+                )
+            ]
+        },
+        {
+            "tool_calls": [
+                _sop_call(
+                    record,
+                    "VerifyMechanicalComponents",
+                    "aircraft_id",
+                    "component_serial_number",
+                    "inspection_location_id",
+                    "component_weight",
+                    "physical_condition_observation",
+                    "installation_time",
+                ),
+                _sop_call(
+                    record,
+                    "VerifyElectricalSystems",
+                    "aircraft_id",
+                    "battery_status",
+                    "circuit_continuity_check",
+                    "avionics_diagnostics_response",
+                ),
+            ]
+        },
+        {
+            "tool_calls": [
+                {
+                    "name": "ReportComponentIncident",
+                    "args": {
+                        "aircraft_id": record["aircraft_id"],
+                        "mechanical_inspection_result": outputs[
+                            "mechanical_inspection_result"
+                        ],
+                        "electrical_inspection_result": outputs[
+                            "electrical_inspection_result"
+                        ],
+                    },
+                }
+            ]
+        },
+        {
+            "tool_calls": [
+                _sop_call(
+                    record,
+                    "ReportComponentMismatch",
+                    "aircraft_id",
+                    "component_serial_number",
+                    "installed_component_serial_number",
+                    "inspection_location_id",
+                )
+            ]
+        },
+        {
+            "tool_calls": [
+                _sop_call(
+                    record,
+                    "CrossCheckSpecifications",
+                    "aircraft_id",
+                    "component_weight",
+                    "expected_component_weight",
+                    "installation_time",
+                    "actual_inspection_time",
+                )
+            ]
+        },
+        {
+            "tool_calls": [
+                {
+                    "name": "ReportCrossCheck",
+                    "args": {
+                        "maintenance_record_id": record["maintenance_record_id"],
+                        "aircraft_id": record["aircraft_id"],
+                        "component_incident_response": outputs[
+                            "component_incident_response"
+                        ],
+                        "component_mismatch_response": outputs[
+                            "component_mismatch_response"
+                        ],
+                    },
+                }
+            ]
+        },
+        {"content": f"<final_response>\n{report}</final_response>"},
+    ]
+
+
+# Scripts selectable as 'scripted:<name>'
+_scripts: Dict[str, List[Dict[str, Any]]] = {
+    # Full SOP verification of one aircraft
+    "sop": sop_script(_SOP_RECORD),
+    # Answers directly, without calling tools
+    "answer": [{"content": "<final_response>no tools needed</final_response>"}],
+}
+
+
+def register_script(name: str, steps: List[Dict[str, Any]]) -> None:
+    """Register a script, selectable as ``scripted:<name>``.
+
+    Each step is a dict with ``tool_calls`` (a list of ``{"name", "args"}``
+    dicts) and/or ``content``. The step without tool calls ends the script.
+    """
+    if not steps or steps[-1].get("tool_calls"):
+        raise ValueError(f"Script {name!r} must end with a step without tool calls")
+    _scripts[name] = steps
+
+
+def _answered_tool_calls(messages: List[BaseMessage]) -> int:
+    """Count the tool calls answered since the last human message.
+
+    Tool exchanges that the lean run mode folded into the system prompt count
+    as well, as given by the ``count`` of its tool summary tag.
+    """
+    # Imported here: the agent package imports this module's package
+    from react_agent.state import COMPLETED_TOOL_CALLS_TAG
+
+    answered = 0
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, ToolMessage):
+            answered += 1
+    summary = re.compile(rf'<{COMPLETED_TOOL_CALLS_TAG} count="(\d+)">')
+    for message in messages:
+        if isinstance(message, SystemMessage) and isinstance(message.content, str):
+            found = summary.search(message.content)
+            if found:
+                answered += int(found.group(1))
+    return answered
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count: four characters per token."""
+    return max(1, len(text) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model that replays a script of tool calls and answers.
+
+    The script position is derived from the conversation, not kept in the
+    model, so one instance can serve any number of concurrent runs. Every
+    human message restarts the script; each answered tool call advances it.
+    Responses carry estimated usage metadata (four characters per token).
+    """
+
+    script_name: str
+    """Name of the script, used as the model name."""
+
+    steps: List[Dict[str, Any]]
+    """Script steps, see ``register_script``."""
+
+    latency: float = 0.0
+    """Seconds before the first token of every response."""
+
+    token_delay: float = 0.0
+    """Seconds between streamed tokens."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"script_name": self.script_name}
+
+    def _get_ls_params(
+        self, stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> LangSmithParams:
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_provider"] = "scripted"
+        params["ls_model_name"] = self.script_name
+        return params
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> ScriptedChatModel:
+        """Accept the tools; the script decides which ones are called."""
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        """Build the response for the current script position."""
+        answered = _answered_tool_calls(messages)
+        step = self.steps[-1]
+        for candidate in self.steps:
+            calls = candidate.get("tool_calls") or []
+            if answered < len(calls) or not calls:
+                step = candidate
+                break
+            answered -= len(calls)
+
+        content = str(step.get("content", ""))
+        tool_calls = [
+            {
+                "name": call["name"],
+                "args": dict(call.get("args") or {}),
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "tool_call",
+            }
+            for call in step.get("tool_calls") or []
+        ]
+        prompt = "".join(str(m.content) for m in messages)
+        completion = content + json.dumps(
+            [[c["name"], c["args"]] for c in tool_calls], default=str
+        )
+        input_tokens = _estimate_tokens(prompt)
+        output_tokens = _estimate_tokens(completion)
+        usage: UsageMetadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return AIMessage(content=content, tool_calls=tool_calls, usage_metadata=usage)
+
+    def _tokens(self, message: AIMessage) -> List[str]:
+        return _TOKEN_RE.findall(str(message.content))
+
+    def _generation_time(self, message: AIMessage) -> float:
+        return self.latency + self.token_delay * max(len(self._tokens(message)) - 1, 0)
+
+    def _chunks(self, message: AIMessage) -> Iterator[AIMessageChunk]:
+        """Split a response into streamed chunks; usage and tool calls come last."""
+        tokens = self._tokens(message)
+        for token in tokens:
+            yield AIMessageChunk(content=token)
+        yield AIMessageChunk(
+            content="" if tokens else str(message.content),
+            tool_call_chunks=[
+                {
+                    "name": call["name"],
+                    "args": json.dumps(call["args"], default=str),
+                    "id": call["id"],
+                    "index": i,
+                    "type": "tool_call_chunk",
+                }
+                for i, call in enumerate(message.tool_calls)
+            ],
+            usage_metadata=message.usage_metadata,
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._next_message(messages)
+        delay = self._generation_time(message)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._next_message(messages)
+        delay = self._generation_time(message)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(self._next_message(messages))):
+            if i and self.token_delay and chunk.content:
+                time.sleep(self.token_delay)
+            if run_manager and isinstance(chunk.content, str) and chunk.content:
+                run_manager.on_llm_new_token(chunk.content)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(self._next_message(messages))):
+            if i and self.token_delay and chunk.content:
+                await asyncio.sleep(self.token_delay)
+            if run_manager and isinstance(chunk.content, str) and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content)
+            yield ChatGenerationChunk(message=chunk)
+
+
+def create_scripted_model(
+    script: str,
+    latency: Optional[float] = None,
+    token_delay: Optional[float] = None,
+    **kwargs: Any,
+) -> ScriptedChatModel:
+    """Create a scripted model.
+
+    Args:
+        script: Name of a registered script (built-in: 'sop', 'answer') or path
+                to a JSON file holding a list of steps
+        latency: Seconds before the first token. Defaults to env var
+                 SCRIPTED_LATENCY, else 0
+        token_delay: Seconds between streamed tokens. Defaults to env var
+                     SCRIPTED_TOKEN_DELAY, else 0
+        **kwargs: Additional ScriptedChatModel parameters
+
+    Returns:
+        Configured ScriptedChatModel instance
+    """
+    if script in _scripts:
+        steps = _scripts[script]
+    elif script.endswith(".json") and os.path.isfile(script):
+        with open(script, encoding="utf-8") as f:
+            steps = json.load(f)
+        register_script(script, steps)
+    else:
+        raise ValueError(
+            f"Unknown script {script!r}. Register it with register_script() or "
+            f"pass a JSON file path; available: {', '.join(sorted(_scripts))}"
+        )
+
+    if latency is None:
+        latency = float(os.getenv("SCRIPTED_LATENCY", "0"))
+    if token_delay is None:
+        token_delay = float(os.getenv("SCRIPTED_TOKEN_DELAY", "0"))
+
+    return ScriptedChatModel(
+        script_name=script,
+        steps=steps,
+        latency=latency,
+        token_delay=token_delay,
+        **kwargs,
+    )
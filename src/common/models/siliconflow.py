@@ -6,6 +6,7 @@ from typing import Any, Optional
 from langchain_siliconflow import ChatSiliconFlow
 
 from ..utils import normalize_region
+from .ratelimit import apply_rate_limit
 
 
 def create_siliconflow_model(
@@ -20,7 +21,8 @@ def create_siliconflow_model(
     Args:
         model_name: The model name (e.g., 'Qwen/Qwen3-8B', 'THUDM/GLM-4.1V-9B-Thinking')
         api_key: SiliconFlow API key (defaults to env var SILICONFLOW_API_KEY)
-        base_url: Custom base URL for API (optional)
+        base_url: Custom base URL for API (defaults to env var SILICONFLOW_BASE_URL, else the
+                  endpoint of the region)
         region: Region setting ('prc'/'cn' for China, 'international'/'en' for global)
                 Defaults to env var REGION
         **kwargs: Additional model parameters
@@ -36,6 +38,10 @@ def create_siliconflow_model(
     if region is None:
         region = os.getenv("REGION")
 
+    # Get base URL from env if not provided (e.g., a local OpenAI-compatible server)
+    if base_url is None:
+        base_url = os.getenv("SILICONFLOW_BASE_URL") or None
+
     # Set base URL based on region if not explicitly provided
     if base_url is None and region:
         # Normalize region aliases
@@ -52,4 +58,7 @@ def create_siliconflow_model(
     if base_url is not None:
         config["base_url"] = base_url
 
+    # Queue requests behind the process-wide limiter if one is configured
+    apply_rate_limit(config, "siliconflow", model_name)
+
     return ChatSiliconFlow(**config)
@@ -0,0 +1,189 @@
+"""Token and cost accounting of model responses."""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from langchain_core.messages import AIMessage
+
+from .cache import CACHE_HIT_KEY
+
+logger = logging.getLogger(__name__)
+
+# Prices in USD per million tokens, keyed by "provider:model" or provider
+_model_prices: Dict[str, Dict[str, float]] = {}
+_model_prices_lock = threading.Lock()
+
+
+def configure_model_price(
+    provider: str,
+    model: Optional[str] = None,
+    *,
+    input: float,
+    output: float,
+    cached_input: Optional[float] = None,
+) -> None:
+    """Configure the price of a model, in USD per million tokens.
+
+    A price configured for a provider only applies to all of its models. A
+    price configured for a provider and model takes precedence over it. Cached
+    input tokens are billed at ``cached_input``, or at ``input`` if unset.
+    """
+    key = f"{provider.lower()}:{model}" if model else provider.lower()
+    with _model_prices_lock:
+        _model_prices[key] = {
+            "input": input,
+            "output": output,
+            "cached_input": input if cached_input is None else cached_input,
+        }
+
+
+def _load_env_prices() -> Dict[str, Dict[str, float]]:
+    """Return the prices of the MODEL_PRICES env var, parsed once per value."""
+    return _parse_model_prices(os.getenv("MODEL_PRICES", ""))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_model_prices(raw: str) -> Dict[str, Dict[str, float]]:
+    """Parse and validate a MODEL_PRICES value.
+
+    Example: '{"qwen:qwen-flash": {"input": 0.15, "output": 1.5, "cached_input": 0.03}}'
+
+    Raises:
+        ValueError: If the value is not a JSON object of valid prices
+    """
+    if not raw:
+        return {}
+    try:
+        entries = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid MODEL_PRICES env var: {e}") from e
+    if not isinstance(entries, dict):
+        raise ValueError("Invalid MODEL_PRICES env var: expected a JSON object")
+    prices: Dict[str, Dict[str, float]] = {}
+    for key, entry in entries.items():
+        fields = {"input", "output", "cached_input"}
+        if not isinstance(entry, dict) or not set(entry) <= fields:
+            raise ValueError(
+                f"Invalid MODEL_PRICES entry {key!r}: expected an object with "
+                f"'input', 'output' and 'cached_input' only, got {entry!r}"
+            )
+        for name, value in entry.items():
+            if (
+                not isinstance(value, (int, float))
+                or isinstance(value, bool)
+                or value < 0
+            ):
+                raise ValueError(
+                    f"Invalid MODEL_PRICES entry {key!r}: '{name}' must be a "
+                    f"non-negative number, got {value!r}"
+                )
+        provider, _, model = key.partition(":")
+        key = f"{provider.lower()}:{model}" if model else provider.lower()
+        input_price = float(entry.get("input", 0.0))
+        prices[key] = {
+            "input": input_price,
+            "output": float(entry.get("output", 0.0)),
+            "cached_input": float(entry.get("cached_input", input_price)),
+        }
+    return prices
+
+
+def get_model_price(model: str) -> Optional[Dict[str, float]]:
+    """Return the configured price of a "provider:model" string, or None."""
+    provider, _, name = model.partition(":")
+    provider = provider.lower()
+    prices = {**_load_env_prices(), **_model_prices}
+    for key in (f"{provider}:{name}", provider):
+        if key in prices:
+            return prices[key]
+    return None
+
+
+def clear_model_prices() -> None:
+    """Drop all configured model prices (useful for testing)."""
+    with _model_prices_lock:
+        _model_prices.clear()
+    _parse_model_prices.cache_clear()
+
+
+def response_model(model: str, response: AIMessage) -> str:
+    """Return the "provider:model" name of the model that produced a response.
+
+    This is the ``model_name`` response metadata, so each model of a hedged
+    spec is accounted separately. A bare model name gets the provider of
+    ``model``, the configured model, which is used when the metadata is missing.
+    """
+    name = response.response_metadata.get("model_name")
+    if not isinstance(name, str) or not name:
+        return model
+    if ":" in name:
+        return name
+    provider, _, _ = model.partition(":")
+    return f"{provider}:{name}"
+
+
+def usage_from_response(
+    model: str, response: AIMessage, *, step_limit_hit: bool = False
+) -> Dict[str, Dict[str, float]]:
+    """Return the usage of one model response, keyed by the answering model.
+
+    Cached and reasoning tokens are subsets of the input and output tokens.
+    The cost is 0.0 for models without a configured price. Responses replayed
+    from the response cache count as a call and a cache hit, without tokens
+    or cost.
+    """
+    model = response_model(model, response)
+    cache_hit = bool(response.response_metadata.get(CACHE_HIT_KEY))
+    metadata: Dict[str, Any] = {} if cache_hit else dict(response.usage_metadata or {})
+    input_tokens = int(metadata.get("input_tokens", 0))
+    output_tokens = int(metadata.get("output_tokens", 0))
+    cached_tokens = int(
+        (metadata.get("input_token_details") or {}).get("cache_read", 0)
+    )
+    reasoning_tokens = int(
+        (metadata.get("output_token_details") or {}).get("reasoning", 0)
+    )
+
+    cost = 0.0
+    price = get_model_price(model)
+    if price is not None:
+        cost = (
+            (input_tokens - cached_tokens) * price["input"]
+            + cached_tokens * price["cached_input"]
+            + output_tokens * price["output"]
+        ) / 1_000_000
+
+    return {
+        model: {
+            "calls": 1,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": cached_tokens,
+            "reasoning_tokens": reasoning_tokens,
+            "total_tokens": int(
+                metadata.get("total_tokens", input_tokens + output_tokens)
+            ),
+            "cost": cost,
+            "cache_hits": int(cache_hit),
+            "step_limit_hits": int(step_limit_hit),
+        }
+    }
+
+
+def merge_usage(
+    left: Optional[Dict[str, Dict[str, float]]],
+    right: Optional[Dict[str, Dict[str, float]]],
+) -> Dict[str, Dict[str, float]]:
+    """Reducer that sums per-model usage counters."""
+    merged = {model: dict(counters) for model, counters in (left or {}).items()}
+    for model, counters in (right or {}).items():
+        totals = merged.setdefault(model, {})
+        for name, value in counters.items():
+            totals[name] = totals.get(name, 0) + value
+    return merged
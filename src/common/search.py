@@ -0,0 +1,577 @@
+"""Non-blocking, cached web search on a bounded, process-wide thread pool.
+
+Searches go to one or more backends of ``common.search_backends``. With
+several, they are queried concurrently, and the strategy decides the result:
+``first`` returns the first complete response and abandons the others;
+``merge`` waits for every backend within the timeout, then merges their
+results by reciprocal rank fusion, deduplicated by URL.
+
+Backends are synchronous, so they run on a dedicated pool instead of the
+event loop. The pool size caps the number of concurrent backend requests per process
+(``SEARCH_MAX_CONCURRENCY`` env var, default 4); further requests queue.
+Each query has a timeout that includes its time in the queue. On timeout the
+search returns the results it has so far, marked ``partial``, instead of
+holding up the run. Cancelling the caller cancels a queued search, and a
+running one is abandoned.
+
+Complete results are cached by backends, strategy, normalized query and
+``max_results``: case,
+Unicode forms, punctuation and whitespace that do not change the search are
+ignored. Entries are fresh for ``SEARCH_CACHE_TTL`` seconds (default 600, 0
+disables the cache). For ``SEARCH_CACHE_STALE`` seconds after that (default
+3600) they are still served, and refreshed in the background. Up to
+``SEARCH_CACHE_SIZE`` entries (default 256) are kept in memory, least
+recently used first out; set ``SEARCH_CACHE_PATH`` to also keep them in a
+SQLite file shared across processes and restarts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from common.metrics import get_counter
+from common.search_backends import SearchBackend, get_search_backend
+
+logger = logging.getLogger(__name__)
+
+# Concurrent searches per process, unless SEARCH_MAX_CONCURRENCY is set
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Seconds per query, including the time queued for a free worker
+DEFAULT_SEARCH_TIMEOUT = 10.0
+
+# Seconds a cached result is fresh, unless SEARCH_CACHE_TTL is set
+DEFAULT_CACHE_TTL = 600.0
+
+# Seconds after the TTL during which a stale result is served and refreshed
+DEFAULT_CACHE_STALE = 3600.0
+
+# Cached results kept in memory, unless SEARCH_CACHE_SIZE is set
+DEFAULT_CACHE_SIZE = 256
+
+# Search strategies for several backends
+SEARCH_STRATEGIES = ("first", "merge")
+
+# Rank offset of reciprocal rank fusion; damps the weight of the top ranks
+RRF_K = 60
+
+# Punctuation that does not change a DuckDuckGo query. Quotes (phrases),
+# ``+``/``-`` (operators), ``:`` (``site:``), ``#`` and ``.`` (C#, .NET) do
+_IGNORED_PUNCTUATION_RE = re.compile(r"[^\w\s\"+\-:#.]")
+
+T = TypeVar("T")
+
+# Backends and strategy, normalized query, max_results
+CacheKey = Tuple[str, str, int]
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry.
+
+    Applies Unicode NFKC and case folding, drops punctuation that does not
+    change the search, and collapses whitespace. Trailing periods are dropped.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = _IGNORED_PUNCTUATION_RE.sub(" ", query)
+    return " ".join(word.rstrip(".") or word for word in query.split())
+
+
+class SearchCache:
+    """Search results by source and normalized query, in memory and on disk.
+
+    The source names the backends and strategy that produced the results.
+
+    Entries younger than ``ttl`` seconds are fresh. Entries up to
+    ``stale_ttl`` seconds older than that are returned as stale, for the
+    caller to refresh; older ones are misses. The memory tier keeps the
+    ``max_entries`` most recently used entries. With a ``path``, entries are
+    also stored in a SQLite file and memory misses fall back to it; those
+    lookups block on disk I/O, so ``search`` runs them in a thread.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_CACHE_TTL,
+        stale_ttl: float = DEFAULT_CACHE_STALE,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        path: Optional[str] = None,
+    ) -> None:
+        """Create an empty cache, or open the one stored at ``path``."""
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Key -> (creation time, results), least recently used first
+        self._entries: OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_results ("
+                "source TEXT NOT NULL, query TEXT NOT NULL, "
+                "max_results INTEGER NOT NULL, results TEXT NOT NULL, "
+                "created REAL NOT NULL, PRIMARY KEY (source, query, max_results))"
+            )
+            self._conn.commit()
+
+    def _record(self, result: str) -> None:
+        get_counter(
+            "agent_search_cache_lookups_total",
+            "Web search cache lookups by result: memory_hit, disk_hit, stale or miss.",
+            ("result",),
+        ).inc(result)
+
+    def get(
+        self, query: str, max_results: int, source: str = ""
+    ) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """Return cached results and whether they are stale, or None on a miss."""
+        key = (source, normalize_query(query), max_results)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            tier = "memory_hit"
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created, results FROM search_results "
+                    "WHERE source = ? AND query = ? AND max_results = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    tier = "disk_hit"
+            age = now - entry[0] if entry is not None else math.inf
+            if entry is None or age > self.ttl + self.stale_ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                result = None
+            else:
+                self._store(key, entry)
+                stale = age > self.ttl
+                if stale:
+                    self.stale_hits += 1
+                    tier = "stale"
+                elif tier == "disk_hit":
+                    self.disk_hits += 1
+                else:
+                    self.memory_hits += 1
+                result = (list(entry[1]), stale)
+        self._record(tier if result is not None else "miss")
+        return result
+
+    def put(
+        self,
+        query: str,
+        max_results: int,
+        results: List[Dict[str, Any]],
+        source: str = "",
+    ) -> None:
+        """Cache complete results of a query."""
+        key = (source, normalize_query(query), max_results)
+        now = time.time()
+        entry = (now, list(results))
+        with self._lock:
+            self._store(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_results "
+                    "(source, query, max_results, results, created) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (*key, json.dumps(entry[1], ensure_ascii=False), now),
+                )
+                self._conn.execute(
+                    "DELETE FROM search_results WHERE created < ?",
+                    (now - self.ttl - self.stale_ttl,),
+                )
+                self._conn.commit()
+
+    def _store(self, key: CacheKey, entry: Tuple[float, List[Dict[str, Any]]]) -> None:
+        """Put an entry in the memory tier as most recently used; hold the lock."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Delete all cached results."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM search_results")
+                self._conn.commit()
+
+    def close(self) -> None:
+        """Close the disk tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Return hit/miss counters and hit rates."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.stale_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "fresh_hit_rate": (
+                    (hits - self.stale_hits) / lookups if lookups else 0.0
+                ),
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+
+_max_concurrency: Optional[int] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# The cache, until configure_search resets it; None when disabled
+_cache: Optional[SearchCache] = None
+_cache_loaded = False
+
+# Keys being refreshed in the background, and their tasks
+_refreshing: Set[CacheKey] = set()
+_refresh_tasks: Set[asyncio.Task[None]] = set()
+
+
+def configure_search(
+    max_concurrency: Optional[int] = None, cache: Optional[SearchCache] = None
+) -> None:
+    """Set the number of concurrent searches and the cache.
+
+    None means the env vars or defaults. Searches already running finish on
+    the previous pool.
+    """
+    global _max_concurrency, _executor, _cache, _cache_loaded
+    with _executor_lock:
+        _max_concurrency = max_concurrency
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=False)
+            _executor = None
+        if _cache is not None and _cache is not cache:
+            _cache.close()
+        _cache = cache
+        _cache_loaded = cache is not None
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Return the process-wide search cache, or None if it is disabled."""
+    global _cache, _cache_loaded
+    with _executor_lock:
+        if not _cache_loaded:
+            _cache_loaded = True
+            try:
+                ttl = float(os.getenv("SEARCH_CACHE_TTL", DEFAULT_CACHE_TTL))
+                stale_ttl = float(os.getenv("SEARCH_CACHE_STALE", DEFAULT_CACHE_STALE))
+                size = int(os.getenv("SEARCH_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+            except ValueError:
+                logger.error("Invalid SEARCH_CACHE_* env var, search cache disabled")
+                ttl = 0
+            if ttl > 0:
+                _cache = SearchCache(
+                    ttl, stale_ttl, size, os.getenv("SEARCH_CACHE_PATH") or None
+                )
+        return _cache
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = _max_concurrency
+            if workers is None:
+                try:
+                    workers = int(
+                        os.getenv("SEARCH_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+                    )
+                except ValueError:
+                    logger.error("Invalid SEARCH_MAX_CONCURRENCY env var")
+                    workers = DEFAULT_MAX_CONCURRENCY
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, workers), thread_name_prefix="web-search"
+            )
+        return _executor
+
+
+def _call_backend(
+    backend: SearchBackend,
+    query: str,
+    max_results: int,
+    timeout: float,
+    cancelled: threading.Event,
+) -> Optional[List[Dict[str, Any]]]:
+    """Run one backend request on the pool; None if abandoned before it ran."""
+    if cancelled.is_set():
+        return None
+    return backend.search(query, max_results, timeout)
+
+
+async def _run_backend(
+    backend: SearchBackend, query: str, max_results: int, timeout: float
+) -> List[Dict[str, Any]]:
+    """Query one backend on the pool, bounded by its own timeout and ``timeout``.
+
+    Failures and timeouts count against the backend's circuit breaker;
+    cancellation, when another backend answered first, does not.
+    """
+    if backend.timeout is not None:
+        timeout = min(timeout, backend.timeout)
+    cancelled = threading.Event()
+    future = asyncio.get_running_loop().run_in_executor(
+        _get_executor(), _call_backend, backend, query, max_results, timeout, cancelled
+    )
+    try:
+        results = await asyncio.wait_for(future, timeout)
+    except TimeoutError:
+        cancelled.set()
+        backend.record_failure("timeout")
+        raise
+    except asyncio.CancelledError:
+        cancelled.set()
+        backend.record_cancelled()
+        raise
+    except Exception:
+        backend.record_failure()
+        raise
+    backend.record_success()
+    return results or []
+
+
+def _url_key(url: str) -> str:
+    """Canonical form of a URL for deduplication."""
+    url = url.strip().lower().split("#")[0]
+    for prefix in ("https://", "http://", "www."):
+        if url.startswith(prefix):
+            url = url[len(prefix) :]
+    return url.rstrip("/")
+
+
+def merge_results(
+    ranked: Sequence[List[Dict[str, Any]]], max_results: int
+) -> List[Dict[str, Any]]:
+    """Merge ranked result lists by reciprocal rank fusion, deduplicated by URL.
+
+    A result scores ``1 / (RRF_K + rank)`` in each list it appears in, so
+    results found by several backends rise. The first copy of a result is
+    kept; results without a URL are never merged.
+    """
+    scores: Dict[str, float] = {}
+    merged: Dict[str, Dict[str, Any]] = {}
+    for results in ranked:
+        for rank, result in enumerate(results, start=1):
+            key = _url_key(str(result.get("url") or "")) or f"#{id(result)}"
+            scores[key] = scores.get(key, 0.0) + 1 / (RRF_K + rank)
+            merged.setdefault(key, result)
+    order = sorted(scores, key=lambda key: -scores[key])
+    return [merged[key] for key in order[:max_results]]
+
+
+async def _search(
+    query: str,
+    max_results: int,
+    timeout: float,
+    backends: Sequence[str],
+    strategy: str,
+) -> Dict[str, Any]:
+    """Query the backends concurrently and combine them by ``strategy``."""
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(
+            f"Unknown search strategy '{strategy}'. "
+            f"Expected one of: {', '.join(SEARCH_STRATEGIES)}"
+        )
+    selected = [get_search_backend(name) for name in backends]
+    available = [backend for backend in selected if backend.allow_request()]
+    if not available:
+        return {
+            "query": query,
+            "results": [],
+            "error": "All search backends are unavailable after repeated failures: "
+            + ", ".join(backend.name for backend in selected),
+        }
+    tasks = {
+        asyncio.create_task(_run_backend(backend, query, max_results, timeout)): backend
+        for backend in available
+    }
+    found: Dict[str, List[Dict[str, Any]]] = {}
+    errors: List[str] = []
+    timed_out = False
+    pending = set(tasks)
+    try:
+        while pending and not (strategy == "first" and found):
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                name = tasks[task].name
+                error = task.exception()
+                if error is None:
+                    found[name] = task.result()
+                elif isinstance(error, TimeoutError):
+                    timed_out = True
+                    logger.warning("Web search for %r on %s timed out", query, name)
+                    errors.append(f"{name} timed out")
+                else:
+                    logger.warning(
+                        "Web search for %r on %s failed: %s", query, name, error
+                    )
+                    errors.append(f"{name} failed: {error}")
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if strategy == "first" and found:
+        return {"query": query, "results": next(iter(found.values()))}
+    # In backend order, so ties go to the first backend listed
+    ranked = [found[b.name] for b in available if b.name in found]
+    result: Dict[str, Any] = {
+        "query": query,
+        "results": merge_results(ranked, max_results),
+    }
+    skipped = len(selected) - len(available)
+    if skipped:
+        errors.append(f"{skipped} backend(s) skipped after repeated failures")
+    if errors:
+        if timed_out and not found:
+            errors.insert(0, f"Search timed out after {timeout:g}s")
+        result["partial"] = True
+        result["error"] = "; ".join(errors)
+    return result
+
+
+async def _cache_call(cache: SearchCache, func: Callable[..., T], *args: Any) -> T:
+    """Call a cache method, in a thread if it may hit the disk tier."""
+    if cache.path:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+async def _refresh(
+    cache: SearchCache,
+    key: CacheKey,
+    query: str,
+    max_results: int,
+    timeout: float,
+    backends: Sequence[str],
+    strategy: str,
+) -> None:
+    try:
+        result = await _search(query, max_results, timeout, backends, strategy)
+        if "error" not in result:
+            await _cache_call(
+                cache, cache.put, query, max_results, result["results"], key[0]
+            )
+    except Exception as e:
+        logger.warning("Background refresh of web search %r failed: %s", query, e)
+    finally:
+        _refreshing.discard(key)
+
+
+def _schedule_refresh(
+    cache: SearchCache,
+    query: str,
+    max_results: int,
+    timeout: float,
+    backends: Sequence[str],
+    strategy: str,
+    source: str,
+) -> None:
+    """Refresh a stale entry in the background, once per key at a time."""
+    key = (source, normalize_query(query), max_results)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.get_running_loop().create_task(
+        _refresh(cache, key, query, max_results, timeout, backends, strategy)
+    )
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def search(
+    query: str,
+    max_results: int,
+    timeout: Optional[float] = None,
+    backends: Sequence[str] = ("duckduckgo",),
+    strategy: str = "first",
+) -> Dict[str, Any]:
+    """Search the web without blocking the event loop.
+
+    Cached results are returned right away; stale ones are refreshed in the
+    background. Partial or failed results are never cached.
+
+    Args:
+        query: Search query
+        max_results: Maximum number of results
+        timeout: Seconds to wait, including the time queued for a worker.
+                 Defaults to DEFAULT_SEARCH_TIMEOUT
+        backends: Names of the registered backends to query concurrently
+        strategy: ``first`` (first complete response) or ``merge`` (all
+                  responses within the timeout, merged and deduplicated)
+
+    Returns:
+        ``{"query", "results"}``, each result with ``title``, ``url`` and
+        ``content``. If backends failed or timed out, also ``"partial": True``
+        and an ``"error"`` message, with the results that did arrive. If
+        none did, just the ``"error"``
+    """
+    timeout = DEFAULT_SEARCH_TIMEOUT if timeout is None else timeout
+    backends = list(dict.fromkeys(backends))
+    if not backends:
+        raise ValueError("No search backends given")
+    cache = get_search_cache()
+    if cache is None:
+        return await _search(query, max_results, timeout, backends, strategy)
+    source = backends[0] if len(backends) == 1 else f"{strategy}:{','.join(backends)}"
+    cached = await _cache_call(cache, cache.get, query, max_results, source)
+    if cached is not None:
+        results, stale = cached
+        if stale:
+            _schedule_refresh(
+                cache, query, max_results, timeout, backends, strategy, source
+            )
+        return {"query": query, "results": results}
+    result = await _search(query, max_results, timeout, backends, strategy)
+    if "error" not in result:
+        await _cache_call(
+            cache, cache.put, query, max_results, result["results"], source
+        )
+    return result
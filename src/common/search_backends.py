@@ -0,0 +1,226 @@
+"""Registry of web search backends, each behind its own circuit breaker.
+
+A backend is a blocking function ``(query, max_results, timeout) -> results``
+that ``common.search`` runs on its thread pool. Results are dicts with
+``title``, ``url`` and ``content``, best first. ``duckduckgo`` and ``tavily``
+(needs ``TAVILY_API_KEY``) are registered by default; add others with
+``register_search_backend``.
+
+After ``failure_threshold`` consecutive failures or timeouts a backend's
+circuit opens and it is skipped for ``reset_timeout`` seconds. Then a single
+trial request is let through: success closes the circuit, failure opens it
+again.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from duckduckgo_search import DDGS
+
+from common.metrics import get_counter
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failures that open a backend's circuit
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# Seconds an open circuit skips its backend before a trial request
+DEFAULT_RESET_TIMEOUT = 30.0
+
+# Tavily's API, unless TavilySearch is configured with another base URL
+TAVILY_API_URL = "https://api.tavily.com"
+
+SearchFunction = Callable[[str, int, float], List[Dict[str, Any]]]
+
+
+@dataclass
+class SearchBackend:
+    """A search function with its timeout and circuit breaker state."""
+
+    name: str
+    search: SearchFunction
+    timeout: Optional[float] = None
+    """Seconds this backend may take, within the query timeout (None: no cap)."""
+
+    failure_threshold: int = DEFAULT_FAILURE_THRESHOLD
+    reset_timeout: float = DEFAULT_RESET_TIMEOUT
+    failures: int = 0
+    opened_at: Optional[float] = None
+    _trial_running: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def state(self) -> str:
+        """Circuit state: ``closed``, ``open`` or ``half_open``."""
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def allow_request(self) -> bool:
+        """Return whether to call the backend now; counts skipped requests."""
+        with self._lock:
+            allowed = self.opened_at is None or (
+                not self._trial_running
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            )
+            if allowed and self.opened_at is not None:
+                self._trial_running = True
+        if not allowed:
+            self._record("skipped")
+        return allowed
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+        self._record("ok")
+
+    def record_failure(self, result: str = "error") -> None:
+        """Count a failure or timeout; open the circuit at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_running:
+                    logger.warning(
+                        "Search backend '%s' failed %d times in a row, "
+                        "skipping it for %gs",
+                        self.name,
+                        self.failures,
+                        self.reset_timeout,
+                    )
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+        self._record(result)
+
+    def record_cancelled(self) -> None:
+        """Forget a request abandoned because another backend answered."""
+        with self._lock:
+            self._trial_running = False
+
+    def _record(self, result: str) -> None:
+        get_counter(
+            "agent_search_backend_requests_total",
+            "Web search backend requests by result: ok, error, timeout or skipped "
+            "(circuit open).",
+            ("backend", "result"),
+        ).inc(self.name, result)
+
+
+_backends: Dict[str, SearchBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def register_search_backend(
+    name: str,
+    search: SearchFunction,
+    timeout: Optional[float] = None,
+    failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+    reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+) -> SearchBackend:
+    """Register (or replace) the search backend ``name``.
+
+    Args:
+        name: Name used in the ``search_backends`` context field
+        search: Blocking ``(query, max_results, timeout)`` function returning
+                dicts with ``title``, ``url`` and ``content``
+        timeout: Seconds the backend may take, within the query timeout
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a trial request
+
+    Returns:
+        The registered backend
+    """
+    backend = SearchBackend(
+        name,
+        search,
+        timeout=timeout,
+        failure_threshold=failure_threshold,
+        reset_timeout=reset_timeout,
+    )
+    with _backends_lock:
+        _backends[name] = backend
+    return backend
+
+
+def get_search_backend(name: str) -> SearchBackend:
+    """Return the backend registered as ``name``."""
+    with _backends_lock:
+        backend = _backends.get(name)
+    if backend is None:
+        raise ValueError(
+            f"Unknown search backend '{name}'. Registered: {', '.join(sorted(_backends))}"
+        )
+    return backend
+
+
+def list_search_backends() -> List[SearchBackend]:
+    """Return all registered backends."""
+    with _backends_lock:
+        return list(_backends.values())
+
+
+def duckduckgo_search(
+    query: str, max_results: int, timeout: float
+) -> List[Dict[str, Any]]:
+    """Search DuckDuckGo."""
+    with DDGS(timeout=max(1, math.ceil(timeout))) as ddgs:
+        found = ddgs.text(query, max_results=max_results) or []
+    return [
+        {
+            "title": item.get("title", ""),
+            "url": item.get("href", ""),
+            "content": item.get("body", ""),
+        }
+        for item in found
+    ]
+
+
+def tavily_search(query: str, max_results: int, timeout: float) -> List[Dict[str, Any]]:
+    """Search Tavily; needs the TAVILY_API_KEY env var.
+
+    Posts to the search endpoint with ``timeout``, using the credentials of
+    ``TavilySearch``. Its own request has no timeout, so a search the caller
+    had given up on would keep its pool thread until Tavily answered.
+    """
+    # Imported on first use: langchain_tavily adds ~150 ms to the import time
+    import requests
+    from langchain_tavily import TavilySearch
+
+    api = TavilySearch(max_results=max_results).api_wrapper
+    response = requests.post(
+        f"{api.api_base_url or TAVILY_API_URL}/search",
+        json={"query": query, "max_results": max_results},
+        headers={
+            "Authorization": f"Bearer {api.tavily_api_key.get_secret_value()}",
+            "Content-Type": "application/json",
+        },
+        timeout=timeout,
+    )
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"Tavily search failed with status {response.status_code}: "
+            f"{response.text[:200]}"
+        )
+    return [
+        {
+            "title": item.get("title", ""),
+            "url": item.get("url", ""),
+            "content": item.get("content", ""),
+        }
+        for item in response.json().get("results", [])
+    ]
+
+
+register_search_backend("duckduckgo", duckduckgo_search)
+register_search_backend("tavily", tavily_search)
@@ -7,14 +7,15 @@ consider implementing more robust and specialized tools tailored to your needs.
 """
 
 import logging
-from typing import Any, Callable, List, Optional, cast
+from typing import Any, Callable, List, Optional
+
 import pandas as pd
-# from langchain_tavily import TavilySearch
-from duckduckgo_search import DDGS
 from langgraph.runtime import get_runtime
 
 from common.context import Context
 from common.mcp import get_deepwiki_tools
+from common.mcp_output import read_mcp_output
+from common.search import search
 from common.utils import merge_two_tables
 
 logger = logging.getLogger(__name__)
@@ -32,22 +33,17 @@ async def web_search(query: str) -> Optional[dict[str, Any]]:
     for answering questions about current events.
     """
     runtime = get_runtime(Context)
-    # wrapped = TavilySearch(max_results=runtime.context.max_search_results)
-    # return cast(dict[str, Any], await wrapped.ainvoke({"query": query}))
-    max_results = runtime.context.max_search_results
-
-    # ddgs is synchronous; run it in a thread if needed by your runtime,
-    # but here we just call it directly for simplicity.
-    with DDGS() as ddgs:
-        results = list(ddgs.text(query, max_results=max_results))
-
-    # Normalize into a dict similar to Tavily's style
-    return cast(
-        dict[str, Any],
-        {
-            "query": query,
-            "results": results,
-        },
+    context = runtime.context
+    backends = [name.strip() for name in context.search_backends.split(",")]
+
+    # Backends are synchronous, so they run on a bounded thread pool with a
+    # per-query timeout; results come back normalized to Tavily's style
+    return await search(
+        query,
+        int(context.max_search_results),
+        timeout=context.search_timeout,
+        backends=[name for name in backends if name],
+        strategy=context.search_strategy,
     )
 
 
@@ -208,6 +204,8 @@ async def get_tools() -> List[Callable[..., Any]]:
     if runtime.context.enable_deepwiki:
         deepwiki_tools = await get_deepwiki_tools()
         tools.extend(deepwiki_tools)
+        # Pages through DeepWiki outputs shortened to the token budget
+        tools.append(read_mcp_output)
         logger.info(f"Loaded {len(deepwiki_tools)} deepwiki tools")
 
     return tools
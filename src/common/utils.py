@@ -100,12 +100,27 @@ def get_message_text(msg: BaseMessage) -> str:
 
 def load_chat_model(
     fully_specified_name: str,
+    cache_path: Optional[str] = None,
 ) -> Union[BaseChatModel, ChatQwQ, ChatQwen]:
     """Load a chat model from a fully specified name.
 
     Args:
         fully_specified_name (str): String in the format 'provider:model'.
+        cache_path (str, optional): SQLite file of the persistent response cache.
+            Responses are only cached when a path is given.
     """
+    chat_model = _init_chat_model(fully_specified_name)
+    if cache_path:
+        from .models.cache import get_response_cache
+
+        chat_model.cache = get_response_cache(cache_path)
+    return chat_model
+
+
+def _init_chat_model(
+    fully_specified_name: str,
+) -> Union[BaseChatModel, ChatQwQ, ChatQwen]:
+    """Create the provider client for a fully specified model name."""
     provider, model = fully_specified_name.split(":", maxsplit=1)
     provider_lower = provider.lower()
 
@@ -115,11 +130,23 @@ def load_chat_model(
 
         return create_qwen_model(model)
 
+    # Handle hedged models, e.g. 'hedge:qwen:qwen-flash|siliconflow:Qwen/Qwen3-8B'
+    if provider_lower == "hedge":
+        from .models import create_hedged_model
+
+        return create_hedged_model(model)
+
     # Handle SiliconFlow models
     if provider_lower == "siliconflow":
         from .models import create_siliconflow_model
 
         return create_siliconflow_model(model)
 
+    # Handle offline scripted models, e.g. 'scripted:sop'
+    if provider_lower == "scripted":
+        from .models import create_scripted_model
+
+        return create_scripted_model(model)
+
     # Use standard langchain initialization for other providers
     return init_chat_model(model, model_provider=provider)
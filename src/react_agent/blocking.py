@@ -0,0 +1,337 @@
+"""Event-loop stall detection, to find blocking code in async nodes and tools.
+
+Debug mode: set the ``BLOCKING_THRESHOLD_MS`` env var (e.g. ``50``) and the
+graph nodes start a detector on the event loop they run on. A heartbeat
+callback ticks on the loop; a watchdog thread notices when a tick is late by
+more than the threshold and samples the loop thread's stack while it is
+still blocked. Each stall is attributed to:
+
+- the graph node on the stack (functions decorated with ``instrument_node``)
+- the tool being run (the ``BaseTool`` on the stack), if any
+- the site: the innermost frame of this repository's code, which is what to
+  fix, and the innermost frame overall, which is the blocking call itself.
+  Stalls spent mostly in garbage collection, or waiting for the GIL while
+  another thread held it, are reported as such
+
+Stalls are logged as they happen, recorded in the
+``agent_event_loop_stall_seconds{node,tool}`` histogram and aggregated by
+site. ``render_blocking_report()`` formats the aggregate; at exit it is
+written to ``BLOCKING_REPORT_PATH`` if set, else logged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.tools import BaseTool
+
+from common.metrics import get_histogram
+
+logger = logging.getLogger(__name__)
+
+# Directory of this repository's packages (common, react_agent)
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+# Directories of the standard library and installed packages, longest first
+_LIB_DIRS = tuple(
+    sorted(
+        {os.path.join(path, "") for path in sys.path if os.path.isdir(path)}
+        - {_SRC_DIR},
+        key=len,
+        reverse=True,
+    )
+)
+
+
+def _lib_dir(filename: str) -> str:
+    return next(path for path in _LIB_DIRS if filename.startswith(path))
+
+
+# Methods of BaseTool and its subclasses whose ``self`` is the running tool
+_TOOL_METHODS = frozenset({"run", "arun", "_run", "_arun"})
+
+# Site of stalls sampled while the loop waited in select(): it was ready to
+# run, but another thread (e.g. a sync tool in the executor) held the GIL
+GIL_SITE = "(GIL held by another thread)"
+
+# Site of stalls spent mostly in garbage collection on the loop thread
+GC_SITE = "(garbage collection)"
+
+# Thread ID -> seconds spent in garbage collection, and the running collection
+_gc_seconds: Dict[int, float] = {}
+_gc_started: Dict[int, float] = {}
+
+
+def _track_gc(phase: str, info: Dict[str, Any]) -> None:
+    thread = threading.get_ident()
+    if phase == "start":
+        _gc_started[thread] = time.perf_counter()
+    elif thread in _gc_started:
+        elapsed = time.perf_counter() - _gc_started.pop(thread)
+        _gc_seconds[thread] = _gc_seconds.get(thread, 0.0) + elapsed
+
+
+# Stack frames kept per site in the report
+STACK_DEPTH = 25
+
+# Node, tool, site, blocking call and stack of one stall
+Attribution = Tuple[str, str, str, str, List[str]]
+
+# Code of node functions -> node name, filled by ``register_node_function``
+_node_codes: Dict[CodeType, str] = {}
+
+
+def register_node_function(func: Callable[..., Any], name: str) -> None:
+    """Attribute stalls inside ``func`` to the graph node ``name``."""
+    _node_codes[func.__code__] = name
+
+
+@dataclass
+class StallSite:
+    """Stalls aggregated by node, tool and site."""
+
+    node: str
+    tool: str
+    site: str
+    call: str
+    stack: List[str] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+    longest: float = 0.0
+
+
+_sites: Dict[Tuple[str, str, str], StallSite] = {}
+_sites_lock = threading.Lock()
+
+
+def _frame_label(frame: FrameType) -> str:
+    """Shorten a frame to ``<package path>:<line> in <function>``."""
+    filename = frame.f_code.co_filename
+    if filename.startswith(_SRC_DIR):
+        filename = filename[len(_SRC_DIR) :]
+    elif filename.startswith(_LIB_DIRS):
+        filename = os.path.relpath(filename, _lib_dir(filename))
+    return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+def _attribute(frame: Optional[FrameType]) -> Attribution:
+    """Return node, tool, site, blocking call and stack of a blocked frame."""
+    node = tool = site = call = ""
+    stack: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        label = _frame_label(frame)
+        if not call:
+            call = label
+        if not site and code.co_filename.startswith(_SRC_DIR):
+            site = label
+        if not tool and code.co_name in _TOOL_METHODS:
+            local_vars = frame.f_locals
+            running = local_vars.get("self")
+            if isinstance(running, BaseTool):
+                tool = running.name
+                # Tools run in their own task, below the node's frames
+                config = local_vars.get("config")
+                if not node and isinstance(config, dict):
+                    metadata = config.get("metadata") or {}
+                    node = str(metadata.get("langgraph_node") or "")
+        if not node and code in _node_codes:
+            node = _node_codes[code]
+        if len(stack) < STACK_DEPTH:
+            stack.append(label)
+        frame = frame.f_back
+    if call.startswith("selectors.py"):
+        site = GIL_SITE
+    elif call.startswith("react_agent/blocking.py"):
+        # Sampled in the GC callback, as a collection ended
+        site = GC_SITE
+    return node or "-", tool or "-", site or call or "-", call or "-", stack
+
+
+class LoopMonitor:
+    """Detect stalls of one event loop from a watchdog thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float) -> None:
+        """Monitor ``loop`` for stalls longer than ``threshold`` seconds."""
+        self._loop = weakref.ref(loop)
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self._due = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        # (due time of the late tick, attribution) sampled by the watchdog
+        self._sample: Optional[Tuple[float, Attribution]] = None
+        # Due time of a tick that was late because the loop was not running
+        self._paused: Optional[float] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start the heartbeat and watchdog; call from the loop's thread."""
+        self._loop_thread = threading.get_ident()
+        if _track_gc not in gc.callbacks:
+            gc.callbacks.append(_track_gc)
+        self._due = time.monotonic() + self.interval
+        asyncio.get_running_loop().call_later(self.interval, self._beat)
+        threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        """Stop watching; the heartbeat ends at its next tick."""
+        self._stopped.set()
+
+    def _beat(self) -> None:
+        now = time.monotonic()
+        late = now - self._due
+        sample, self._sample = self._sample, None
+        collecting = _gc_seconds.pop(self._loop_thread or 0, 0.0)
+        if late > self.threshold and self._paused != self._due:
+            attribution: Attribution = ("-", "-", "(not sampled)", "-", [])
+            if sample is not None and sample[0] == self._due:
+                attribution = sample[1]
+            if collecting > late / 2:
+                node, tool, _, _, stack = attribution
+                attribution = (node, tool, GC_SITE, "gc.collect", stack)
+            _record_stall(late, *attribution)
+        if self._stopped.is_set():
+            return
+        self._due = now + self.interval
+        asyncio.get_running_loop().call_later(self.interval, self._beat)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            loop = self._loop()
+            if loop is None or loop.is_closed():
+                return
+            due = self._due
+            if not loop.is_running():
+                self._paused = due
+            del loop
+            if time.monotonic() - due < self.threshold / 2 or self._paused == due:
+                continue
+            if self._sample is not None and self._sample[0] == due:
+                continue
+            frame = sys._current_frames().get(self._loop_thread or 0)
+            self._sample = (due, _attribute(frame))
+
+
+def _record_stall(
+    seconds: float, node: str, tool: str, site: str, call: str, stack: List[str]
+) -> None:
+    get_histogram(
+        "agent_event_loop_stall_seconds",
+        "Event-loop stalls longer than BLOCKING_THRESHOLD_MS.",
+        ("node", "tool"),
+    ).observe(seconds, node, tool)
+    logger.warning(
+        "Event loop blocked for %.0f ms (node=%s, tool=%s) at %s, in %s",
+        seconds * 1e3,
+        node,
+        tool,
+        site,
+        call,
+    )
+    with _sites_lock:
+        entry = _sites.get((node, tool, site))
+        if entry is None:
+            entry = _sites[(node, tool, site)] = StallSite(node, tool, site, call)
+        entry.count += 1
+        entry.total += seconds
+        if seconds >= entry.longest:
+            entry.longest = seconds
+            entry.call = call
+            entry.stack = stack
+
+
+def get_stall_sites() -> List[StallSite]:
+    """Return the stall sites, longest total stall time first."""
+    with _sites_lock:
+        return sorted(_sites.values(), key=lambda site: -site.total)
+
+
+def reset_stalls() -> None:
+    """Forget the recorded stalls."""
+    with _sites_lock:
+        _sites.clear()
+
+
+def render_blocking_report() -> str:
+    """Format the recorded stalls by site, with the stack of the longest one."""
+    sites = get_stall_sites()
+    if not sites:
+        return "No event-loop stalls recorded."
+    count = sum(site.count for site in sites)
+    total = sum(site.total for site in sites)
+    lines = [
+        f"Event-loop stalls: {count}, {total * 1e3:.0f} ms in total",
+        "",
+        f"{'count':>6}{'total ms':>10}{'max ms':>9}  {'node':<12}{'tool':<28}site",
+    ]
+    for site in sites:
+        lines.append(
+            f"{site.count:>6}{site.total * 1e3:>10.0f}{site.longest * 1e3:>9.0f}"
+            f"  {site.node:<12}{site.tool:<28}{site.site}"
+        )
+    for site in sites:
+        lines += [
+            "",
+            f"{site.site} (node={site.node}, tool={site.tool}), blocked in {site.call}",
+            *(f"    {frame}" for frame in reversed(site.stack)),
+        ]
+    return "\n".join(lines)
+
+
+# One monitor per event loop
+_monitors: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LoopMonitor] = (
+    weakref.WeakKeyDictionary()
+)
+_threshold: Optional[float] = None
+
+
+def start_blocking_detector(
+    threshold: float, loop: Optional[asyncio.AbstractEventLoop] = None
+) -> LoopMonitor:
+    """Watch ``loop`` (default: the running loop) for stalls over ``threshold`` s."""
+    loop = loop or asyncio.get_running_loop()
+    monitor = _monitors.get(loop)
+    if monitor is None:
+        monitor = _monitors[loop] = LoopMonitor(loop, threshold)
+        monitor.start()
+    return monitor
+
+
+def _write_report_at_exit() -> None:
+    if not _sites:
+        return
+    report = render_blocking_report()
+    path = os.getenv("BLOCKING_REPORT_PATH")
+    if not path:
+        logger.warning("%s", report)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report + "\n")
+
+
+def ensure_blocking_detector() -> None:
+    """Watch the running loop if ``BLOCKING_THRESHOLD_MS`` is set."""
+    global _threshold
+    if _threshold is None:
+        try:
+            _threshold = float(os.getenv("BLOCKING_THRESHOLD_MS") or 0) / 1e3
+        except ValueError:
+            logger.warning("Ignoring invalid BLOCKING_THRESHOLD_MS")
+            _threshold = 0.0
+        if _threshold > 0:
+            atexit.register(_write_report_at_exit)
+    if _threshold > 0:
+        start_blocking_detector(_threshold)
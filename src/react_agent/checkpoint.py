@@ -0,0 +1,541 @@
+"""Durable, delta-encoded SQLite checkpointer for the ReAct agent.
+
+The message channel grows by a few messages per superstep, yet a regular
+checkpointer writes the whole list again every time it changes. This saver
+stores each new version of a message channel as a delta against the previous
+version (how many leading messages are kept, plus the messages appended
+after them). A full keyframe is written every ``keyframe_interval`` versions
+or when most of the list was rewritten, so reconstruction never walks more
+than ``keyframe_interval`` deltas.
+
+Values are serialized with the checkpoint serializer's msgpack encoding and
+message lists are only materialized when a checkpoint is read.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+# Number of consecutive deltas after which a full keyframe is written
+DEFAULT_KEYFRAME_INTERVAL = 64
+# Number of reconstructed message lists kept in memory
+DEFAULT_MATERIALIZED_CACHE_SIZE = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS message_deltas (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    base_version TEXT,
+    keep INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    appended BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+# (thread_id, checkpoint_ns, channel, version)
+_VersionKey = Tuple[str, str, str, str]
+
+
+class DeltaSQLiteSaver(BaseCheckpointSaver[str]):
+    """SQLite checkpointer that stores message channels as per-step deltas.
+
+    Args:
+        path: SQLite database file, or ':memory:'.
+        delta_channels: Channels holding append-mostly message lists.
+        keyframe_interval: Maximum delta chain length before a full keyframe.
+        serde: Serializer for checkpoint values. Defaults to the msgpack-based
+            ``JsonPlusSerializer``.
+
+    Examples:
+        ```python
+        from react_agent.checkpoint import DeltaSQLiteSaver
+        from react_agent.graph import builder
+
+        graph = builder.compile(checkpointer=DeltaSQLiteSaver("threads.sqlite"))
+        ```
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        *,
+        delta_channels: Sequence[str] = ("messages",),
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+        serde: Optional[SerializerProtocol] = None,
+    ) -> None:
+        """Open (or create) the checkpoint database at ``path``."""
+        super().__init__(serde=serde)
+        self.path = path
+        self.delta_channels = frozenset(delta_channels)
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.bytes_written = 0
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        # Recently materialized message lists: version key -> (messages, depth)
+        self._materialized: OrderedDict[_VersionKey, Tuple[List[Any], int]] = (
+            OrderedDict()
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    # Delta encoding
+
+    def _remember(self, key: _VersionKey, messages: List[Any], depth: int) -> None:
+        self._materialized[key] = (messages, depth)
+        self._materialized.move_to_end(key)
+        while len(self._materialized) > DEFAULT_MATERIALIZED_CACHE_SIZE:
+            self._materialized.popitem(last=False)
+
+    def _load_messages(self, key: _VersionKey) -> Tuple[List[Any], int]:
+        """Materialize a delta-encoded channel version and its chain depth."""
+        chain: List[Tuple[int, str, bytes]] = []
+        base: Optional[List[Any]] = None
+        depth: Optional[int] = None
+        cursor: Optional[_VersionKey] = key
+        while cursor is not None:
+            if cursor in self._materialized:
+                base, base_depth = self._materialized[cursor]
+                self._materialized.move_to_end(cursor)
+                if depth is None:
+                    depth = base_depth
+                break
+            row = self._conn.execute(
+                "SELECT base_version, keep, depth, type, appended FROM message_deltas "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                cursor,
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Missing message delta for {cursor}")
+            base_version, keep, row_depth, type_, appended = row
+            if depth is None:
+                depth = row_depth
+            chain.append((keep, type_, appended))
+            cursor = (*cursor[:3], base_version) if base_version is not None else None
+        messages: List[Any] = list(base) if base is not None else []
+        for keep, type_, appended in reversed(chain):
+            del messages[keep:]
+            messages.extend(self.serde.loads_typed((type_, appended)))
+        depth = depth or 0
+        if chain:
+            self._remember(key, messages, depth)
+        return list(messages), depth
+
+    def _put_messages(
+        self,
+        key: _VersionKey,
+        messages: List[Any],
+        base_key: Optional[_VersionKey],
+    ) -> None:
+        """Write a new channel version as a delta against ``base_key``."""
+        base: Optional[List[Any]] = None
+        depth = 0
+        if base_key is not None:
+            try:
+                base, depth = self._load_messages(base_key)
+            except KeyError:
+                base = None
+        keep = 0
+        if base is not None:
+            limit = min(len(base), len(messages))
+            while keep < limit and (
+                base[keep] is messages[keep] or base[keep] == messages[keep]
+            ):
+                keep += 1
+        keyframe = (
+            base is None or depth + 1 >= self.keyframe_interval or keep < len(base) // 2
+        )
+        if keyframe:
+            keep, depth, base_version = 0, 0, None
+        else:
+            depth, base_version = depth + 1, base_key[3] if base_key else None
+        type_, appended = self.serde.dumps_typed(list(messages[keep:]))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO message_deltas "
+            "(thread_id, checkpoint_ns, channel, version, base_version, keep, depth, type, appended) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*key, base_version, keep, depth, type_, appended),
+        )
+        self.bytes_written += len(appended)
+        self._remember(key, list(messages), depth)
+
+    def _load_channel_values(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        channel_values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            key = (thread_id, checkpoint_ns, channel, str(version))
+            if channel in self.delta_channels:
+                try:
+                    channel_values[channel] = self._load_messages(key)[0]
+                    continue
+                except KeyError:
+                    pass
+            row = self._conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                key,
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return channel_values
+
+    # Reads
+
+    def _build_tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        row: Tuple[str, Optional[str], str, bytes, str, bytes],
+    ) -> CheckpointTuple:
+        checkpoint_id, parent_id, c_type, c_blob, m_type, m_blob = row
+        checkpoint: Checkpoint = self.serde.loads_typed((c_type, c_blob))
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, blob FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channel_values(
+                    thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self.serde.loads_typed((m_type, m_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, blob)))
+                for task_id, channel, type_, blob in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the requested checkpoint, or the latest one of the thread."""
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: Tuple[str, ...] = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._build_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, materializing each one on demand."""
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "checkpoint_type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses: List[str] = []
+        params: List[str] = []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            with self._lock:
+                item = self._build_tuple(thread_id, checkpoint_ns, tuple(row))
+            yield item
+
+    # Writes
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint, delta-encoding new versions of message channels."""
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_id = config["configurable"].get("checkpoint_id")
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        with self._lock:
+            parent_versions: ChannelVersions = {}
+            if parent_id and self.delta_channels.intersection(new_versions):
+                row = self._conn.execute(
+                    "SELECT checkpoint_type, checkpoint FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, parent_id),
+                ).fetchone()
+                if row is not None:
+                    parent_versions = self.serde.loads_typed(row)["channel_versions"]
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, str(version))
+                value = values.get(channel)
+                if channel in self.delta_channels and isinstance(value, list):
+                    base_version = parent_versions.get(channel)
+                    base_key = (
+                        (thread_id, checkpoint_ns, channel, str(base_version))
+                        if base_version is not None
+                        else None
+                    )
+                    self._put_messages(key, value, base_key)
+                    continue
+                type_, blob = (
+                    self.serde.dumps_typed(value)
+                    if channel in values
+                    else ("empty", b"")
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, type_, blob),
+                )
+                self.bytes_written += len(blob)
+            c_type, c_blob = self.serde.dumps_typed(c)
+            m_type, m_blob = self.serde.dumps_typed(
+                get_checkpoint_metadata(config, metadata)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    parent_id,
+                    c_type,
+                    c_blob,
+                    m_type,
+                    m_blob,
+                ),
+            )
+            self.bytes_written += len(c_blob) + len(m_blob)
+            self._conn.commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save intermediate writes of a task."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    type_,
+                    blob,
+                    task_path,
+                )
+            )
+            self.bytes_written += len(blob)
+        # Special writes (errors, interrupts) replace earlier ones; regular
+        # writes are only stored once per task and index
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] < 0],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] >= 0],
+            )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints, deltas and writes of a thread."""
+        with self._lock:
+            for table in ("checkpoints", "blobs", "message_deltas", "writes"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                )
+            self._conn.commit()
+            for key in [k for k in self._materialized if k[0] == thread_id]:
+                del self._materialized[key]
+
+    # Async variants run the SQLite work in a thread so the event loop keeps going
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Asynchronous version of get_tuple."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Asynchronous version of list."""
+        iterator = self.list(config, filter=filter, before=before, limit=limit)
+        sentinel = object()
+        while True:
+            item = await asyncio.to_thread(next, iterator, sentinel)
+            if item is sentinel:
+                break
+            yield item  # type: ignore[misc]
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Asynchronous version of put."""
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Asynchronous version of put_writes."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Asynchronous version of delete_thread."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Return a monotonically increasing, sortable version string."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
@@ -3,25 +3,102 @@
 Works with a chat model with tool calling support.
 """
 
+import json
 from datetime import UTC, datetime
-from typing import Dict, List, Literal, cast
-
-from langchain_core.messages import AIMessage, ToolMessage
+from typing import Any, Dict, List, Literal, Sequence, cast
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+from langgraph.config import get_config
 from langgraph.graph import StateGraph
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.prebuilt import ToolNode
 from langgraph.runtime import Runtime
 
 from common.context import Context
+from common.mcp_output import output_query
+from common.models.usage import usage_from_response
 from common.tools import get_tools
 from common.utils import load_chat_model
-from react_agent.state import InputState, State
+from react_agent.instrumentation import (
+    instrument_node,
+    observe_steps_per_run,
+    with_metrics_callback,
+)
+from react_agent.state import (
+    COMPLETED_TOOL_CALLS_TAG,
+    InputState,
+    OutputState,
+    State,
+)
+
+# Tool results longer than this are truncated in lean-mode tool summaries
+TOOL_SUMMARY_MAX_CHARS = 500
+
+
+def _completed_tool_exchange(
+    messages: Sequence[AnyMessage],
+) -> tuple[List[AnyMessage], List[Dict[str, Any]]]:
+    """Find the trailing tool exchange and summarize it.
+
+    Returns the messages of the exchange (the AIMessage with tool calls and
+    the ToolMessages answering it) and one summary entry per tool call.
+    """
+    for start in range(len(messages) - 1, -1, -1):
+        message = messages[start]
+        if isinstance(message, AIMessage) and message.tool_calls:
+            break
+        if not isinstance(message, ToolMessage):
+            return [], []
+    else:
+        return [], []
+
+    request = cast(AIMessage, messages[start])
+    calls = {call["id"]: call for call in request.tool_calls}
+    summary = []
+    for message in messages[start + 1 :]:
+        tool_message = cast(ToolMessage, message)
+        call: Dict[str, Any] = dict(calls.get(tool_message.tool_call_id) or {})
+        result = (
+            tool_message.content
+            if isinstance(tool_message.content, str)
+            else json.dumps(tool_message.content, ensure_ascii=False)
+        )
+        summary.append(
+            {
+                "tool": call.get("name", tool_message.name),
+                "args": call.get("args", {}),
+                "status": tool_message.status,
+                "result": result[:TOOL_SUMMARY_MAX_CHARS],
+            }
+        )
+    return list(messages[start:]), summary
+
+
+def _render_tool_summary(summary: Sequence[Dict[str, Any]]) -> str:
+    """Render lean-mode tool summaries for the system prompt."""
+    lines = [
+        f"- {entry['tool']}({json.dumps(entry['args'], ensure_ascii=False)})"
+        f" -> {entry['status']}: {entry['result']}"
+        for entry in summary
+    ]
+    return (
+        f'<{COMPLETED_TOOL_CALLS_TAG} count="{len(summary)}">\n'
+        + "\n".join(lines)
+        + f"\n</{COMPLETED_TOOL_CALLS_TAG}>"
+    )
+
 
 # Define the function that calls the model
 
 
-async def call_model(
-    state: State, runtime: Runtime[Context]
-) -> Dict[str, List[AIMessage]]:
+@instrument_node("call_model")
+async def call_model(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
     """Call the LLM powering our "agent".
 
     This function prepares the prompt, initializes the model, and processes the response.
@@ -37,37 +114,69 @@ async def call_model(
     available_tools = await get_tools()
 
     # Initialize the model with tool binding. Change the model or add more tools here.
-    model = load_chat_model(runtime.context.model).bind_tools(available_tools)
+    model = load_chat_model(
+        runtime.context.model, cache_path=runtime.context.llm_cache_path or None
+    ).bind_tools(available_tools)
 
     # Format the system prompt. Customize this to change the agent's behavior.
-    #system_message = runtime.context.system_prompt.format(
+    # system_message = runtime.context.system_prompt.format(
     #    system_time=datetime.now(tz=UTC).isoformat()
-    #)
+    # )
     system_message = runtime.context.system_prompt
+    lean = runtime.context.run_mode == "lean"
+    if lean and state.tool_summary:
+        # In the one system message: some chat APIs reject a later one
+        system_message += "\n\n" + _render_tool_summary(state.tool_summary)
+    prompt: List[Any] = [{"role": "system", "content": system_message}]
+
+    config = get_config()
+    if runtime.context.enable_metrics:
+        config = with_metrics_callback(config)
 
     # Get the model's response
-    response = cast(
-        AIMessage,
-        await model.ainvoke(
-            [{"role": "system", "content": system_message}, *state.messages]
-        ),
-    )
+    response = cast(AIMessage, await model.ainvoke([*prompt, *state.messages], config))
 
     # Handle the case when it's the last step and the model still wants to use a tool
-    if state.is_last_step and response.tool_calls:
+    step_limit_hit = bool(state.is_last_step and response.tool_calls)
+    usage = usage_from_response(
+        runtime.context.model, response, step_limit_hit=step_limit_hit
+    )
+    if step_limit_hit:
+        response = AIMessage(
+            id=response.id,
+            content="Sorry, I could not find an answer to your question in the specified number of steps.",
+        )
+
+    final = not response.tool_calls
+    if final and runtime.context.enable_metrics:
+        observe_steps_per_run(config, state.remaining_steps)
+    if not lean:
+        # Return the model's response as a list to be added to existing messages
+        if final:
+            return {
+                "messages": [response],
+                "final_response": str(response.content),
+                "usage": usage,
+            }
+        return {"messages": [response], "usage": usage}
+
+    # Lean run: the model has consumed the last tool results, so keep only a summary
+    exchange, summary = _completed_tool_exchange(state.messages)
+    if final:
         return {
-            "messages": [
-                AIMessage(
-                    id=response.id,
-                    content="Sorry, I could not find an answer to your question in the specified number of steps.",
-                )
-            ]
+            "messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), response],
+            "final_response": str(response.content),
+            "tool_summary": summary,
+            "usage": usage,
         }
-
-    # Return the model's response as a list to be added to existing messages
-    return {"messages": [response]}
+    return {
+        "messages": [*(RemoveMessage(id=cast(str, m.id)) for m in exchange), response],
+        "tool_summary": summary,
+        "usage": usage,
+    }
 
 
+@instrument_node("tools")
 async def dynamic_tools_node(
     state: State, runtime: Runtime[Context]
 ) -> Dict[str, List[ToolMessage]]:
@@ -82,15 +191,28 @@ async def dynamic_tools_node(
     # Create a ToolNode with the available tools
     tool_node = ToolNode(available_tools)
 
+    config = get_config()
+    if runtime.context.enable_metrics:
+        config = with_metrics_callback(config)
+
+    # Long MCP outputs keep the sections most relevant to the user's question
+    question = next(
+        (m.text() for m in reversed(state.messages) if isinstance(m, HumanMessage)),
+        "",
+    )
+
     # Execute the tool node
-    result = await tool_node.ainvoke(state)
+    with output_query(question):
+        result = await tool_node.ainvoke(state, config)
 
     return cast(Dict[str, List[ToolMessage]], result)
 
 
 # Define a new graph
 
-builder = StateGraph(State, input_schema=InputState, context_schema=Context)
+builder = StateGraph(
+    State, input_schema=InputState, output_schema=OutputState, context_schema=Context
+)
 
 # Define the two nodes we will cycle between
 builder.add_node(call_model)
@@ -0,0 +1,222 @@
+"""Hot-path latency instrumentation of the ReAct graph.
+
+Records, in the process-wide registry of ``common.metrics``:
+
+- ``agent_node_duration_seconds{node}``: duration of each graph node
+- ``agent_model_time_to_first_token_seconds{model}``: time to the first
+  streamed token (equal to the total latency when the model does not stream)
+- ``agent_model_latency_seconds{model}``: total model call latency
+- ``agent_tool_duration_seconds{tool}``: latency of each SOP or MCP tool
+- ``agent_tool_errors_total{tool}``: tool calls that raised
+- ``agent_steps_per_run``: supersteps a run needed to reach its final answer
+
+Set the ``METRICS_PORT`` env var to serve the metrics at
+``http://127.0.0.1:<port>/metrics``, or call ``render_prometheus()``.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, cast
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import DEFAULT_RECURSION_LIMIT, merge_configs
+from langgraph.runtime import Runtime
+
+from common.context import Context
+from common.metrics import get_counter, get_histogram, start_metrics_server
+from react_agent.blocking import ensure_blocking_detector, register_node_function
+
+logger = logging.getLogger(__name__)
+
+# Bucket bounds of the steps-per-run histogram
+STEPS_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def observe_node_duration(node: str, seconds: float) -> None:
+    """Record the duration of one node execution."""
+    get_histogram(
+        "agent_node_duration_seconds", "Duration of graph node executions.", ("node",)
+    ).observe(seconds, node)
+
+
+def observe_steps_per_run(config: RunnableConfig, remaining_steps: int) -> None:
+    """Record how many supersteps the current run took so far."""
+    limit = config.get("recursion_limit", DEFAULT_RECURSION_LIMIT)
+    get_histogram(
+        "agent_steps_per_run",
+        "Supersteps a run needed to reach its final answer.",
+        buckets=STEPS_BUCKETS,
+    ).observe(limit - remaining_steps)
+
+
+class AgentMetricsCallback(BaseCallbackHandler):
+    """Callback handler that times model and tool runs.
+
+    Runs inline on the event loop: each event is a dict operation and, at the
+    end of a run, one histogram observation.
+    """
+
+    run_inline = True
+    # Only model and tool events are timed
+    ignore_chain = True
+    ignore_retriever = True
+    ignore_retry = True
+    ignore_custom_event = True
+
+    def __init__(self) -> None:
+        """Create the handler."""
+        # run_id -> [model label, start time, time to first token]
+        self._models: Dict[UUID, List[Any]] = {}
+        # run_id -> (tool name, start time)
+        self._tools: Dict[UUID, Tuple[str, float]] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Start timing a model call."""
+        metadata = metadata or {}
+        provider = metadata.get("ls_provider")
+        name = metadata.get("ls_model_name")
+        if provider and name:
+            label = f"{provider}:{name}"
+        else:
+            label = str(name or (serialized or {}).get("name") or "unknown")
+        self._models[run_id] = [label, time.perf_counter(), None]
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the time to the first streamed token."""
+        run = self._models.get(run_id)
+        if run is not None and run[2] is None:
+            run[2] = time.perf_counter() - run[1]
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the model call latency."""
+        run = self._models.pop(run_id, None)
+        if run is None:
+            return
+        label, start, first_token = run
+        latency = time.perf_counter() - start
+        get_histogram(
+            "agent_model_time_to_first_token_seconds",
+            "Time to the first model token (total latency when not streaming).",
+            ("model",),
+        ).observe(latency if first_token is None else first_token, label)
+        get_histogram(
+            "agent_model_latency_seconds", "Total model call latency.", ("model",)
+        ).observe(latency, label)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Forget a failed model call."""
+        self._models.pop(run_id, None)
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        """Start timing a tool call."""
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._tools[run_id] = (str(name), time.perf_counter())
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the tool latency."""
+        self._finish_tool(run_id)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Record the tool latency and count the error."""
+        name = self._finish_tool(run_id)
+        if name is not None:
+            get_counter(
+                "agent_tool_errors_total", "Tool calls that raised.", ("tool",)
+            ).inc(name)
+
+    def _finish_tool(self, run_id: UUID) -> Optional[str]:
+        run = self._tools.pop(run_id, None)
+        if run is None:
+            return None
+        name, start = run
+        get_histogram(
+            "agent_tool_duration_seconds", "Tool call latency.", ("tool",)
+        ).observe(time.perf_counter() - start, name)
+        return name
+
+
+# Shared handler; per-run state is keyed by run ID
+AGENT_METRICS_CALLBACK = AgentMetricsCallback()
+
+
+def with_metrics_callback(config: RunnableConfig) -> RunnableConfig:
+    """Add the metrics handler to ``config`` without replacing its callbacks."""
+    return merge_configs(config, {"callbacks": [AGENT_METRICS_CALLBACK]})
+
+
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def _ensure_metrics_server() -> None:
+    """Start the metrics endpoint once if METRICS_PORT is set."""
+    global _server_started
+    if _server_started:
+        return
+    with _server_lock:
+        if _server_started:
+            return
+        _server_started = True
+        port = os.getenv("METRICS_PORT")
+        if not port:
+            return
+        try:
+            start_metrics_server(int(port))
+        except (OSError, ValueError) as e:
+            logger.warning("Could not start metrics endpoint on port %s: %s", port, e)
+
+
+def instrument_node(name: str) -> Callable[[F], F]:
+    """Time a graph node, unless ``enable_metrics`` is off in the context.
+
+    Also attributes event-loop stalls to the node and, when
+    ``BLOCKING_THRESHOLD_MS`` is set, starts the stall detector.
+    """
+
+    def decorator(func: F) -> F:
+        register_node_function(func, name)
+
+        @functools.wraps(func)
+        async def wrapper(state: Any, runtime: Runtime[Context]) -> Any:
+            ensure_blocking_detector()
+            if not runtime.context.enable_metrics:
+                return await func(state, runtime)
+            _ensure_metrics_server()
+            start = time.perf_counter()
+            try:
+                return await func(state, runtime)
+            finally:
+                observe_node_duration(name, time.perf_counter() - start)
+
+        return cast(F, wrapper)
+
+    return decorator
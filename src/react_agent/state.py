@@ -2,14 +2,141 @@
 
 from __future__ import annotations
 
+import operator
+import uuid
 from dataclasses import dataclass, field
-from typing import Sequence
-
-from langchain_core.messages import AnyMessage
-from langgraph.graph import add_messages
-from langgraph.managed import IsLastStep
+from typing import Any, Dict, List, Optional, Sequence, cast
+
+from langchain_core.messages import (
+    AnyMessage,
+    BaseMessageChunk,
+    RemoveMessage,
+    convert_to_messages,
+    message_chunk_to_message,
+)
+from langgraph.graph.message import REMOVE_ALL_MESSAGES, Messages
+from langgraph.managed import IsLastStep, RemainingSteps
 from typing_extensions import Annotated
 
+from common.models.usage import merge_usage
+
+# Tag of the lean run mode's tool summary in the system prompt; its ``count``
+# attribute is the number of ``tool_summary`` entries rendered in it
+COMPLETED_TOOL_CALLS_TAG = "completed_tool_calls"
+
+
+class IndexedMessages(List[AnyMessage]):
+    """Message list that carries an ID -> position index between reducer calls.
+
+    Successive versions of a thread share one index dict whose entries are
+    never overwritten, so any version holding an ID holds it at the indexed
+    position. A lookup is a hit only if that position is inside this list and
+    holds the ID; entries added by newer or sibling versions fail the check.
+    A version that appends an ID already indexed by a sibling takes its own
+    copy of the dict first. Lists modified in place after the reducer ran are
+    detected by their length and reindexed.
+    """
+
+    _index: Dict[str, int]
+    _indexed_len: int
+
+    @classmethod
+    def from_messages(
+        cls, messages: Sequence[AnyMessage], index: Optional[Dict[str, int]] = None
+    ) -> IndexedMessages:
+        """Wrap ``messages`` (copied) and index them unless ``index`` is given."""
+        result = cls(messages)
+        if index is None:
+            index = {cast(str, m.id): i for i, m in enumerate(result)}
+        result._index = index
+        result._indexed_len = len(result)
+        return result
+
+    def position(self, message_id: str) -> Optional[int]:
+        """Return the position of the message with ``message_id``, if present."""
+        if len(self) != self._indexed_len:
+            self._reindex()
+        pos = self._index.get(message_id)
+        if pos is not None and pos < len(self) and self[pos].id == message_id:
+            return pos
+        return None
+
+    def append_indexed(self, message: AnyMessage) -> None:
+        """Append a message whose ID is not in this list."""
+        message_id = cast(str, message.id)
+        if message_id in self._index:
+            # Indexed by a sibling version at another position; stop sharing
+            self._index = dict(self._index)
+        self._index[message_id] = len(self)
+        self.append(message)
+        self._indexed_len += 1
+
+    def _reindex(self) -> None:
+        self._index = {cast(str, m.id): i for i, m in enumerate(self)}
+        self._indexed_len = len(self)
+
+
+def _coerce_messages(value: Messages) -> List[AnyMessage]:
+    messages = value if isinstance(value, list) else [value]
+    return [
+        cast(AnyMessage, message_chunk_to_message(cast(BaseMessageChunk, m)))
+        for m in convert_to_messages(messages)
+    ]
+
+
+def add_messages_indexed(left: Messages, right: Messages) -> IndexedMessages:
+    """Merge two message lists like ``add_messages``, using an ID index.
+
+    ``add_messages`` re-coerces and re-indexes the whole existing list on every
+    update, so building an n-message thread costs O(n^2) Python work. This
+    reducer keeps the existing list as an ``IndexedMessages``: only the new
+    messages are coerced and looked up, and the existing list is copied with a
+    single C-level list copy. Messages with an existing ID replace it in place,
+    ``RemoveMessage`` deletes by ID and ``REMOVE_ALL_MESSAGES`` clears the list.
+    """
+    if isinstance(left, IndexedMessages):
+        merged = IndexedMessages.from_messages(left, left._index)
+        merged._indexed_len = left._indexed_len
+    else:
+        existing = _coerce_messages(left)
+        for m in existing:
+            if m.id is None:
+                m.id = str(uuid.uuid4())
+        merged = IndexedMessages.from_messages(existing)
+
+    updates = _coerce_messages(right)
+    remove_all_idx = None
+    for i, m in enumerate(updates):
+        if m.id is None:
+            m.id = str(uuid.uuid4())
+        if isinstance(m, RemoveMessage) and m.id == REMOVE_ALL_MESSAGES:
+            remove_all_idx = i
+    if remove_all_idx is not None:
+        return IndexedMessages.from_messages(updates[remove_all_idx + 1 :])
+
+    to_remove = set()
+    for m in updates:
+        message_id = cast(str, m.id)
+        pos = merged.position(message_id)
+        if isinstance(m, RemoveMessage):
+            if pos is None:
+                raise ValueError(
+                    f"Attempting to delete a message with an ID that doesn't exist ('{m.id}')"
+                )
+            to_remove.add(message_id)
+        elif pos is not None:
+            to_remove.discard(message_id)
+            merged[pos] = m
+        else:
+            merged.append_indexed(m)
+
+    if to_remove:
+        # Removals shift positions, so the result gets its own index
+        return IndexedMessages.from_messages(
+            [m for m in merged if m.id not in to_remove]
+        )
+    return merged
+
 
 @dataclass
 class InputState:
@@ -18,7 +145,7 @@ class InputState:
     This class is used to define the initial state and structure of incoming data.
     """
 
-    messages: Annotated[Sequence[AnyMessage], add_messages] = field(
+    messages: Annotated[Sequence[AnyMessage], add_messages_indexed] = field(
         default_factory=list
     )
     """
@@ -33,13 +160,46 @@ class InputState:
 
     Steps 2-5 may repeat as needed.
 
-    The `add_messages` annotation ensures that new messages are merged with existing ones,
+    The `add_messages_indexed` annotation ensures that new messages are merged with existing ones,
     updating by ID to maintain an "append-only" state unless a message with the same ID is provided.
+    It behaves like `add_messages`, but does not re-index the whole thread on every update.
+    """
+
+
+@dataclass
+class OutputState(InputState):
+    """Defines the output state of the agent.
+
+    In the lean run mode, ``messages`` ends with only the final report. The
+    tool calls that led to it are kept as ``tool_summary`` entries.
+    """
+
+    final_response: str = ""
+    """The content of the agent's final answer."""
+
+    tool_summary: Annotated[List[Dict[str, Any]], operator.add] = field(
+        default_factory=list
+    )
+    """
+    Compact records of tool exchanges dropped from `messages` in the lean run mode.
+
+    Each entry holds the tool name, its arguments, the status and the (truncated) result.
+    """
+
+    usage: Annotated[Dict[str, Dict[str, float]], merge_usage] = field(
+        default_factory=dict
+    )
+    """
+    Token and cost accounting of the model calls, keyed by model.
+
+    Each entry counts calls, input, output, cached and reasoning tokens, the cost
+    in USD (per the configured price table) and the calls that hit the step limit.
+    On a thread, the counters accumulate over all of its runs.
     """
 
 
 @dataclass
-class State(InputState):
+class State(OutputState):
     """Represents the complete state of the agent, extending InputState with additional attributes.
 
     This class can be used to store any information needed throughout the agent's lifecycle.
@@ -53,6 +213,13 @@ class State(InputState):
     It is set to 'True' when the step count reaches recursion_limit - 1.
     """
 
+    remaining_steps: RemainingSteps = field(default=25)
+    """
+    Number of supersteps left before the recursion limit, also managed by the state machine.
+
+    Used to record how many steps a run took.
+    """
+
     # Additional attributes can be added here as needed.
     # Common examples include:
     # retrieved_documents: List[Document] = field(default_factory=list)
@@ -0,0 +1,78 @@
+"""Report event-loop blocking in offline SOP verifications.
+
+Runs ``--runs`` concurrent SOP verifications with the offline
+``scripted:sop`` model and the event-loop stall detector of
+``react_agent.blocking`` on, then prints every stall over ``--threshold-ms``
+by graph node, tool and site, with the stack of the longest one per site.
+Concurrent runs matter: a sync tool in the executor can hold the GIL while
+the loop wants to run, which shows up as ``(GIL held by another thread)``.
+
+Run from the repository root (the SOP tools load ./data on import).
+
+Usage:
+    python tests/benchmarks/blocking_report.py
+    python tests/benchmarks/blocking_report.py --runs 50 --threshold-ms 5
+    python tests/benchmarks/blocking_report.py --deepwiki
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from langchain_core.messages import HumanMessage
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+
+from common.context import Context  # noqa: E402
+from react_agent.blocking import (  # noqa: E402
+    render_blocking_report,
+    start_blocking_detector,
+)
+from react_agent.graph import graph  # noqa: E402
+
+
+async def run(runs: int, threshold: float, context: Context) -> None:
+    start_blocking_detector(threshold)
+    await asyncio.gather(
+        *(
+            graph.ainvoke(
+                {"messages": [HumanMessage(content=f"verify a_{i:05d}")]},
+                context=context,
+            )
+            for i in range(runs)
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Concurrent runs")
+    parser.add_argument("--threshold-ms", type=float, default=10.0)
+    parser.add_argument(
+        "--deepwiki", action="store_true", help="Load the DeepWiki MCP tools too"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Log every stall as it happens"
+    )
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger("react_agent.blocking").setLevel(logging.ERROR)
+
+    context = Context(
+        model="scripted:sop", enable_deepwiki=args.deepwiki, enable_metrics=False
+    )
+    asyncio.run(run(args.runs, args.threshold_ms / 1e3, context))
+    print(render_blocking_report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Checkpointer benchmarks: write amplification and resume latency.
+
+Drives a synthetic ReAct-shaped thread (human -> AI tool call -> tool result ->
+AI answer) through the graph and compares the delta-encoded SQLite saver with
+the same saver storing full message lists, and with the in-memory saver used
+by the evaluations.
+
+Run from the repository root (the SOP tools load ./data on import).
+
+Usage:
+    python tests/benchmarks/checkpoint_bench.py                    # 1k-message thread
+    python tests/benchmarks/checkpoint_bench.py --messages 4000    # Longer thread
+    python tests/benchmarks/checkpoint_bench.py --keyframe-interval 16
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+
+from react_agent.checkpoint import DeltaSQLiteSaver  # noqa: E402
+from react_agent.state import InputState, State  # noqa: E402
+
+# Realistic size of an SOP tool result (one CSV row rendered as text)
+TOOL_RESULT = "aircraft_id=a_00123, status=ok, " * 12
+
+
+def build_graph(checkpointer: Any) -> Any:
+    """Graph whose two nodes mimic call_model and tools, one message each."""
+    step = {"n": 0}
+
+    def call_model(state: State) -> Dict[str, List[Any]]:
+        step["n"] += 1
+        if isinstance(state.messages[-1], ToolMessage):
+            return {"messages": [AIMessage(content="Check complete: " + TOOL_RESULT)]}
+        call = {
+            "name": "lookup",
+            "args": {"aircraft_id": "a_00123"},
+            "id": f"c{step['n']}",
+        }
+        return {"messages": [AIMessage(content="", tool_calls=[call])]}
+
+    def tools(state: State) -> Dict[str, List[Any]]:
+        call_id = state.messages[-1].tool_calls[0]["id"]
+        return {"messages": [ToolMessage(content=TOOL_RESULT, tool_call_id=call_id)]}
+
+    def route(state: State) -> str:
+        return "tools" if state.messages[-1].tool_calls else "__end__"
+
+    builder = StateGraph(State, input_schema=InputState)
+    builder.add_node(call_model)
+    builder.add_node(tools)
+    builder.add_edge("__start__", "call_model")
+    builder.add_conditional_edges("call_model", route)
+    builder.add_edge("tools", "call_model")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def fill_thread(graph: Any, config: Dict[str, Any], messages: int) -> float:
+    """Run turns until the thread holds ``messages`` messages; return seconds."""
+    start = time.perf_counter()
+    for turn in range(messages // 4):
+        graph.invoke(
+            {"messages": [HumanMessage(content=f"verify step {turn}")]}, config
+        )
+    return time.perf_counter() - start
+
+
+def measure_resume(
+    path: str, saver_kwargs: Dict[str, Any], config: Dict[str, Any], repeat: int
+) -> List[float]:
+    """Time reading the latest checkpoint from a freshly opened database."""
+    timings = []
+    for _ in range(repeat):
+        saver = DeltaSQLiteSaver(path, **saver_kwargs)
+        start = time.perf_counter()
+        checkpoint = saver.get_tuple(config)
+        timings.append(time.perf_counter() - start)
+        assert checkpoint is not None
+        saver.close()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--messages", type=int, default=1000, help="Thread length in messages"
+    )
+    parser.add_argument(
+        "--keyframe-interval", type=int, default=64, help="Delta chain length"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Resume measurements per saver"
+    )
+    args = parser.parse_args()
+
+    config = {"configurable": {"thread_id": "bench"}}
+    variants = {
+        "delta": {"keyframe_interval": args.keyframe_interval},
+        "full": {"delta_channels": ()},
+    }
+
+    print(
+        f"Thread length: {args.messages} messages, keyframe interval {args.keyframe_interval}"
+    )
+    print(
+        f"{'saver':<10}{'write MB':>10}{'amplif.':>10}{'fill s':>10}{'file MB':>10}{'resume p50 ms':>16}{'resume max ms':>16}"
+    )
+
+    memory_graph = build_graph(InMemorySaver())
+    memory_fill = fill_thread(memory_graph, config, args.messages)
+    final_messages = memory_graph.get_state(config).values["messages"]
+    payload = len(InMemorySaver().serde.dumps_typed(final_messages)[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, kwargs in variants.items():
+            path = os.path.join(tmp, f"{name}.sqlite")
+            saver = DeltaSQLiteSaver(path, **kwargs)
+            fill = fill_thread(build_graph(saver), config, args.messages)
+            written = saver.bytes_written
+            saver.close()
+            resume = measure_resume(path, kwargs, config, args.repeat)
+            print(
+                f"{name:<10}{written / 1e6:>10.2f}{written / payload:>10.1f}{fill:>10.2f}"
+                f"{os.path.getsize(path) / 1e6:>10.2f}"
+                f"{statistics.median(resume) * 1e3:>16.2f}{max(resume) * 1e3:>16.2f}"
+            )
+
+    print(
+        f"{'memory':<10}{'-':>10}{'-':>10}{memory_fill:>10.2f}{'-':>10}{'-':>16}{'-':>16}"
+    )
+    print(
+        f"\nFinal message list serializes to {payload / 1e3:.1f} KB; amplification = bytes written / that size."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Data-layer microbenchmarks on synthetic fleets of 10k to 10M rows.
+
+For each size, writes a synthetic fleet (see ``fleet.py``) with the schema of
+``data/test_set_with_outputs.csv`` and a half-overlapping table with the
+schema of ``test_set_without_outputs.csv``. Then it times:
+
+- each SOP tool lookup, pointed at the fleet through ``dataset_file_path``,
+  for an aircraft in the middle of the table
+- ``merge_two_tables`` of the two tables
+- ``generate_prompt_for_aircraft_id`` on the merged table
+
+Times are the best of ``--repeat`` calls. The scaling column compares each
+size with the previous one (10 means linear in rows at 10x steps).
+
+Run from the repository root (the SOP tools load ./data on import).
+
+Usage:
+    python tests/benchmarks/data_bench.py
+    python tests/benchmarks/data_bench.py --sizes 10000 100000 1000000 10000000 --repeat 1
+    python tests/benchmarks/data_bench.py --data-dir .cache/fleets
+"""
+
+import argparse
+import asyncio
+import inspect
+import os
+import sys
+import tempfile
+import time
+import warnings
+from typing import Any, Callable, Dict, List
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+
+import pandas as pd  # noqa: E402
+from fleet import generate_fleet  # noqa: E402
+
+from common import tools  # noqa: E402
+from common.utils import generate_prompt_for_aircraft_id, merge_two_tables  # noqa: E402
+
+SOP_TOOLS = [
+    tools.VerifyAircraftClearance,
+    tools.VerifyMechanicalComponents,
+    tools.VerifyElectricalSystems,
+    tools.ReportComponentIncident,
+    tools.ReportComponentMismatch,
+    tools.CrossCheckSpecifications,
+    tools.ReportCrossCheck,
+]
+
+
+def fleet_files(rows: int, directory: str) -> Dict[str, str]:
+    """Write (or reuse) the fleet tables of one size."""
+    paths = {
+        "with_outputs": os.path.join(directory, f"fleet_{rows}_with_outputs.csv"),
+        "without_outputs": os.path.join(directory, f"fleet_{rows}_without_outputs.csv"),
+        "merged": os.path.join(directory, f"fleet_{rows}_merged.csv"),
+    }
+    if not os.path.exists(paths["with_outputs"]):
+        generate_fleet(rows, seed=rows).to_csv(paths["with_outputs"], index=False)
+    if not os.path.exists(paths["without_outputs"]):
+        generate_fleet(rows, seed=rows + 1, start=rows // 2, with_outputs=False).to_csv(
+            paths["without_outputs"], index=False
+        )
+    return paths
+
+
+def tool_args(func: Callable[..., Any], record: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments of an SOP tool, taken from one fleet record."""
+    args = {}
+    for name in inspect.signature(func).parameters:
+        value = record.get(name)
+        args[name] = value if value is not None and value == value else "success"
+    return args
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Best wall time of ``repeat`` calls, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def bench_size(rows: int, directory: str, repeat: int) -> Dict[str, float]:
+    paths = fleet_files(rows, directory)
+    # Look up an aircraft in the middle of the table
+    record = generate_fleet(rows, seed=rows).iloc[rows // 2].to_dict()
+    results: Dict[str, float] = {}
+
+    with patch.object(tools, "dataset_file_path", paths["with_outputs"]):
+        for func in SOP_TOOLS:
+            args = tool_args(func, record)
+            if inspect.iscoroutinefunction(func):
+                results[func.__name__] = best_of(
+                    repeat, lambda: asyncio.run(func(**args))
+                )
+            else:
+                results[func.__name__] = best_of(repeat, lambda: func(**args))
+
+    results["merge_two_tables"] = best_of(
+        repeat,
+        lambda: merge_two_tables(
+            paths["with_outputs"],
+            paths["without_outputs"],
+            paths["merged"],
+            on_columns=["aircraft_id"],
+        ),
+    )
+    results["generate_prompt_for_aircraft_id"] = best_of(
+        repeat,
+        lambda: generate_prompt_for_aircraft_id(record["aircraft_id"], paths["merged"]),
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Calls per timing")
+    parser.add_argument(
+        "--data-dir",
+        help="Directory to keep the generated fleets in (default: a temporary one)",
+    )
+    args = parser.parse_args()
+    # Merged tables mix missing and string values in the output columns
+    warnings.filterwarnings("ignore", category=pd.errors.DtypeWarning)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.data_dir or tmp
+        os.makedirs(directory, exist_ok=True)
+        results: Dict[int, Dict[str, float]] = {}
+        for rows in args.sizes:
+            results[rows] = bench_size(rows, directory, args.repeat)
+
+    names: List[str] = list(results[args.sizes[0]])
+    header = f"{'operation':<34}" + "".join(f"{rows:>13,}" for rows in args.sizes)
+    print(header + f"{'scaling':>10}")
+    for name in names:
+        times = [results[rows][name] for rows in args.sizes]
+        line = f"{name:<34}" + "".join(f"{ms:>11.1f}ms" for ms in times)
+        scaling = (times[-1] / times[-2]) if len(times) > 1 else 1.0
+        print(line + f"{scaling:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Synthetic fleet generator for data-layer benchmarks.
+
+Generates inspection tables with the schema of
+``data/test_set_with_outputs.csv`` (or ``test_set_without_outputs.csv``) at
+any size. Each aircraft is healthy, degraded or failed. The inputs
+(condition, battery, circuit and avionics checks, serial numbers, weights)
+and the expected outputs are drawn consistently with that profile, with the
+same value vocabulary as the bundled data and a small share of missing
+responses.
+
+Usage:
+    python tests/benchmarks/fleet.py --rows 100000 --output /tmp/fleet.csv
+    python tests/benchmarks/fleet.py --rows 100000 --without-outputs --output /tmp/inputs.csv
+"""
+
+import argparse
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+INPUT_COLUMNS = [
+    "aircraft_id",
+    "tail_number",
+    "maintenance_record_id",
+    "expected_departure_time",
+    "actual_inspection_time",
+    "inspection_location_id",
+    "component_serial_number",
+    "installed_component_serial_number",
+    "installation_time",
+    "component_weight",
+    "expected_component_weight",
+    "physical_condition_observation",
+    "battery_status",
+    "circuit_continuity_check",
+    "avionics_diagnostics_response",
+]
+
+# Column order of data/test_set_with_outputs.csv
+OUTPUT_SCHEMA = [
+    "aircraft_id",
+    "tail_number",
+    "maintenance_record_id",
+    "expected_departure_time",
+    "actual_inspection_time",
+    "aircraft_ready",
+    "inspection_location_id",
+    "component_serial_number",
+    "installed_component_serial_number",
+    "installation_time",
+    "component_weight",
+    "expected_component_weight",
+    "physical_condition_observation",
+    "mechanical_inspection_result",
+    "electrical_inspection_result",
+    "battery_status",
+    "circuit_continuity_check",
+    "avionics_diagnostics_response",
+    "component_incident_response",
+    "component_mismatch_response",
+    "cross_check_response",
+    "cross_check_reporting_response",
+]
+
+# Responses that are sometimes missing in the bundled data
+RESPONSE_COLUMNS = [
+    "component_incident_response",
+    "component_mismatch_response",
+    "cross_check_response",
+    "cross_check_reporting_response",
+]
+
+HEALTHY, DEGRADED, FAILED = 0, 1, 2
+
+# Values per profile: healthy, degraded, failed
+PROFILE_VALUES: Dict[str, List[List[str]]] = {
+    "physical_condition_observation": [
+        ["no damage"],
+        ["minor wear", "severe corrosion"],
+        ["severe corrosion", "minor wear"],
+    ],
+    "battery_status": [["operational"], ["low_charge", "critical"], ["critical"]],
+    "circuit_continuity_check": [["success"], ["retest"], ["failure"]],
+    "avionics_diagnostics_response": [["success"], ["retry"], ["failure"]],
+    "mechanical_inspection_result": [["success"], ["retest", "fail"], ["fail"]],
+    "electrical_inspection_result": [["success"], ["retest", "fail"], ["fail"]],
+}
+
+EXPECTED_WEIGHTS = np.array([70, 74, 78, 80, 82, 83, 85, 90])
+
+
+def _ids(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    return np.char.add(prefix, np.char.zfill(numbers.astype(str), width))
+
+
+def _timestamps(base: np.datetime64, hours: np.ndarray) -> np.ndarray:
+    times = base + hours.astype("timedelta64[h]")
+    return np.char.add(np.datetime_as_string(times, unit="s"), "Z")
+
+
+def _choose(
+    rng: np.random.Generator, profile: np.ndarray, values: List[List[str]]
+) -> np.ndarray:
+    result = np.empty(len(profile), dtype=object)
+    for level, choices in enumerate(values):
+        mask = profile == level
+        result[mask] = rng.choice(choices, size=int(mask.sum()))
+    return result
+
+
+def generate_fleet(
+    rows: int,
+    seed: int = 0,
+    start: int = 0,
+    with_outputs: bool = True,
+    profile_weights: tuple = (0.5, 0.2, 0.3),
+    missing_rate: float = 0.01,
+) -> pd.DataFrame:
+    """Generate ``rows`` aircraft inspection records.
+
+    Args:
+        rows: Number of aircraft (one row each, unique ``aircraft_id``)
+        seed: Random seed; equal arguments give equal tables
+        start: Number of the first aircraft, to generate overlapping tables
+        with_outputs: Include the expected outputs (``test_set_with_outputs``
+                      schema) or only the inputs (``test_set_without_outputs``)
+        profile_weights: Share of healthy, degraded and failed aircraft
+        missing_rate: Share of missing values per response column
+
+    Returns:
+        DataFrame with the columns of the matching bundled CSV
+    """
+    rng = np.random.default_rng(seed)
+    numbers = np.arange(start + 123, start + 123 + rows)
+    width = max(5, len(str(numbers[-1])))
+    profile = rng.choice(3, size=rows, p=list(profile_weights))
+    departure = rng.integers(0, 24 * 365, size=rows)
+
+    expected_weight = rng.choice(EXPECTED_WEIGHTS, size=rows)
+    deviation = np.where(
+        profile == HEALTHY,
+        rng.uniform(-1.0, 1.0, size=rows),
+        rng.uniform(1.5, 9.0, size=rows),
+    )
+    serial = numbers - 120
+    mismatch = (profile != HEALTHY) & (rng.random(rows) < 0.8)
+
+    df = pd.DataFrame(
+        {
+            "aircraft_id": _ids("a_", numbers, width),
+            "tail_number": np.char.add("N", (numbers + 12222).astype(str)),
+            "maintenance_record_id": _ids("mr_", numbers + 9887, width + 1),
+            "expected_departure_time": _timestamps(
+                np.datetime64("2025-04-18T00:00:00"), departure
+            ),
+            "actual_inspection_time": _timestamps(
+                np.datetime64("2025-04-18T00:00:00"), departure - 1
+            ),
+            "inspection_location_id": _ids("loc_", numbers, width),
+            "component_serial_number": _ids("cs_", serial, 4),
+            "installed_component_serial_number": _ids(
+                "cs_", serial + mismatch.astype(int), 4
+            ),
+            "installation_time": _timestamps(
+                np.datetime64("2025-04-17T00:00:00"),
+                departure - rng.integers(2, 48, size=rows),
+            ),
+            "component_weight": np.round(expected_weight + deviation, 1),
+            "expected_component_weight": expected_weight,
+        }
+    )
+    for column in (
+        "physical_condition_observation",
+        "battery_status",
+        "circuit_continuity_check",
+        "avionics_diagnostics_response",
+    ):
+        df[column] = _choose(rng, profile, PROFILE_VALUES[column])
+    if not with_outputs:
+        return df[INPUT_COLUMNS]
+
+    healthy = profile == HEALTHY
+    df["aircraft_ready"] = healthy
+    for column in ("mechanical_inspection_result", "electrical_inspection_result"):
+        df[column] = _choose(rng, profile, PROFILE_VALUES[column])
+    for column in RESPONSE_COLUMNS:
+        values = np.where(healthy, "success", "failed").astype(object)
+        values[rng.random(rows) < missing_rate] = None
+        df[column] = values
+    return df[OUTPUT_SCHEMA]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=int, default=0, help="First aircraft number")
+    parser.add_argument(
+        "--without-outputs",
+        action="store_true",
+        help="Only the input columns (test_set_without_outputs schema)",
+    )
+    parser.add_argument("--output", required=True, help="CSV file to write")
+    args = parser.parse_args()
+
+    df = generate_fleet(
+        args.rows, args.seed, args.start, with_outputs=not args.without_outputs
+    )
+    df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
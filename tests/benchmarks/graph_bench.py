@@ -0,0 +1,342 @@
+"""End-to-end orchestration benchmark of the ReAct graph.
+
+Drives the compiled graph with the offline ``scripted:sop`` model, which makes
+the real SOP tool calls of one aircraft verification and then writes the
+report. With the default zero model latency the measured time is the graph's
+own cost: routing, ``ToolNode``, the tools, reducers and checkpointing.
+
+Scenarios:
+    single            one run
+    concurrent_100    100 concurrent runs
+    concurrent_1000   1,000 concurrent runs
+    multiturn         10 concurrent threads of 20 turns each, checkpointed
+    deepwiki_off      100 concurrent runs, DeepWiki tools disabled
+    deepwiki_on       100 concurrent runs, DeepWiki tools loaded over MCP
+
+Each scenario runs in a fresh process, so peak RSS is not inherited from an
+earlier one. It reports throughput, run latency percentiles, peak RSS, and
+the Python allocations per run that are still live after the runs (size and
+count, from the difference of tracemalloc snapshots taken around them). The
+allocations are measured in a second, traced pass of at most
+``--trace-runs`` runs (threads), so tracing does not skew the timings.
+
+``deepwiki_on`` serves the DeepWiki tools from the local mock MCP server
+(``mock_mcp.py``) and discovers them with ``get_all_mcp_tools``, so it
+measures discovery, the session pool and binding the extra tools; the
+scripted SOP does not call them. ``--live-deepwiki`` uses the real DeepWiki
+server instead.
+
+``--save-baseline`` writes one JSON file per scenario to ``--baseline-dir``.
+``--compare`` checks the results against those files and exits with status 1
+when a metric is worse than its baseline by more than ``--threshold``.
+
+Run from the repository root (the SOP tools load ./data on import).
+
+Usage:
+    python tests/benchmarks/graph_bench.py
+    python tests/benchmarks/graph_bench.py --scenarios single concurrent_100
+    python tests/benchmarks/graph_bench.py --save-baseline
+    python tests/benchmarks/graph_bench.py --compare --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List
+from unittest.mock import patch
+
+from langchain_core.messages import HumanMessage
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_mcp import start_mock_mcp_server  # noqa: E402
+
+from common.context import Context  # noqa: E402
+from common.mcp import add_mcp_server, get_all_mcp_tools  # noqa: E402
+from react_agent.checkpoint import DeltaSQLiteSaver  # noqa: E402
+from react_agent.graph import builder, graph  # noqa: E402
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "single": {"runs": 1},
+    "concurrent_100": {"runs": 100},
+    "concurrent_1000": {"runs": 1000},
+    "multiturn": {"runs": 10, "turns": 20},
+    "deepwiki_off": {"runs": 100, "deepwiki": False},
+    "deepwiki_on": {"runs": 100, "deepwiki": True},
+}
+
+# Metrics checked against the baseline; True when higher is better
+CHECKED_METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+    "alloc_kb_per_run": False,
+    "allocs_per_run": False,
+}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Return the ``q``-th percentile (0-100) of ``samples``."""
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(q) - 1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+async def timed(coro: Awaitable[Any], latencies: List[float]) -> None:
+    start = time.perf_counter()
+    await coro
+    latencies.append(time.perf_counter() - start)
+
+
+def make_batch(
+    spec: Dict[str, Any], context: Context
+) -> Callable[[List[float]], Awaitable[Any]]:
+    """Return a coroutine function that runs the scenario once."""
+    runs = spec["runs"]
+    turns = spec.get("turns")
+
+    if turns is None:
+
+        async def batch(latencies: List[float]) -> Any:
+            return await asyncio.gather(
+                *(
+                    timed(
+                        graph.ainvoke(
+                            {"messages": [HumanMessage(content=f"verify a_{i:05d}")]},
+                            context=context,
+                        ),
+                        latencies,
+                    )
+                    for i in range(runs)
+                )
+            )
+
+        return batch
+
+    async def thread(threaded: Any, thread_id: str, latencies: List[float]) -> None:
+        config = {"configurable": {"thread_id": thread_id}}
+        for turn in range(turns):
+            await timed(
+                threaded.ainvoke(
+                    {
+                        "messages": [
+                            HumanMessage(content=f"turn {turn}: verify a_00127")
+                        ]
+                    },
+                    config,
+                    context=context,
+                ),
+                latencies,
+            )
+
+    async def multiturn(latencies: List[float]) -> Any:
+        with tempfile.TemporaryDirectory() as directory:
+            saver = DeltaSQLiteSaver(os.path.join(directory, "threads.sqlite"))
+            threaded = builder.compile(checkpointer=saver)
+            await asyncio.gather(
+                *(thread(threaded, f"t{i}", latencies) for i in range(runs))
+            )
+
+    return multiturn
+
+
+async def measure(spec: Dict[str, Any], trace_runs: int) -> Dict[str, float]:
+    context = Context(
+        model="scripted:sop",
+        enable_deepwiki=spec.get("deepwiki", False),
+        enable_metrics=False,
+    )
+    batch = make_batch(spec, context)
+    runs = spec["runs"] * spec.get("turns", 1)
+
+    # Warm up imports, tool loading and model construction
+    await make_batch({**spec, "runs": 1, "turns": spec.get("turns") and 1}, context)([])
+
+    latencies: List[float] = []
+    gc.collect()
+    start = time.perf_counter()
+    await batch(latencies)
+    elapsed = time.perf_counter() - start
+    rss = peak_rss_mb()
+
+    traced = {**spec, "runs": min(spec["runs"], trace_runs)}
+    traced_runs = traced["runs"] * spec.get("turns", 1)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await make_batch(traced, context)([])
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+
+    latencies_ms = sorted(latency * 1e3 for latency in latencies)
+    return {
+        "runs": runs,
+        "wall_s": elapsed,
+        "throughput_rps": runs / elapsed,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "peak_rss_mb": rss,
+        "alloc_kb_per_run": sum(stat.size_diff for stat in diff) / traced_runs / 1e3,
+        "allocs_per_run": sum(stat.count_diff for stat in diff) / traced_runs,
+    }
+
+
+def run_scenario(
+    name: str, live_deepwiki: bool, latency: float, trace_runs: int
+) -> Dict[str, float]:
+    """Run one scenario; called in a fresh worker process."""
+    os.environ["SCRIPTED_LATENCY"] = str(latency)
+    spec = SCENARIOS[name]
+    if live_deepwiki or not spec.get("deepwiki"):
+        return asyncio.run(measure(spec, trace_runs))
+
+    mock = start_mock_mcp_server()
+    add_mcp_server("deepwiki", {"url": mock.url, "transport": "streamable_http"})
+    try:
+        # DeepWiki is the only configured server, now served by the mock
+        with patch("common.tools.get_deepwiki_tools", get_all_mcp_tools):
+            return asyncio.run(measure(spec, trace_runs))
+    finally:
+        mock.stop()
+
+
+def compare(
+    name: str, result: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> List[str]:
+    """Return a description of every metric that regressed beyond ``threshold``."""
+    regressions = []
+    for metric, higher_is_better in CHECKED_METRICS.items():
+        old, new = baseline.get(metric), result[metric]
+        if not old:
+            continue
+        # Retained allocations may be negative, so scale by the magnitude
+        change = (old - new if higher_is_better else new - old) / abs(old)
+        if change > threshold:
+            regressions.append(
+                f"{name}.{metric}: {old:.2f} -> {new:.2f} ({change:+.0%} worse)"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Simulated model latency (s)"
+    )
+    parser.add_argument(
+        "--trace-runs",
+        type=int,
+        default=100,
+        help="Runs (threads) of the traced pass that measures allocations",
+    )
+    parser.add_argument(
+        "--live-deepwiki",
+        action="store_true",
+        help="Load the real DeepWiki MCP tools (needs network)",
+    )
+    parser.add_argument(
+        "--baseline-dir",
+        default=os.path.join("tests", "benchmarks", "baselines"),
+        help="Directory of the per-scenario baseline JSON files",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write results as the baseline"
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="Fail on regressions vs the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative regression per metric (default 0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'scenario':<17}{'runs':>6}{'runs/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'RSS MB':>9}{'alloc KB/run':>14}{'allocs/run':>12}"
+    )
+    results = {}
+    spawn = multiprocessing.get_context("spawn")
+    for name in args.scenarios:
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            r = results[name] = pool.submit(
+                run_scenario, name, args.live_deepwiki, args.latency, args.trace_runs
+            ).result()
+        print(
+            f"{name:<17}{r['runs']:>6.0f}{r['throughput_rps']:>9.1f}{r['p50_ms']:>9.1f}"
+            f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['peak_rss_mb']:>9.1f}"
+            f"{r['alloc_kb_per_run']:>14.1f}{r['allocs_per_run']:>12.0f}"
+        )
+
+    meta = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "latency": args.latency,
+        "live_deepwiki": args.live_deepwiki,
+        "trace_runs": args.trace_runs,
+    }
+    if args.save_baseline:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        for name, result in results.items():
+            path = os.path.join(args.baseline_dir, f"{name}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"scenario": name, "meta": meta, "metrics": result}, f, indent=2
+                )
+        print(f"\nSaved baselines to {args.baseline_dir}")
+
+    if args.compare:
+        regressions = []
+        for name, result in results.items():
+            path = os.path.join(args.baseline_dir, f"{name}.json")
+            if not os.path.exists(path):
+                print(f"No baseline for {name} at {path}")
+                continue
+            with open(path, encoding="utf-8") as f:
+                baseline = json.load(f)["metrics"]
+            regressions.extend(compare(name, result, baseline, args.threshold))
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
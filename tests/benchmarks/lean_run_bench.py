@@ -0,0 +1,158 @@
+"""Memory benchmark of the full and lean run modes under concurrency.
+
+Runs N concurrent verifications through the real graph with a fake model
+that issues one SOP tool call per step (with simulated latency, so all runs
+are in flight together) and then writes the final report. Reports the peak
+Python heap while the runs are in flight and the serialized size of the
+returned outputs.
+
+Run from the repository root (the SOP tools load ./data on import).
+
+Usage:
+    python tests/benchmarks/lean_run_bench.py
+    python tests/benchmarks/lean_run_bench.py --runs 1000 --steps 8
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, List, Optional
+from unittest.mock import patch
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+
+from common.context import Context  # noqa: E402
+from react_agent.graph import graph  # noqa: E402
+
+# Realistic size of an SOP tool result (one CSV row rendered as text)
+TOOL_RESULT = "aircraft_id=a_00123, status=ok, inspector=QA-7, " * 8
+REPORT = "<final_response>" + "<action : success>" * 10 + "</final_response>"
+
+
+@tool
+def inspect(aircraft_id: str, step: int) -> str:
+    """Run one SOP inspection step."""
+    return TOOL_RESULT
+
+
+class BenchModel(BaseChatModel):
+    """Fake model: one tool call per step, then the final report."""
+
+    steps: int = 6
+    latency: float = 0.05
+
+    @property
+    def _llm_type(self) -> str:
+        return "bench-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "BenchModel":
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        done = sum(isinstance(m, ToolMessage) for m in messages)
+        done += sum(
+            m.content.count("\n- inspect(") for m in messages if m.type == "system"
+        )
+        if done < self.steps:
+            call = {
+                "name": "inspect",
+                "args": {"aircraft_id": "a_00123", "step": done},
+                "id": f"call_{done}",
+            }
+            message = AIMessage(
+                content="Running the next SOP step. " * 10, tool_calls=[call]
+            )
+        else:
+            message = AIMessage(content=REPORT)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+async def run_batch(runs: int, steps: int, run_mode: str) -> dict:
+    model = BenchModel(steps=steps)
+    context = Context(run_mode=run_mode)
+    serde = JsonPlusSerializer()
+    with (
+        patch("react_agent.graph.load_chat_model", return_value=model),
+        patch("react_agent.graph.get_tools", return_value=[inspect]),
+    ):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        outputs = await asyncio.gather(
+            *(
+                graph.ainvoke(
+                    {"messages": [HumanMessage(content=f"verify a_{i:05d}")]},
+                    context=context,
+                )
+                for i in range(runs)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "peak_mb": peak / 1e6,
+        "output_kb": sum(len(serde.dumps_typed(o)[1]) for o in outputs) / runs / 1e3,
+        "messages": sum(len(o["messages"]) for o in outputs) / runs,
+        "seconds": elapsed,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=1000, help="Concurrent runs")
+    parser.add_argument("--steps", type=int, default=6, help="Tool calls per run")
+    args = parser.parse_args()
+
+    print(f"{args.runs} concurrent runs, {args.steps} tool calls each")
+    print(
+        f"{'mode':<6}{'peak heap MB':>14}{'output KB/run':>15}{'messages/run':>14}{'wall s':>9}"
+    )
+    # Warm up both modes so one-time allocations are not charged to either
+    for mode in ("full", "lean"):
+        await run_batch(10, args.steps, mode)
+    results = {}
+    for mode in ("full", "lean"):
+        results[mode] = r = await run_batch(args.runs, args.steps, mode)
+        print(
+            f"{mode:<6}{r['peak_mb']:>14.1f}{r['output_kb']:>15.2f}{r['messages']:>14.0f}{r['seconds']:>9.2f}"
+        )
+    saved = 1 - results["lean"]["peak_mb"] / results["full"]["peak_mb"]
+    print(f"\nLean mode peak heap reduction: {saved:.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""Per-call overhead of MCP tool calls: per-call sessions, pooled, cached.
+
+Calls one DeepWiki tool of the local mock MCP server (``mock_mcp.py``) with
+three setups:
+
+- ``per-call session``: tools of ``MultiServerMCPClient.get_tools``, which
+  open a new session (HTTP connection and MCP handshake) for every call, as
+  ``common.mcp`` did before the session pool
+- ``pooled``: tools of ``common.mcp.get_mcp_tools``, with the result cache off
+- ``pooled + cached``: the same, with the result cache on; the repeated
+  call is answered from memory after the first
+
+With the default zero server latency the times are pure client, transport
+and server framework overhead.
+
+Usage:
+    python tests/benchmarks/mcp_bench.py
+    python tests/benchmarks/mcp_bench.py --tool read_wiki_contents --payload-kb 256
+    python tests/benchmarks/mcp_bench.py --calls 50 --concurrency 8 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_mcp import MockMCPSettings, start_mock_mcp_server  # noqa: E402
+
+from common.mcp import (  # noqa: E402
+    add_mcp_server,
+    clear_mcp_cache,
+    get_mcp_tools,
+    get_session_pool,
+)
+from common.mcp_cache import MCPResultCache, configure_result_cache  # noqa: E402
+
+SERVER = "deepwiki_mock"
+
+
+def tool_arguments(tool: str) -> Dict[str, Any]:
+    arguments: Dict[str, Any] = {"repoName": "langchain-ai/langgraph"}
+    if tool == "ask_question":
+        arguments["question"] = "How do I add a checkpointer?"
+    return arguments
+
+
+async def time_calls(
+    tool: Any, arguments: Dict[str, Any], calls: int, concurrency: int
+) -> List[float]:
+    """Return the latency of each call, in milliseconds."""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await tool.ainvoke(arguments)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(call() for _ in range(calls)))
+    return latencies
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--tool",
+        default="ask_question",
+        choices=("ask_question", "read_wiki_structure", "read_wiki_contents"),
+    )
+    parser.add_argument("--calls", type=int, default=200, help="Calls per setup")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Server seconds")
+    parser.add_argument("--payload-kb", type=float, default=64.0)
+    args = parser.parse_args()
+
+    # Time the transport, not the output shaping
+    os.environ["MCP_OUTPUT_MAX_TOKENS"] = "0"
+    mock = start_mock_mcp_server(
+        settings=MockMCPSettings(latency=args.latency, payload_kb=args.payload_kb)
+    )
+    connection = {"url": mock.url, "transport": "streamable_http"}
+    add_mcp_server(SERVER, connection)
+    arguments = tool_arguments(args.tool)
+
+    client = MultiServerMCPClient({SERVER: connection})
+    unpooled = {t.name: t for t in await client.get_tools(server_name=SERVER)}
+    pooled = {t.name: t for t in await get_mcp_tools(SERVER)}
+
+    setups = [
+        ("per-call session", unpooled[args.tool], None),
+        ("pooled", pooled[args.tool], MCPResultCache(ttls={args.tool: 0})),
+        ("pooled + cached", pooled[args.tool], MCPResultCache()),
+    ]
+    print(
+        f"{args.calls} calls of {args.tool}, concurrency {args.concurrency}, "
+        f"server latency {args.latency * 1000:.0f} ms"
+    )
+    print(f"{'setup':<18} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'calls/s':>8}")
+    baseline = None
+    for name, tool, cache in setups:
+        configure_result_cache(cache)
+        # Warm up: connect, and fill the pool and cache
+        await time_calls(tool, arguments, args.concurrency, args.concurrency)
+        start = time.perf_counter()
+        latencies = await time_calls(tool, arguments, args.calls, args.concurrency)
+        elapsed = time.perf_counter() - start
+        mean = statistics.mean(latencies)
+        baseline = baseline or mean
+        print(
+            f"{name:<18} {mean:>8.2f} {percentile(latencies, 0.5):>8.2f} "
+            f"{percentile(latencies, 0.95):>8.2f} {args.calls / elapsed:>8.0f}"
+            f"  ({mean / baseline:.0%} of per-call session)"
+        )
+
+    await get_session_pool().close()
+    configure_result_cache(None)
+    clear_mcp_cache()
+    mock.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
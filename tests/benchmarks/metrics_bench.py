@@ -0,0 +1,138 @@
+"""Overhead of the latency instrumentation per graph step.
+
+Runs the real graph with a zero-latency fake model and tool, so the measured
+time is pure framework and instrumentation cost, with ``enable_metrics`` off
+and on. Also times a bare histogram observation.
+
+Run from the repository root (the SOP tools load ./data on import).
+
+Usage:
+    python tests/benchmarks/metrics_bench.py
+    python tests/benchmarks/metrics_bench.py --runs 500 --steps 6
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import timeit
+from typing import Any, List, Optional
+from unittest.mock import patch
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+
+from common.context import Context  # noqa: E402
+from common.metrics import Histogram  # noqa: E402
+from react_agent.graph import graph  # noqa: E402
+
+
+@tool
+def inspect(aircraft_id: str, step: int) -> str:
+    """Run one SOP inspection step."""
+    return "success"
+
+
+class InstantModel(BaseChatModel):
+    """Fake model: one tool call per step, then the final report."""
+
+    steps: int = 6
+
+    @property
+    def _llm_type(self) -> str:
+        return "instant-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "InstantModel":
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        done = sum(isinstance(m, ToolMessage) for m in messages)
+        if done < self.steps:
+            call = {
+                "name": "inspect",
+                "args": {"aircraft_id": "a_00123", "step": done},
+                "id": f"call_{done}",
+            }
+            message = AIMessage(content="", tool_calls=[call])
+        else:
+            message = AIMessage(content="<final_response>ok</final_response>")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+async def time_runs(runs: int, steps: int, enable_metrics: bool) -> float:
+    """Return the mean wall time per graph step, in microseconds."""
+    context = Context(enable_metrics=enable_metrics)
+    start = time.perf_counter()
+    for i in range(runs):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=f"verify a_{i:05d}")]}, context=context
+        )
+    # Each run executes call_model steps + 1 times and tools steps times
+    return (time.perf_counter() - start) / (runs * (2 * steps + 1)) * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--runs", type=int, default=200, help="Sequential runs per measurement"
+    )
+    parser.add_argument("--steps", type=int, default=6, help="Tool calls per run")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Measurements per setting"
+    )
+    args = parser.parse_args()
+
+    histogram = Histogram("bench_seconds", "Bench.", ("node",))
+    observe_ns = (
+        min(
+            timeit.repeat(
+                lambda: histogram.observe(0.2, "call_model"), number=100000, repeat=5
+            )
+        )
+        / 100000
+        * 1e9
+    )
+    print(f"Histogram.observe: {observe_ns:.0f} ns")
+
+    with (
+        patch(
+            "react_agent.graph.load_chat_model",
+            return_value=InstantModel(steps=args.steps),
+        ),
+        patch("react_agent.graph.get_tools", return_value=[inspect]),
+    ):
+        await time_runs(10, args.steps, True)
+        results = {False: [], True: []}
+        # Interleave settings so drift affects both equally
+        for _ in range(args.repeat):
+            for enabled in (False, True):
+                results[enabled].append(await time_runs(args.runs, args.steps, enabled))
+
+    off = statistics.median(results[False])
+    on = statistics.median(results[True])
+    print(f"Per step, metrics off: {off:.1f} us")
+    print(f"Per step, metrics on:  {on:.1f} us")
+    print(f"Overhead per step:     {on - off:.1f} us ({(on - off) / off:.1%})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
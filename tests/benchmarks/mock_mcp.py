@@ -0,0 +1,167 @@
+"""Local DeepWiki-like MCP server for offline tests and benchmarks.
+
+Serves DeepWiki's tools over streamable HTTP: ``read_wiki_structure``,
+``read_wiki_contents`` and ``ask_question``. Wiki contents are Markdown pages
+of ``--payload-kb`` kilobytes in total, and answers echo the question.
+
+``--latency`` delays every tool call. ``--error-rate`` answers that share of
+calls with a tool error, and ``fail_next`` (tests only) fails the next calls.
+Register the server with the agent with:
+
+    add_mcp_server("deepwiki", {"url": "http://127.0.0.1:8766/mcp",
+                                "transport": "streamable_http"})
+
+Usage:
+    python tests/benchmarks/mock_mcp.py --port 8766
+    python tests/benchmarks/mock_mcp.py --port 8766 --latency 0.2 --payload-kb 512
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import uvicorn
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+
+# Wiki pages served by read_wiki_contents, in order
+WIKI_TOPICS = ("Overview", "Graphs", "Checkpointer", "Streaming")
+
+
+@dataclass
+class MockMCPSettings:
+    """Behaviour of the mock server; may be changed while it runs."""
+
+    latency: float = 0.0
+    payload_kb: float = 64.0
+    error_rate: float = 0.0
+    fail_next: int = 0
+
+
+@dataclass
+class MockMCPServer:
+    """A running mock server, its settings and what it has seen."""
+
+    url: str
+    settings: MockMCPSettings
+    # Server-side session of each tool call, in call order
+    sessions: List[int] = field(default_factory=list)
+    calls: Counter = field(default_factory=Counter)
+    _server: Optional[uvicorn.Server] = None
+    _thread: Optional[threading.Thread] = None
+
+    def reset(self) -> None:
+        """Restore the default settings and forget the recorded calls."""
+        self.settings = MockMCPSettings()
+        self.sessions.clear()
+        self.calls.clear()
+
+    def stop(self) -> None:
+        """Shut the server down."""
+        if self._server is not None and self._thread is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+
+def wiki_contents(repo_name: str, payload_kb: float) -> str:
+    """Markdown pages about a repository, ``payload_kb`` kilobytes in total."""
+    page_chars = max(int(payload_kb * 1024 / len(WIKI_TOPICS)), 1)
+    pages = []
+    for topic in WIKI_TOPICS:
+        sentence = f"How {repo_name} handles {topic}. "
+        body = sentence * max(page_chars // len(sentence), 1)
+        pages.append(f"# Page: {topic}\n\n{body}")
+    return "\n\n".join(pages)
+
+
+def build_server(mock: MockMCPServer) -> FastMCP:
+    """Create the MCP server; tool calls are recorded on ``mock``."""
+    server = FastMCP("deepwiki-mock", log_level="WARNING")
+
+    async def handle(tool: str, ctx: Context) -> None:
+        settings = mock.settings
+        mock.sessions.append(id(ctx.session))
+        mock.calls[tool] += 1
+        if settings.latency:
+            await asyncio.sleep(settings.latency)
+        if settings.fail_next > 0:
+            settings.fail_next -= 1
+            raise ToolError(f"Injected failure of {tool}")
+        if settings.error_rate and random.random() < settings.error_rate:
+            raise ToolError(f"Injected random failure of {tool}")
+
+    @server.tool()
+    async def read_wiki_structure(repoName: str, ctx: Context) -> str:
+        """Get a list of documentation topics for a GitHub repository."""
+        await handle("read_wiki_structure", ctx)
+        return "\n".join(f"- {topic}" for topic in WIKI_TOPICS)
+
+    @server.tool()
+    async def read_wiki_contents(repoName: str, ctx: Context) -> str:
+        """View documentation about a GitHub repository."""
+        await handle("read_wiki_contents", ctx)
+        return wiki_contents(repoName, mock.settings.payload_kb)
+
+    @server.tool()
+    async def ask_question(repoName: str, question: str, ctx: Context) -> str:
+        """Ask any question about a GitHub repository."""
+        await handle("ask_question", ctx)
+        return f"{repoName}: {question}"
+
+    return server
+
+
+def start_mock_mcp_server(
+    port: int = 0,
+    settings: Optional[MockMCPSettings] = None,
+    host: str = "127.0.0.1",
+) -> MockMCPServer:
+    """Serve the mock server from a daemon thread; port 0 picks a free port."""
+    mock = MockMCPServer(url="", settings=settings or MockMCPSettings())
+    config = uvicorn.Config(
+        build_server(mock).streamable_http_app(),
+        host=host,
+        port=port,
+        log_level="warning",
+    )
+    mock._server = uvicorn.Server(config)
+    mock._thread = threading.Thread(target=mock._server.run, daemon=True)
+    mock._thread.start()
+    while not mock._server.started:
+        time.sleep(0.01)
+    bound_port = mock._server.servers[0].sockets[0].getsockname()[1]
+    mock.url = f"http://{host}:{bound_port}/mcp"
+    return mock
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--payload-kb", type=float, default=64.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock = start_mock_mcp_server(
+        args.port,
+        MockMCPSettings(args.latency, args.payload_kb, args.error_rate),
+        args.host,
+    )
+    print(f"Serving on {mock.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Local OpenAI-compatible chat completions endpoint for load tests.
+
+Serves ``POST /v1/chat/completions`` (plain and streamed) and
+``GET /v1/models``. Answers replay a script of the offline scripted model
+(see ``common.models.scripted``; the ``sop`` script by default), so a real
+``ChatQwen`` or ``ChatSiliconFlow`` client runs a full SOP verification
+against it. Point them at the endpoint with:
+
+    DASHSCOPE_API_BASE=http://127.0.0.1:8765/v1
+    SILICONFLOW_BASE_URL=http://127.0.0.1:8765/v1
+
+``--latency`` delays the first token, ``--token-delay`` spaces streamed
+tokens, and ``--error-rate`` answers that share of requests with HTTP 500.
+
+Usage:
+    python tests/benchmarks/mock_openai.py --port 8765
+    python tests/benchmarks/mock_openai.py --port 8765 --latency 0.5 --error-rate 0.01
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+
+from common.models.scripted import ScriptedChatModel, create_scripted_model  # noqa: E402
+
+
+def to_messages(messages: List[Dict[str, Any]]) -> List[BaseMessage]:
+    """Convert OpenAI chat messages to the messages the script reads."""
+    converted: List[BaseMessage] = []
+    for message in messages:
+        role = message.get("role")
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = "".join(
+                part.get("text", "") for part in content if isinstance(part, dict)
+            )
+        if role == "system":
+            converted.append(SystemMessage(content=content))
+        elif role == "user":
+            converted.append(HumanMessage(content=content))
+        elif role == "tool":
+            converted.append(
+                ToolMessage(
+                    content=content, tool_call_id=message.get("tool_call_id", "")
+                )
+            )
+        else:
+            converted.append(AIMessage(content=content))
+    return converted
+
+
+def openai_tool_calls(message: AIMessage) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": call["id"],
+            "type": "function",
+            "function": {
+                "name": call["name"],
+                "arguments": json.dumps(call["args"], ensure_ascii=False),
+            },
+        }
+        for call in message.tool_calls
+    ]
+
+
+def openai_usage(message: AIMessage) -> Dict[str, int]:
+    usage = message.usage_metadata or {}
+    return {
+        "prompt_tokens": usage.get("input_tokens", 0),
+        "completion_tokens": usage.get("output_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0),
+    }
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """HTTP server holding the script and failure settings."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        model: ScriptedChatModel,
+        error_rate: float = 0.0,
+    ) -> None:
+        super().__init__(address, MockOpenAIHandler)
+        self.model = model
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def count(self, error: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    server: MockOpenAIServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": [{"id": self.server.model.script_name, "object": "model"}],
+                },
+            )
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        if random.random() < self.server.error_rate:
+            self.server.count(error=True)
+            self._send_json(
+                500, {"error": {"message": "injected failure", "type": "server_error"}}
+            )
+            return
+        self.server.count(error=False)
+
+        messages = to_messages(request.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model_name = request.get("model", self.server.model.script_name)
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self._stream(messages, completion_id, model_name, bool(include_usage))
+            return
+
+        message = self.server.model.invoke(messages)
+        self._send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model_name,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": message.content or None,
+                            **(
+                                {"tool_calls": openai_tool_calls(message)}
+                                if message.tool_calls
+                                else {}
+                            ),
+                        },
+                        "finish_reason": "tool_calls" if message.tool_calls else "stop",
+                    }
+                ],
+                "usage": openai_usage(message),
+            },
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        completion_id: str,
+        model_name: str,
+        include_usage: bool,
+    ) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: Dict[str, Any], finish: Optional[str] = None) -> None:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model_name,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        final: Optional[Any] = None
+        for chunk in self.server.model.stream(messages):
+            final = chunk if final is None else final + chunk
+            if chunk.content:
+                event({"content": chunk.content})
+        message = AIMessage(
+            content=final.content if final else "",
+            tool_calls=final.tool_calls if final else [],
+            usage_metadata=final.usage_metadata if final else None,
+        )
+        if message.tool_calls:
+            event(
+                {
+                    "tool_calls": [
+                        {"index": i, **call}
+                        for i, call in enumerate(openai_tool_calls(message))
+                    ]
+                }
+            )
+        event({}, "tool_calls" if message.tool_calls else "stop")
+        if include_usage:
+            usage = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model_name,
+                "choices": [],
+                "usage": openai_usage(message),
+            }
+            self.wfile.write(f"data: {json.dumps(usage)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_mock_server(
+    port: int = 0,
+    script: str = "sop",
+    latency: float = 0.0,
+    token_delay: float = 0.0,
+    error_rate: float = 0.0,
+    host: str = "127.0.0.1",
+) -> MockOpenAIServer:
+    """Serve the mock endpoint from a daemon thread; port 0 picks a free port."""
+    model = create_scripted_model(script, latency=latency, token_delay=token_delay)
+    server = MockOpenAIServer((host, port), model, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server: MockOpenAIServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--script", default="sop", help="Scripted model script")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_mock_server(
+        args.port,
+        args.script,
+        args.latency,
+        args.token_delay,
+        args.error_rate,
+        args.host,
+    )
+    url = base_url(server)
+    print(f"Serving on {url}")
+    print(f"  DASHSCOPE_API_BASE={url}\n  SILICONFLOW_BASE_URL={url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Sampling profile of one end-to-end SOP verification, with a flamegraph.
+
+Runs the SOP verification of one aircraft with the offline scripted model.
+The script is built from the aircraft's row of
+``data/test_set_with_outputs.csv``, so the tool calls hit real records. A
+background thread samples the Python stacks of all threads every
+``--interval`` seconds across three phases:
+
+    import    importing the agent (``common``, ``react_agent.graph``), which
+              also merges the bundled CSVs and compiles the module graph
+    compile   one more ``builder.compile()``
+    run       ``--runs`` sequential ``graph.ainvoke`` calls
+
+Within each phase, samples are split by the frames on their stack into
+pandas I/O, schema conversion (tool schemas built from function signatures),
+reducers, model, tools and other work; import samples by the package being
+imported. Idle threads (waiting on a lock,
+queue or selector) are not counted, and threads working in parallel each
+count, so sampled time can exceed wall time.
+
+Writes ``<aircraft>.folded`` (collapsed stacks, for speedscope or
+flamegraph.pl) and ``<aircraft>.svg`` (a flamegraph; hover for times) to
+``--output-dir`` and prints the time split.
+
+Run from the repository root (the SOP tools load ./data on import).
+
+Usage:
+    python tests/benchmarks/profile_graph.py
+    python tests/benchmarks/profile_graph.py --aircraft-id a_00123 --runs 5
+    python tests/benchmarks/profile_graph.py --interval 0.0005 --output-dir /tmp/profiles
+"""
+
+import argparse
+import asyncio
+import collections
+import html
+import importlib
+import os
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+# Categories of run-phase samples: the first one with a matching frame wins.
+# Patterns match "<path>:<function>" of each frame.
+CATEGORIES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("pandas I/O", ("pandas/io/",)),
+    (
+        "schema conversion",
+        (
+            "langchain_core/utils/function_calling.py",
+            "langchain_core/utils/pydantic.py",
+            "langchain_core/tools/base.py:create_schema_from_function",
+            "langchain_core/tools/structured.py:from_function",
+            "pydantic/json_schema.py",
+            "pydantic/_internal/_generate_schema.py",
+            "pydantic/_internal/_model_construction.py",
+        ),
+    ),
+    (
+        "reducers",
+        (
+            "langgraph/graph/message.py",
+            "langgraph/channels/binop.py",
+            "react_agent/state.py",
+            "common/models/usage.py:merge_usage",
+        ),
+    ),
+    ("model", ("common/models/", "langchain_core/language_models/")),
+    ("tools", ("common/tools.py", "langgraph/prebuilt/tool_node.py")),
+]
+
+# Packages of this repository, whose imports are split by dependency
+OWN_PACKAGES = ("common/", "react_agent/", "tests/")
+
+# Leaf frames of threads that are waiting, not working
+IDLE_FRAMES = (
+    "threading.py:wait",
+    "selectors.py:select",
+    "queue.py:get",
+    "concurrent/futures/thread.py:_worker",
+)
+
+
+def frame_label(filename: str, function: str) -> str:
+    """Shorten a frame to ``<package path>:<function>``."""
+    if filename.startswith(ROOT_DIR):
+        filename = os.path.relpath(filename, os.path.join(ROOT_DIR, "src"))
+        filename = filename.removeprefix("../")
+        return f"{filename}:{function}"
+    for marker in ("site-packages/", "/src/", "/lib/python"):
+        index = filename.rfind(marker)
+        if index != -1:
+            filename = filename[index + len(marker) :]
+            if marker == "/lib/python":
+                filename = filename.split("/", 1)[-1]
+            break
+    return f"{filename}:{function}"
+
+
+class StackSampler:
+    """Sample the stacks of all other threads from a background thread.
+
+    Each sample is weighted by the wall time since the previous one, so the
+    totals are in seconds even when the sampler is delayed by the GIL.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.phase: Optional[str] = None
+        self.stacks: Dict[Tuple[str, Tuple[str, ...]], float] = collections.Counter()
+        self.wall: Dict[str, float] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self) -> None:
+        self._switch_interval = sys.getswitchinterval()
+        # Let the sampler take the GIL about as often as it wants to sample
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def mark(self, phase: Optional[str]) -> None:
+        """Attribute the following samples to ``phase`` (None pauses)."""
+        self.phase = phase
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            phase = self.phase
+            if phase is None:
+                continue
+            self.wall[phase] += weight
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(frame_label(code.co_filename, code.co_name))
+                    frame = frame.f_back
+                if stack and stack[0].endswith(IDLE_FRAMES):
+                    continue
+                self.stacks[(phase, tuple(reversed(stack)))] += weight
+
+
+def categorize(phase: str, stack: Tuple[str, ...]) -> str:
+    """Name the kind of work a sample was doing."""
+    if phase == "import" and not any("pandas/io/" in frame for frame in stack):
+        # Attribute to the dependency that the agent's own modules import
+        for frame in stack:
+            path = frame.rsplit(":", 1)[0]
+            if frame.endswith(":<module>") and not path.startswith(OWN_PACKAGES):
+                return f"import {path.split('/')[0].removesuffix('.py')}"
+        return "import agent modules"
+    for category, patterns in CATEGORIES:
+        if any(pattern in frame for frame in stack for pattern in patterns):
+            return category
+    return "other"
+
+
+def render_flamegraph(
+    stacks: Dict[Tuple[str, ...], float], title: str, width: int = 1200
+) -> str:
+    """Render collapsed stacks as an SVG flamegraph (root at the bottom)."""
+    root: Dict[str, Any] = {"weight": 0.0, "children": {}}
+    for stack, weight in stacks.items():
+        root["weight"] += weight
+        node = root
+        for frame in stack:
+            node = node["children"].setdefault(frame, {"weight": 0.0, "children": {}})
+            node["weight"] += weight
+
+    def depth(node: Dict[str, Any]) -> int:
+        return 1 + max((depth(c) for c in node["children"].values()), default=0)
+
+    row, top = 16, 36
+    height = top + depth(root) * row + 8
+    total = root["weight"] or 1.0
+    scale = (width - 20) / total
+    rects: List[str] = []
+
+    def draw(name: str, node: Dict[str, Any], x: float, level: int) -> None:
+        w = node["weight"] * scale
+        if w < 0.3:
+            return
+        y = height - 8 - (level + 1) * row
+        hue = zlib.crc32(name.split(":")[0].encode()) % 40
+        label = html.escape(name)
+        tip = f"{label} ({node['weight'] * 1e3:.1f} ms, {node['weight'] / total:.1%})"
+        text = label[: int(w / 7)] if w > 21 else ""
+        rects.append(
+            f'<g><title>{tip}</title><rect x="{x:.1f}" y="{y}" width="{w:.1f}" '
+            f'height="{row - 1}" fill="hsl({hue + 5},85%,{55 + hue // 4}%)"/>'
+            f'<text x="{x + 3:.1f}" y="{y + 11}">{text}</text></g>'
+        )
+        for child_name, child in sorted(node["children"].items()):
+            draw(child_name, child, x, level + 1)
+            x += child["weight"] * scale
+
+    x = 10.0
+    for name, child in sorted(root["children"].items()):
+        draw(name, child, x, 0)
+        x += child["weight"] * scale
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        'font-family="monospace" font-size="11">'
+        f'<rect width="100%" height="100%" fill="#fafafa"/>'
+        f'<text x="10" y="22" font-size="15">{html.escape(title)}</text>'
+        + "".join(rects)
+        + "</svg>"
+    )
+
+
+def load_record(aircraft_id: str) -> Dict[str, Any]:
+    """Read the aircraft's row of the bundled dataset."""
+    import pandas as pd
+
+    df = pd.read_csv("./data/test_set_with_outputs.csv")
+    rows = df[df["aircraft_id"] == aircraft_id]
+    if rows.empty:
+        raise SystemExit(f"Unknown aircraft {aircraft_id!r} in the dataset")
+    record = rows.iloc[0].to_dict()
+    return {k: v for k, v in record.items() if v == v}
+
+
+async def run(graph: Any, context: Any, aircraft_id: str, runs: int) -> None:
+    from langchain_core.messages import HumanMessage
+
+    for _ in range(runs):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=f"verify {aircraft_id}")]},
+            context=context,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--aircraft-id", default="a_00127")
+    parser.add_argument("--runs", type=int, default=1, help="Sequential runs")
+    parser.add_argument(
+        "--interval", type=float, default=0.001, help="Sampling interval (s)"
+    )
+    parser.add_argument("--output-dir", default="profiles")
+    parser.add_argument(
+        "--top", type=int, default=10, help="Rows of the time split per phase"
+    )
+    args = parser.parse_args()
+
+    sampler = StackSampler(args.interval)
+    sampler.start()
+
+    sampler.mark("import")
+    graph_module = importlib.import_module("react_agent.graph")
+    from common.context import Context
+    from common.models import register_script, sop_script
+
+    sampler.mark(None)
+    script = f"sop_{args.aircraft_id}"
+    register_script(script, sop_script(load_record(args.aircraft_id)))
+    context = Context(model=f"scripted:{script}", enable_metrics=False)
+
+    sampler.mark("compile")
+    graph_module.builder.compile()
+
+    sampler.mark("run")
+    asyncio.run(run(graph_module.graph, context, args.aircraft_id, args.runs))
+    sampler.mark(None)
+    sampler.stop()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    base = os.path.join(args.output_dir, args.aircraft_id)
+    with open(f"{base}.folded", "w", encoding="utf-8") as f:
+        for (phase, stack), weight in sorted(sampler.stacks.items()):
+            f.write(f"{';'.join((phase, *stack))} {round(weight * 1e6)}\n")
+    stacks = {(phase, *stack): w for (phase, stack), w in sampler.stacks.items()}
+    with open(f"{base}.svg", "w", encoding="utf-8") as f:
+        f.write(
+            render_flamegraph(
+                stacks, f"SOP verification of {args.aircraft_id}, {args.runs} run(s)"
+            )
+        )
+
+    split: Dict[str, Dict[str, float]] = collections.defaultdict(collections.Counter)
+    for (phase, stack), weight in sampler.stacks.items():
+        split[phase][categorize(phase, stack)] += weight
+    busy = sum(sum(categories.values()) for categories in split.values()) or 1.0
+    print(f"{'phase / work':<22}{'wall ms':>9}{'sampled ms':>12}{'share':>8}")
+    for phase in ("import", "compile", "run"):
+        categories = split[phase]
+        sampled = sum(categories.values())
+        print(
+            f"{phase:<22}{sampler.wall[phase] * 1e3:>9.1f}{sampled * 1e3:>12.1f}"
+            f"{sampled / busy:>8.1%}"
+        )
+        ranked = sorted(categories.items(), key=lambda item: -item[1])
+        if len(ranked) > args.top:
+            rest = sum(seconds for _, seconds in ranked[args.top - 1 :])
+            ranked = ranked[: args.top - 1] + [("(rest)", rest)]
+        for category, seconds in ranked:
+            print(f"  {category:<29}{seconds * 1e3:>12.1f}{seconds / busy:>8.1%}")
+    print(f"\nWrote {base}.svg and {base}.folded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Message reducer microbenchmark: add_messages vs the agent State's reducer.
+
+The ``State`` row uses the reducer read from the ``messages`` annotation of
+``react_agent.state.State``, so it measures what the agent graph runs
+(``add_messages_indexed``).
+
+For each thread length, measures the cost of one superstep update (one
+appended message, as call_model or tools produce), of one replace-by-ID, and
+of growing the thread by 100 more messages one superstep at a time.
+
+Usage:
+    python tests/benchmarks/reducer_bench.py
+    python tests/benchmarks/reducer_bench.py --sizes 100 1000 10000 --repeat 200
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from typing import Any, Callable, List, get_type_hints
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import add_messages
+
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "src",
+    )
+)
+
+from react_agent.state import State  # noqa: E402
+
+
+def state_reducer() -> Callable[..., Any]:
+    """Return the messages reducer the agent graph merges updates with."""
+    return get_type_hints(State, include_extras=True)["messages"].__metadata__[0]
+
+
+REDUCERS = {"add_messages": add_messages, "State": state_reducer()}
+
+
+def make_messages(start: int, count: int) -> List[Any]:
+    return [
+        (HumanMessage if i % 2 == 0 else AIMessage)(content=f"message {i}", id=f"m{i}")
+        for i in range(start, start + count)
+    ]
+
+
+def grow(reducer: Callable[..., Any], messages: Any, start: int, count: int) -> Any:
+    """Append ``count`` messages one at a time, the way supersteps do."""
+    for message in make_messages(start, count):
+        messages = reducer(messages, [message])
+    return messages
+
+
+def per_call_us(
+    reducer: Callable[..., Any], messages: Any, update: List[Any], repeat: int
+) -> float:
+    """Best-of-five mean time of one reducer call, in microseconds."""
+    runs = timeit.repeat(lambda: reducer(messages, update), number=repeat, repeat=5)
+    return min(runs) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=100, help="Calls per timing run")
+    args = parser.parse_args()
+
+    print(
+        f"{'messages':>9} {'reducer':<14}{'append us':>12}{'replace us':>12}{'grow +100 ms':>14}"
+    )
+    for size in args.sizes:
+        for name, reducer in REDUCERS.items():
+            # Build in bulk, then one regular update so each reducer sees its own list type
+            thread = grow(reducer, reducer([], make_messages(0, size - 1)), size - 1, 1)
+            growth = timeit.timeit(lambda: grow(reducer, thread, size, 100), number=1)
+            append = per_call_us(
+                reducer, thread, [AIMessage(content="new", id="new")], args.repeat
+            )
+            replace = per_call_us(
+                reducer,
+                thread,
+                [AIMessage(content="edit", id=f"m{size // 2}")],
+                args.repeat,
+            )
+            print(
+                f"{size:>9} {name:<14}{append:>12.1f}{replace:>12.1f}{growth * 1e3:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
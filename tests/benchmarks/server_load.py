@@ -0,0 +1,269 @@
+"""Load test of the LangGraph server against a local model endpoint.
+
+Starts the OpenAI-compatible mock endpoint of ``mock_openai.py``. It then
+sends concurrent SOP runs to the server through ``langgraph_sdk``, at each
+``--concurrency`` level in turn. Every worker sends ``--runs-per-worker``
+threadless runs in a row. For each level the harness reports runs per
+second, p50/p95/p99 run latency and the error rate. It also reports the
+saturation point: the last level before throughput grows by less than
+``--saturation-gain``, or before the error rate exceeds ``--max-error-rate``.
+
+With ``--start-server`` the harness also launches ``langgraph dev`` with
+``DASHSCOPE_API_BASE`` and ``SILICONFLOW_BASE_URL`` pointing at the mock.
+Otherwise, start the server yourself with those env vars (the harness prints
+them) and keep them out of ``.env``.
+
+Usage:
+    python tests/benchmarks/server_load.py --start-server
+    python tests/benchmarks/server_load.py --url http://127.0.0.1:2024 --concurrency 1 8 32 128
+    python tests/benchmarks/server_load.py --start-server --model siliconflow:Qwen/Qwen3-8B --latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from langgraph_sdk import get_client
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import base_url, start_mock_server  # noqa: E402
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Return the ``q``-th percentile (0-100) of ``samples``."""
+    if not samples:
+        return float("nan")
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(q) - 1]
+
+
+def wait_until_ready(url: str, timeout: float) -> None:
+    """Poll the server's ``/ok`` endpoint until it answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/ok", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"LangGraph server at {url} not ready after {timeout:.0f}s")
+
+
+def start_server(port: int, env: Dict[str, str], extra_args: List[str]) -> Any:
+    """Launch ``langgraph dev`` on ``port`` with the mock endpoint env vars."""
+    command = [
+        "langgraph",
+        "dev",
+        "--no-browser",
+        "--no-reload",
+        "--port",
+        str(port),
+        # The SOP tools read CSVs synchronously inside async nodes
+        "--allow-blocking",
+        *extra_args,
+    ]
+    return subprocess.Popen(
+        command,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def run_level(
+    client: Any,
+    assistant: str,
+    context: Dict[str, Any],
+    concurrency: int,
+    runs_per_worker: int,
+) -> Dict[str, float]:
+    """Send ``concurrency`` workers of sequential runs and collect their stats."""
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        for i in range(runs_per_worker):
+            start = time.perf_counter()
+            try:
+                result = await client.runs.wait(
+                    None,
+                    assistant,
+                    input={
+                        "messages": [
+                            {
+                                "role": "human",
+                                "content": f"verify a_{worker_id:05d} #{i}",
+                            }
+                        ]
+                    },
+                    context=context,
+                )
+                if not isinstance(result, dict) or "__error__" in result:
+                    raise RuntimeError(str(result)[:200])
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    runs = concurrency * runs_per_worker
+    latencies_ms = sorted(latency * 1e3 for latency in latencies)
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "errors": errors,
+        "error_rate": errors / runs,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+    }
+
+
+def saturation_point(
+    levels: List[Dict[str, float]], min_gain: float, max_error_rate: float
+) -> Optional[Dict[str, Any]]:
+    """Return the last level before throughput stalls or errors climb."""
+    for previous, level in zip(levels, levels[1:]):
+        if level["error_rate"] > max_error_rate:
+            return {"concurrency": previous["concurrency"], "reason": "errors"}
+        if level["rps"] < previous["rps"] * (1 + min_gain):
+            return {"concurrency": previous["concurrency"], "reason": "throughput"}
+    return None
+
+
+async def load_test(args: argparse.Namespace) -> List[Dict[str, float]]:
+    client = get_client(url=args.url, timeout=args.run_timeout)
+    context = {"model": args.model, "enable_metrics": False}
+    # Warm up tool loading and model clients
+    await run_level(client, args.assistant, context, 1, 1)
+
+    print(
+        f"{'concurrency':>11}{'runs':>7}{'errors':>8}{'runs/s':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    levels = []
+    for concurrency in args.concurrency:
+        level = await run_level(
+            client, args.assistant, context, concurrency, args.runs_per_worker
+        )
+        levels.append(level)
+        print(
+            f"{concurrency:>11}{level['runs']:>7.0f}{level['error_rate']:>8.1%}"
+            f"{level['rps']:>9.2f}{level['p50_ms']:>10.0f}{level['p95_ms']:>10.0f}"
+            f"{level['p99_ms']:>10.0f}"
+        )
+    return levels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:2024")
+    parser.add_argument("--assistant", default="agent", help="Graph ID or assistant")
+    parser.add_argument(
+        "--model",
+        default="qwen:qwen-flash",
+        help="Model in the run context; qwen: and siliconflow: models use the mock",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64]
+    )
+    parser.add_argument("--runs-per-worker", type=int, default=5)
+    parser.add_argument(
+        "--run-timeout", type=float, default=300.0, help="Seconds per run"
+    )
+    parser.add_argument("--mock-port", type=int, default=8765)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Mock time to first token (s)"
+    )
+    parser.add_argument(
+        "--token-delay", type=float, default=0.0, help="Mock delay per token (s)"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Mock share of HTTP 500s"
+    )
+    parser.add_argument(
+        "--start-server", action="store_true", help="Launch `langgraph dev` too"
+    )
+    parser.add_argument(
+        "--server-arg",
+        action="append",
+        default=[],
+        help="Extra `langgraph dev` argument (repeatable)",
+    )
+    parser.add_argument("--saturation-gain", type=float, default=0.1)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    mock = start_mock_server(
+        args.mock_port,
+        latency=args.latency,
+        token_delay=args.token_delay,
+        error_rate=args.error_rate,
+    )
+    url = base_url(mock)
+    env = {
+        "DASHSCOPE_API_BASE": url,
+        "SILICONFLOW_BASE_URL": url,
+        "DASHSCOPE_API_KEY": os.getenv("DASHSCOPE_API_KEY") or "mock",
+        "SILICONFLOW_API_KEY": os.getenv("SILICONFLOW_API_KEY") or "mock",
+    }
+    print(f"Mock model endpoint: {url}")
+
+    server = None
+    if args.start_server:
+        port = int(args.url.rsplit(":", 1)[-1].split("/")[0])
+        server = start_server(port, env, args.server_arg)
+    else:
+        print(
+            "Expecting a server started with "
+            f"DASHSCOPE_API_BASE={url} SILICONFLOW_BASE_URL={url}"
+        )
+    try:
+        wait_until_ready(args.url, timeout=120 if server else 5)
+        levels = asyncio.run(load_test(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        mock.shutdown()
+
+    saturation = saturation_point(levels, args.saturation_gain, args.max_error_rate)
+    if saturation is None:
+        print("\nNo saturation up to the highest concurrency level")
+    else:
+        print(
+            f"\nSaturates at concurrency {saturation['concurrency']} "
+            f"({saturation['reason']})"
+        )
+    print(f"Mock endpoint served {mock.requests} model requests, {mock.errors} failed")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"model": args.model, "levels": levels, "saturation": saturation},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
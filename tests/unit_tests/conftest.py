@@ -0,0 +1,36 @@
+"""Fixtures shared by the unit tests."""
+
+import pytest
+
+from common.mcp import (
+    add_mcp_server,
+    clear_mcp_cache,
+    get_session_pool,
+    remove_mcp_server,
+)
+from common.mcp_cache import MCPResultCache, configure_result_cache
+from tests.benchmarks.mock_mcp import start_mock_mcp_server
+
+
+@pytest.fixture(scope="session")
+def mock_mcp_server():
+    """Serve the local DeepWiki-like MCP server for the whole test session."""
+    mock = start_mock_mcp_server()
+    yield mock
+    mock.stop()
+
+
+@pytest.fixture
+async def stand_in(mock_mcp_server):
+    """Register the mock server as ``stand_in`` with fresh pools and cache."""
+    mock_mcp_server.reset()
+    clear_mcp_cache()
+    configure_result_cache(MCPResultCache())
+    add_mcp_server(
+        "stand_in", {"url": mock_mcp_server.url, "transport": "streamable_http"}
+    )
+    yield mock_mcp_server
+    await get_session_pool().close()
+    remove_mcp_server("stand_in")
+    clear_mcp_cache()
+    configure_result_cache(None)
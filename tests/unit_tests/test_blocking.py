@@ -0,0 +1,69 @@
+"""Tests for the event-loop stall detector."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from langchain_core.messages import HumanMessage
+
+from common import tools
+from common.context import Context
+from react_agent.blocking import (
+    get_stall_sites,
+    render_blocking_report,
+    reset_stalls,
+    start_blocking_detector,
+)
+from react_agent.graph import graph
+
+
+@pytest.fixture(autouse=True)
+def clear_stalls():
+    reset_stalls()
+    yield
+    reset_stalls()
+
+
+def block_the_loop() -> None:
+    time.sleep(0.15)
+
+
+async def test_detects_a_blocking_call() -> None:
+    monitor = start_blocking_detector(0.05)
+    await asyncio.sleep(0.05)
+    block_the_loop()
+    await asyncio.sleep(0.05)
+    monitor.stop()
+
+    [site] = get_stall_sites()
+    assert site.count == 1
+    assert site.longest >= 0.1
+    assert "in block_the_loop" in site.site
+    assert any("test_detects_a_blocking_call" in frame for frame in site.stack)
+
+
+async def test_attributes_stalls_to_node_and_tool() -> None:
+    read_csv = pd.read_csv
+
+    def slow_read_csv(*args, **kwargs):
+        time.sleep(0.15)
+        return read_csv(*args, **kwargs)
+
+    monitor = start_blocking_detector(0.05)
+    with patch.object(tools.pd, "read_csv", slow_read_csv):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content="verify a_00127")]},
+            context=Context(model="scripted:sop", enable_metrics=False),
+        )
+    monitor.stop()
+
+    # Only the async tool blocks the loop; sync tools run in the executor
+    [site] = [s for s in get_stall_sites() if s.tool == "VerifyAircraftClearance"]
+    assert site.node == "tools"
+    assert site.site.startswith("common/tools.py:")
+    assert site.site.endswith("in VerifyAircraftClearance")
+    report = render_blocking_report()
+    assert "VerifyAircraftClearance" in report
+    assert "slow_read_csv" in report
@@ -0,0 +1,163 @@
+"""Unit tests for the delta-encoded SQLite checkpointer."""
+
+from typing import Any, Dict, List
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.graph import StateGraph
+
+from react_agent.checkpoint import DeltaSQLiteSaver
+from react_agent.state import InputState, State
+
+
+def build_graph(checkpointer: DeltaSQLiteSaver):
+    """Graph that answers every human message with a single AI message."""
+
+    def respond(state: State) -> Dict[str, List[Any]]:
+        return {"messages": [AIMessage(content=f"reply {len(state.messages)}")]}
+
+    builder = StateGraph(State, input_schema=InputState)
+    builder.add_node(respond)
+    builder.add_edge("__start__", "respond")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def thread(thread_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def delta_rows(saver: DeltaSQLiteSaver) -> List[tuple]:
+    return saver._conn.execute(
+        "SELECT base_version, keep, depth FROM message_deltas ORDER BY version"
+    ).fetchall()
+
+
+async def test_multiturn_thread_round_trips(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "threads.sqlite"))
+    graph = build_graph(saver)
+
+    for turn in range(5):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=f"turn {turn}")]}, thread("t1")
+        )
+
+    state = await graph.aget_state(thread("t1"))
+    contents = [m.content for m in state.values["messages"]]
+    assert contents == [
+        text for turn in range(5) for text in (f"turn {turn}", f"reply {2 * turn + 1}")
+    ]
+
+
+async def test_message_versions_are_stored_as_deltas(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "threads.sqlite"))
+    graph = build_graph(saver)
+
+    for turn in range(4):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=f"turn {turn}")]}, thread("t1")
+        )
+
+    rows = delta_rows(saver)
+    # Only the very first version is a keyframe; later ones append to their base
+    assert rows[0][0] is None
+    assert all(base is not None for base, _, _ in rows[1:])
+    assert [keep for _, keep, _ in rows[1:]] == list(range(1, len(rows)))
+    assert [depth for _, _, depth in rows] == list(range(len(rows)))
+
+
+async def test_resume_after_reopen_reconstructs_state(tmp_path) -> None:
+    path = str(tmp_path / "threads.sqlite")
+    graph = build_graph(DeltaSQLiteSaver(path))
+    for turn in range(3):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=f"turn {turn}")]}, thread("t1")
+        )
+
+    # A fresh saver has no materialized lists and must walk the delta chain
+    resumed = build_graph(DeltaSQLiteSaver(path))
+    result = await resumed.ainvoke(
+        {"messages": [HumanMessage(content="turn 3")]}, thread("t1")
+    )
+
+    assert len(result["messages"]) == 8
+    assert result["messages"][-1].content == "reply 7"
+
+
+async def test_keyframe_interval_bounds_chain_length(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "threads.sqlite"), keyframe_interval=3)
+    graph = build_graph(saver)
+
+    for turn in range(5):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=f"turn {turn}")]}, thread("t1")
+        )
+
+    depths = [depth for _, _, depth in delta_rows(saver)]
+    assert max(depths) == 2
+    assert depths.count(0) >= 3
+
+
+async def test_replaced_messages_fall_back_to_keyframe(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "threads.sqlite"))
+    graph = build_graph(saver)
+    await graph.ainvoke(
+        {"messages": [HumanMessage(content="hi", id="h1")]}, thread("t1")
+    )
+
+    state = await graph.aget_state(thread("t1"))
+    await graph.aupdate_state(
+        thread("t1"),
+        {
+            "messages": [
+                RemoveMessage(id="h1"),
+                HumanMessage(content="edited", id="h1b"),
+            ]
+        },
+    )
+
+    state = await graph.aget_state(thread("t1"))
+    assert [m.content for m in state.values["messages"]] == ["reply 1", "edited"]
+    assert delta_rows(saver)[-1][0] is None
+
+
+async def test_history_and_threads_are_isolated(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "threads.sqlite"))
+    graph = build_graph(saver)
+    await graph.ainvoke({"messages": [HumanMessage(content="a")]}, thread("t1"))
+    await graph.ainvoke({"messages": [HumanMessage(content="b")]}, thread("t1"))
+    await graph.ainvoke({"messages": [HumanMessage(content="x")]}, thread("t2"))
+
+    history = [s async for s in graph.aget_state_history(thread("t1"))]
+    lengths = [len(s.values.get("messages", [])) for s in history]
+    assert lengths == sorted(lengths, reverse=True)
+    assert lengths[0] == 4
+
+    limited = list(saver.list(thread("t1"), limit=2))
+    assert len(limited) == 2
+
+    saver.delete_thread("t1")
+    assert saver.get_tuple(thread("t1")) is None
+    assert saver.get_tuple(thread("t2")) is not None
+
+
+def test_sync_api_round_trips(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "threads.sqlite"))
+    graph = build_graph(saver)
+
+    graph.invoke({"messages": [HumanMessage(content="hi")]}, thread("t1"))
+    graph.invoke({"messages": [HumanMessage(content="again")]}, thread("t1"))
+
+    assert [m.content for m in graph.get_state(thread("t1")).values["messages"]] == [
+        "hi",
+        "reply 1",
+        "again",
+        "reply 3",
+    ]
+    assert saver.bytes_written > 0
+
+
+@pytest.mark.parametrize("path", [":memory:"])
+def test_in_memory_database(path) -> None:
+    graph = build_graph(DeltaSQLiteSaver(path))
+    result = graph.invoke({"messages": [HumanMessage(content="hi")]}, thread("t1"))
+    assert len(result["messages"]) == 2
@@ -0,0 +1,267 @@
+"""Unit tests for the ReAct graph run modes."""
+
+import json
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+
+from common.context import Context
+from common.metrics import clear_metrics, get_counter, get_histogram
+from common.models.cache import SQLiteResponseCache
+from common.models.usage import (
+    clear_model_prices,
+    configure_model_price,
+    get_model_price,
+)
+from react_agent.graph import graph
+
+
+@tool
+def lookup(aircraft_id: str, check: str) -> str:
+    """Look up one inspection result."""
+    if check == "broken":
+        raise ValueError("inspection system unavailable")
+    return f"{check} for {aircraft_id}: success"
+
+
+class ScriptedModel(BaseChatModel):
+    """Fake model that calls `lookup` for each check, then writes the report."""
+
+    checks: List[str] = ["mechanical", "electrical", "shipment"]
+    prompts: List[List[BaseMessage]] = []
+    model_name: Optional[str] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedModel":
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.prompts.append(messages)
+        step = len(self.prompts) - 1
+        if step < len(self.checks):
+            call = {
+                "name": "lookup",
+                "args": {"aircraft_id": "a_00123", "check": self.checks[step]},
+                "id": f"call_{step}",
+            }
+            message = AIMessage(content="", tool_calls=[call])
+        else:
+            message = AIMessage(
+                content="<final_response>all checks passed</final_response>"
+            )
+        message.usage_metadata = {
+            "input_tokens": 1000,
+            "output_tokens": 100,
+            "total_tokens": 1100,
+            "input_token_details": {"cache_read": 400},
+            "output_token_details": {"reasoning": 30},
+        }
+        if self.model_name:
+            message.response_metadata = {"model_name": self.model_name}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+async def run(
+    chat_model: ScriptedModel,
+    run_mode: str = "full",
+    config: Optional[Dict[str, Any]] = None,
+    **context: Any,
+) -> dict:
+    with (
+        patch("react_agent.graph.load_chat_model", return_value=chat_model),
+        patch("react_agent.graph.get_tools", return_value=[lookup]),
+    ):
+        return await graph.ainvoke(
+            {"messages": [HumanMessage(content="verify a_00123")]},
+            config,
+            context=Context(run_mode=run_mode, **context),
+        )
+
+
+async def test_full_mode_keeps_every_message() -> None:
+    result = await run(ScriptedModel(), "full")
+
+    # human + 3 x (tool call + tool result) + final report
+    assert len(result["messages"]) == 8
+    assert (
+        result["final_response"] == "<final_response>all checks passed</final_response>"
+    )
+    assert result["tool_summary"] == []
+
+
+async def test_lean_mode_returns_only_the_report() -> None:
+    model = ScriptedModel()
+
+    result = await run(model, "lean")
+
+    assert [m.content for m in result["messages"]] == [
+        "<final_response>all checks passed</final_response>"
+    ]
+    assert (
+        result["final_response"] == "<final_response>all checks passed</final_response>"
+    )
+    assert [entry["args"]["check"] for entry in result["tool_summary"]] == model.checks
+    assert result["tool_summary"][0] == {
+        "tool": "lookup",
+        "args": {"aircraft_id": "a_00123", "check": "mechanical"},
+        "status": "success",
+        "result": "mechanical for a_00123: success",
+    }
+
+
+async def test_lean_mode_prompts_hold_only_the_pending_exchange() -> None:
+    model = ScriptedModel()
+
+    await run(model, "lean")
+
+    # Last prompt: SOP with tool summaries + human + latest tool call and result
+    system, *rest = model.prompts[-1]
+    assert [m.type for m in rest] == ["human", "ai", "tool"]
+    sop, summary = system.content.split("\n\n<completed_tool_calls", 1)
+    assert sop == Context().system_prompt
+    assert summary.startswith(' count="2">')
+    assert "mechanical for a_00123: success" in summary
+    assert "electrical for a_00123: success" in summary
+    assert "shipment for a_00123" not in summary
+
+
+async def test_run_records_node_model_and_tool_metrics() -> None:
+    clear_metrics()
+    model = ScriptedModel(checks=["mechanical", "broken"])
+
+    await run(model)
+
+    nodes = get_histogram("agent_node_duration_seconds", "", ("node",))
+    assert nodes.snapshot("call_model")["count"] == 3
+    assert nodes.snapshot("tools")["count"] == 2
+    models = get_histogram("agent_model_latency_seconds", "", ("model",))
+    assert models.snapshot("ScriptedModel")["count"] == 3
+    tools = get_histogram("agent_tool_duration_seconds", "", ("tool",))
+    assert tools.snapshot("lookup")["count"] == 2
+    assert get_counter("agent_tool_errors_total", "", ("tool",)).value("lookup") == 1
+    # call_model, tools, call_model, tools, call_model
+    steps = get_histogram("agent_steps_per_run", "")
+    assert steps.snapshot() == {"count": 1.0, "sum": 5.0}
+    clear_metrics()
+
+
+async def test_metrics_can_be_disabled() -> None:
+    clear_metrics()
+
+    await run(ScriptedModel(), enable_metrics=False)
+
+    nodes = get_histogram("agent_node_duration_seconds", "", ("node",))
+    assert nodes.snapshot("call_model")["count"] == 0
+
+
+async def test_run_output_accounts_tokens_and_cost_per_model() -> None:
+    configure_model_price("qwen", "qwen-flash", input=0.5, output=2.0, cached_input=0.1)
+    try:
+        result = await run(ScriptedModel(), "lean")
+    finally:
+        clear_model_prices()
+
+    usage = result["usage"]["qwen:qwen-flash"]
+    assert usage["calls"] == 4
+    assert usage["input_tokens"] == 4000
+    assert usage["output_tokens"] == 400
+    assert usage["cached_tokens"] == 1600
+    assert usage["reasoning_tokens"] == 120
+    assert usage["total_tokens"] == 4400
+    assert usage["step_limit_hits"] == 0
+    # 4 x (600 x 0.5 + 400 x 0.1 + 100 x 2.0) / 1M
+    assert usage["cost"] == pytest.approx(4 * 540 / 1_000_000)
+
+
+async def test_usage_flags_runs_that_hit_the_step_limit(monkeypatch) -> None:
+    monkeypatch.setenv("MODEL_PRICES", '{"siliconflow": {"input": 1, "output": 1}}')
+    model = ScriptedModel(checks=["mechanical"] * 10)
+
+    result = await run(
+        model, config={"recursion_limit": 6}, model="siliconflow:Qwen/Qwen3-8B"
+    )
+
+    usage = result["usage"]["siliconflow:Qwen/Qwen3-8B"]
+    assert usage["calls"] == 3
+    assert usage["step_limit_hits"] == 1
+    assert usage["cost"] == pytest.approx(3 * 1100 / 1_000_000)
+    assert result["final_response"].startswith("Sorry")
+
+
+def test_model_prices_env_var_is_parsed_once(monkeypatch) -> None:
+    monkeypatch.setenv("MODEL_PRICES", '{"qwen": {"input": 2, "output": 4}}')
+    with patch("json.loads", wraps=json.loads) as loads:
+        for _ in range(3):
+            price = get_model_price("qwen:qwen-flash")
+
+    assert price == {"input": 2.0, "output": 4.0, "cached_input": 2.0}
+    assert loads.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "{not json",
+        '{"qwen": 1}',
+        '{"qwen": {"prompt": 1}}',
+        '{"qwen": {"input": "cheap"}}',
+        '{"qwen": {"output": -1}}',
+    ],
+)
+def test_invalid_model_prices_env_var_fails_fast(monkeypatch, raw: str) -> None:
+    monkeypatch.setenv("MODEL_PRICES", raw)
+
+    with pytest.raises(ValueError, match="Invalid MODEL_PRICES"):
+        get_model_price("qwen:qwen-flash")
+
+
+async def test_usage_is_keyed_on_the_model_that_answered() -> None:
+    configure_model_price("siliconflow", input=1.0, output=1.0)
+    try:
+        # The hedge's backup answered; a bare provider name gets the provider
+        hedged = await run(
+            ScriptedModel(model_name="siliconflow:Qwen/Qwen3-8B"),
+            model="hedge:qwen:qwen-flash|siliconflow:Qwen/Qwen3-8B",
+        )
+        bare = await run(
+            ScriptedModel(model_name="Qwen/Qwen3-8B"),
+            model="siliconflow:Qwen/Qwen3-8B",
+        )
+    finally:
+        clear_model_prices()
+
+    for result in (hedged, bare):
+        assert list(result["usage"]) == ["siliconflow:Qwen/Qwen3-8B"]
+        usage = result["usage"]["siliconflow:Qwen/Qwen3-8B"]
+        assert usage["cost"] == pytest.approx(4 * 1100 / 1_000_000)
+
+
+async def test_cache_hits_are_not_billed(tmp_path) -> None:
+    configure_model_price("qwen", input=1.0, output=1.0)
+    cache = SQLiteResponseCache(str(tmp_path / "cache.sqlite"))
+    try:
+        first = await run(ScriptedModel(cache=cache))
+        replayed = await run(ScriptedModel(cache=cache))
+    finally:
+        clear_model_prices()
+
+    assert first["usage"]["qwen:qwen-flash"]["cache_hits"] == 0
+    usage = replayed["usage"]["qwen:qwen-flash"]
+    assert usage["calls"] == 4
+    assert usage["cache_hits"] == 4
+    assert usage["total_tokens"] == 0
+    assert usage["cost"] == 0.0
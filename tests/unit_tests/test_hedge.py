@@ -0,0 +1,254 @@
+"""Unit tests for hedged model requests."""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, List, Optional
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from common.metrics import clear_latency_trackers, clear_metrics, get_latency_tracker
+from common.models.hedge import HedgedChatModel, create_hedged_model
+from common.utils import load_chat_model
+
+
+class SlowModel(BaseChatModel):
+    """Fake chat model answering with a fixed text after a delay."""
+
+    text: str
+    delay: float = 0.0
+    fail: bool = False
+    calls: int = 0
+    cancelled: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError(f"{self.text} failed")
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=self.text))]
+        )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.text} failed")
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=self.text))]
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.text} failed")
+        for i, word in enumerate(self.text.split()):
+            content = word if i == 0 else " " + word
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content))
+
+
+def make_hedged(
+    primary: SlowModel, secondary: SlowModel, **kwargs: Any
+) -> HedgedChatModel:
+    return HedgedChatModel(
+        models=[primary, secondary],
+        model_names=["fake:primary", "fake:secondary"],
+        metrics_prefix="test-hedge",
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def clean_trackers():
+    clear_latency_trackers()
+    clear_metrics()
+    yield
+    clear_latency_trackers()
+    clear_metrics()
+
+
+async def test_fast_primary_does_not_hedge() -> None:
+    primary = SlowModel(text="primary", delay=0.0)
+    secondary = SlowModel(text="secondary", delay=0.0)
+    model = make_hedged(primary, secondary, initial_delay=0.5)
+
+    result = await model.ainvoke([HumanMessage(content="hi")])
+
+    assert result.content == "primary"
+    assert secondary.calls == 0
+    assert model.get_metrics()["hedges_fired"]["count"] == 0
+
+
+async def test_slow_primary_fires_hedge_and_cancels_loser() -> None:
+    primary = SlowModel(text="primary", delay=1.0)
+    secondary = SlowModel(text="secondary", delay=0.01)
+    model = make_hedged(primary, secondary, initial_delay=0.05)
+
+    result = await model.ainvoke([HumanMessage(content="hi")])
+
+    assert result.content == "secondary"
+    assert result.response_metadata["model_name"] == "fake:secondary"
+    assert secondary.calls == 1
+    # The loser has unwound by the time the call returns
+    assert primary.cancelled == 1
+    metrics = model.get_metrics()
+    assert metrics["hedges_fired"]["count"] == 1
+    assert metrics["hedge_wins"]["count"] == 1
+    # The censored primary latency is still recorded as a lower bound
+    assert metrics["fake:primary"]["count"] == 1
+
+
+async def test_primary_failure_falls_back_immediately() -> None:
+    primary = SlowModel(text="primary", fail=True)
+    secondary = SlowModel(text="secondary")
+    model = make_hedged(primary, secondary, initial_delay=10.0)
+
+    result = await asyncio.wait_for(model.ainvoke([HumanMessage(content="hi")]), 1.0)
+
+    assert result.content == "secondary"
+
+
+async def test_all_models_failing_raises_last_error() -> None:
+    model = make_hedged(
+        SlowModel(text="primary", fail=True), SlowModel(text="secondary", fail=True)
+    )
+
+    with pytest.raises(RuntimeError, match="secondary failed"):
+        await model.ainvoke([HumanMessage(content="hi")])
+
+
+async def test_stream_hedges_on_the_first_chunk() -> None:
+    primary = SlowModel(text="primary", delay=1.0)
+    secondary = SlowModel(text="secondary answer", delay=0.01)
+    model = make_hedged(primary, secondary, initial_delay=0.05)
+
+    chunks = [chunk async for chunk in model.astream([HumanMessage(content="hi")])]
+
+    # The winner's chunks are passed through, then a chunk naming the winner
+    assert [chunk.content for chunk in chunks] == ["secondary", " answer", ""]
+    message = chunks[0]
+    for chunk in chunks[1:]:
+        message += chunk
+    assert message.response_metadata["model_name"] == "fake:secondary"
+    assert primary.cancelled == 1
+    assert model.get_metrics()["hedges_fired"]["count"] == 1
+
+
+async def test_inner_calls_are_child_runs() -> None:
+    class Runs(AsyncCallbackHandler):
+        def __init__(self) -> None:
+            self.starts: List[tuple] = []
+
+        async def on_chat_model_start(
+            self, serialized, messages, *, run_id: UUID, parent_run_id=None, **kw
+        ) -> None:
+            self.starts.append((run_id, parent_run_id, kw.get("tags") or []))
+
+    runs = Runs()
+    model = make_hedged(SlowModel(text="primary"), SlowModel(text="secondary"))
+
+    await model.ainvoke([HumanMessage(content="hi")], {"callbacks": [runs]})
+
+    [(outer, outer_parent, _), (_, parent, tags)] = runs.starts
+    assert outer_parent is None
+    assert parent == outer
+    # The hedged run streams the winner; its inner runs are not streamed
+    assert "nostream" in tags
+
+
+def test_sync_invoke_falls_back() -> None:
+    model = make_hedged(
+        SlowModel(text="primary", fail=True), SlowModel(text="secondary")
+    )
+
+    assert model.invoke([HumanMessage(content="hi")]).content == "secondary"
+
+
+def test_hedge_delay_uses_observed_percentile() -> None:
+    model = make_hedged(
+        SlowModel(text="p"), SlowModel(text="s"), initial_delay=3.0, min_samples=10
+    )
+    assert model.hedge_delay() == 3.0
+
+    tracker = get_latency_tracker("test-hedge:fake:primary")
+    for i in range(1, 101):
+        tracker.observe(i / 100)
+
+    assert model.hedge_delay() == pytest.approx(0.95)
+    assert model.get_metrics()["fake:primary"]["p50"] == pytest.approx(0.5)
+    assert model.get_metrics()["fake:primary"]["p99"] == pytest.approx(0.99)
+
+
+def test_bind_tools_binds_every_model() -> None:
+    primary = SlowModel(text="p")
+    secondary = SlowModel(text="s")
+    model = make_hedged(primary, secondary)
+
+    with patch.object(
+        SlowModel,
+        "bind_tools",
+        autospec=True,
+        side_effect=lambda self, tools, **kw: self,
+    ):
+        bound = model.bind_tools([])
+
+    assert isinstance(bound, HedgedChatModel)
+    assert bound.models == [primary, secondary]
+
+
+@patch("common.models.qwen.ChatQwen")
+@patch("common.models.siliconflow.ChatSiliconFlow")
+@patch.dict(os.environ, {"REGION": "", "HEDGE_PERCENTILE": "90"}, clear=False)
+def test_load_chat_model_hedge_spec(mock_siliconflow, mock_qwen) -> None:
+    with patch("common.models.hedge.HedgedChatModel") as mock_hedged:
+        load_chat_model("hedge:qwen:qwen-flash|siliconflow:Qwen/Qwen3-8B")
+
+    mock_qwen.assert_called_once()
+    mock_siliconflow.assert_called_once()
+    kwargs = mock_hedged.call_args.kwargs
+    assert kwargs["model_names"] == ["qwen:qwen-flash", "siliconflow:Qwen/Qwen3-8B"]
+    assert kwargs["hedge_percentile"] == 90.0
+    assert kwargs["metrics_prefix"] == "hedge:qwen:qwen-flash|siliconflow:Qwen/Qwen3-8B"
+
+
+def test_create_hedged_model_requires_two_models() -> None:
+    with pytest.raises(ValueError, match="at least two models"):
+        create_hedged_model("qwen:qwen-flash")
@@ -1,9 +1,12 @@
 """Comprehensive unit tests for the MCP module."""
 
+import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from common import mcp as mcp_module
 from common.mcp import (
     MCP_SERVERS,
     add_mcp_server,
@@ -12,6 +15,7 @@ from common.mcp import (
     get_deepwiki_tools,
     get_mcp_client,
     get_mcp_tools,
+    get_mcp_tools_cache_state,
     remove_mcp_server,
 )
 
@@ -601,3 +605,221 @@ class TestMCPServerFiltering:
             remove_mcp_server("context7")
             remove_mcp_server("bad_server")
             clear_mcp_cache()
+
+
+class TestMCPToolsCacheExpiry:
+    """Test TTL expiry, background refresh and negative entries of the tools cache."""
+
+    @pytest.fixture
+    def test_server(self):
+        clear_mcp_cache()
+        add_mcp_server(
+            "test_server",
+            {"url": "https://test.example.com/mcp", "transport": "streamable_http"},
+            tools_ttl=0.05,
+        )
+        mock_client = MagicMock()
+        with patch("common.mcp.get_mcp_client", return_value=mock_client):
+            yield mock_client
+        remove_mcp_server("test_server")
+        clear_mcp_cache()
+
+    @pytest.mark.asyncio
+    async def test_expired_tools_are_returned_and_refreshed_in_background(
+        self, test_server
+    ) -> None:
+        """An expired tool list is served at once while a refresh runs."""
+        old_tools, new_tools = [AsyncMock()], [AsyncMock(), AsyncMock()]
+
+        async def slow_get_tools():
+            await asyncio.sleep(0.1)
+            return new_tools
+
+        test_server.get_tools = AsyncMock(return_value=old_tools)
+        assert await get_mcp_tools("test_server") == old_tools
+        await asyncio.sleep(0.06)
+        test_server.get_tools = AsyncMock(side_effect=slow_get_tools)
+
+        start = time.perf_counter()
+        assert await get_mcp_tools("test_server") == old_tools
+        assert await get_mcp_tools("test_server") == old_tools
+        assert time.perf_counter() - start < 0.05
+        assert get_mcp_tools_cache_state()["test_server"]["refreshing"] is True
+
+        await asyncio.sleep(0.12)
+        state = get_mcp_tools_cache_state()["test_server"]
+        assert (state["tools"], state["failures"], state["refreshing"]) == (2, 0, False)
+        assert await get_mcp_tools("test_server") == new_tools
+        test_server.get_tools.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_loads_are_retried_with_backoff(
+        self, test_server, monkeypatch
+    ) -> None:
+        """A failed load is cached briefly, then retried with a doubling delay."""
+        monkeypatch.setattr(mcp_module, "NEGATIVE_CACHE_TTL", 0.05)
+        test_server.get_tools = AsyncMock(side_effect=Exception("Network error"))
+
+        assert await get_mcp_tools("test_server") == []
+        assert await get_mcp_tools("test_server") == []
+        assert test_server.get_tools.call_count == 1
+        state = get_mcp_tools_cache_state()["test_server"]
+        assert (state["failures"], state["last_error"]) == (1, "Network error")
+        assert 0 < state["expires_in"] <= 0.05
+
+        await asyncio.sleep(0.06)
+        await get_mcp_tools("test_server")
+        await asyncio.sleep(0.01)
+        assert test_server.get_tools.call_count == 2
+        state = get_mcp_tools_cache_state()["test_server"]
+        assert state["failures"] == 2
+        assert 0.05 < state["expires_in"] <= 0.1
+
+        tools = [AsyncMock()]
+        test_server.get_tools = AsyncMock(return_value=tools)
+        await asyncio.sleep(0.11)
+        await get_mcp_tools("test_server")
+        await asyncio.sleep(0.01)
+        assert await get_mcp_tools("test_server") == tools
+        assert get_mcp_tools_cache_state()["test_server"]["failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_the_previous_tools(
+        self, test_server, monkeypatch
+    ) -> None:
+        """Tools stay available when a refresh fails."""
+        monkeypatch.setattr(mcp_module, "NEGATIVE_CACHE_TTL", 10)
+        tools = [AsyncMock()]
+        test_server.get_tools = AsyncMock(return_value=tools)
+        await get_mcp_tools("test_server")
+        await asyncio.sleep(0.06)
+        test_server.get_tools = AsyncMock(side_effect=Exception("Network error"))
+
+        await get_mcp_tools("test_server")
+        await asyncio.sleep(0.01)
+
+        assert await get_mcp_tools("test_server") == tools
+        state = get_mcp_tools_cache_state()["test_server"]
+        assert (state["tools"], state["failures"]) == (1, 1)
+        assert state["expires_in"] > 9
+
+
+class TestMCPToolsSingleFlight:
+    """Test that concurrent first loads of a server share one discovery."""
+
+    @pytest.fixture
+    def slow_server(self):
+        clear_mcp_cache()
+        add_mcp_server(
+            "test_server",
+            {"url": "https://test.example.com/mcp", "transport": "streamable_http"},
+        )
+        tools = [AsyncMock(), AsyncMock()]
+
+        async def slow_get_tools():
+            await asyncio.sleep(0.05)
+            return tools
+
+        mock_client = MagicMock()
+        mock_client.get_tools = AsyncMock(side_effect=slow_get_tools)
+        with patch(
+            "common.mcp.get_mcp_client", return_value=mock_client
+        ) as mock_get_client:
+            yield mock_get_client, mock_client, tools
+        remove_mcp_server("test_server")
+        clear_mcp_cache()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_discovery(self, slow_server) -> None:
+        """N simultaneous callers make exactly one connection."""
+        mock_get_client, mock_client, tools = slow_server
+
+        results = await asyncio.gather(
+            *(get_mcp_tools("test_server") for _ in range(20))
+        )
+
+        assert all(result == tools for result in results)
+        mock_get_client.assert_called_once()
+        mock_client.get_tools.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_the_shared_discovery(
+        self, slow_server
+    ) -> None:
+        """Other callers still get the tools when one of them is cancelled."""
+        _, mock_client, tools = slow_server
+
+        first = asyncio.create_task(get_mcp_tools("test_server"))
+        second = asyncio.create_task(get_mcp_tools("test_server"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == tools
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        mock_client.get_tools.assert_called_once()
+
+
+class TestMCPConcurrentDiscovery:
+    """Test concurrent discovery of all servers in get_all_mcp_tools."""
+
+    @pytest.fixture
+    def servers(self):
+        """Three servers whose discovery takes the given delays."""
+        clear_mcp_cache()
+        delays = {"fast": 0.05, "medium": 0.1, "slow": 0.5}
+        tools = {name: [AsyncMock()] for name in delays}
+
+        def make_client(server_config):
+            [name] = server_config
+            client = MagicMock()
+
+            async def get_tools():
+                await asyncio.sleep(delays[name])
+                return tools[name]
+
+            client.get_tools = AsyncMock(side_effect=get_tools)
+            return client
+
+        configs = {
+            name: {"url": f"https://{name}.example.com/mcp", "transport": "http"}
+            for name in delays
+        }
+        with (
+            patch.dict(MCP_SERVERS, configs, clear=True),
+            patch("common.mcp.get_mcp_client", side_effect=make_client),
+        ):
+            yield tools
+        clear_mcp_cache()
+
+    @pytest.mark.asyncio
+    async def test_servers_are_discovered_concurrently(self, servers) -> None:
+        """Discovery takes as long as the slowest server, not the sum."""
+        start = time.perf_counter()
+        all_tools = await get_all_mcp_tools(timeout=1)
+
+        assert time.perf_counter() - start < 0.6
+        assert all_tools == servers["fast"] + servers["medium"] + servers["slow"]
+        state = get_mcp_tools_cache_state()
+        assert state["fast"]["discovery_seconds"] == pytest.approx(0.05, abs=0.04)
+        assert state["slow"]["discovery_seconds"] == pytest.approx(0.5, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_slow_server_is_left_out_and_loaded_in_background(
+        self, servers
+    ) -> None:
+        """A server over the timeout does not hold up the others."""
+        start = time.perf_counter()
+        all_tools = await get_all_mcp_tools(timeout=0.2)
+
+        assert time.perf_counter() - start < 0.3
+        assert all_tools == servers["fast"] + servers["medium"]
+        assert "slow" not in get_mcp_tools_cache_state()
+
+        await asyncio.sleep(0.35)
+        assert await get_all_mcp_tools(timeout=0.2) == (
+            servers["fast"] + servers["medium"] + servers["slow"]
+        )
+        histogram = mcp_module._discovery_histogram()
+        assert histogram.snapshot("slow", "timeout")["count"] >= 1
+        assert histogram.snapshot("slow", "ok")["count"] >= 1
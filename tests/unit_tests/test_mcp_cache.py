@@ -0,0 +1,140 @@
+"""Unit tests for the MCP tool result cache."""
+
+import time
+import zlib
+
+import pytest
+from mcp.types import CallToolResult, TextContent
+
+from common.mcp_cache import MCPResultCache, canonical_arguments, get_result_cache
+from common.metrics import get_counter
+
+
+def text_result(text: str, is_error: bool = False) -> CallToolResult:
+    return CallToolResult(
+        content=[TextContent(type="text", text=text)], isError=is_error
+    )
+
+
+def compressed_size(result: CallToolResult) -> int:
+    return len(
+        zlib.compress(result.model_dump_json(by_alias=True, exclude_none=True).encode())
+    )
+
+
+WIKI = {"repoName": "langchain-ai/langgraph"}
+
+
+def test_canonical_arguments() -> None:
+    assert canonical_arguments(
+        {"repoName": " LangChain-AI/LangGraph", "question": "Why? ", "page": None}
+    ) == canonical_arguments({"question": "Why?", "repoName": "langchain-ai/langgraph"})
+    assert canonical_arguments({"question": "Why?"}) != canonical_arguments(
+        {"question": "why?"}
+    )
+    assert canonical_arguments(None) == canonical_arguments({}) == "{}"
+
+
+def test_results_are_cached_per_tool_and_arguments() -> None:
+    cache = MCPResultCache()
+    cache.put("deepwiki", "read_wiki_contents", WIKI, text_result("contents"))
+
+    hit = cache.get(
+        "deepwiki", "read_wiki_contents", {"repoName": "LangChain-AI/langgraph"}
+    )
+
+    assert hit == text_result("contents")
+    assert cache.get("deepwiki", "read_wiki_structure", WIKI) is None
+    assert cache.get("other", "read_wiki_contents", WIKI) is None
+    metrics = cache.get_metrics()
+    assert (metrics["memory_hits"], metrics["misses"]) == (1, 2)
+    lookups = get_counter("agent_mcp_result_cache_lookups_total", "")
+    assert lookups.value("read_wiki_contents", "memory_hit") >= 1
+
+
+def test_ttl_policies() -> None:
+    cache = MCPResultCache(
+        ttls={"ask_question": 0.05, "private/ask_question": 0, "search": 60}
+    )
+
+    assert cache.ttl("deepwiki", "read_wiki_contents") == 86400
+    assert cache.ttl("deepwiki", "ask_question") == 0.05
+    assert cache.ttl("private", "ask_question") == 0
+    assert cache.ttl("deepwiki", "unknown_tool") == 0
+
+    cache.put("deepwiki", "ask_question", WIKI, text_result("answer"))
+    cache.put("private", "ask_question", WIKI, text_result("answer"))
+    cache.put("deepwiki", "unknown_tool", WIKI, text_result("answer"))
+    assert cache.get("deepwiki", "ask_question", WIKI) is not None
+    time.sleep(0.1)
+
+    assert cache.get("deepwiki", "ask_question", WIKI) is None
+    assert cache.get_metrics()["entries"] == 0
+
+
+def test_error_results_are_not_cached() -> None:
+    cache = MCPResultCache()
+    cache.put("deepwiki", "ask_question", WIKI, text_result("failed", is_error=True))
+
+    assert cache.get("deepwiki", "ask_question", WIKI) is None
+
+
+def test_memory_tier_evicts_least_recently_used_by_size() -> None:
+    page = text_result("x" * 100)
+    size = compressed_size(page)
+    cache = MCPResultCache(max_bytes=2 * size)
+    for repo in ("a/a", "b/b"):
+        cache.put("deepwiki", "read_wiki_contents", {"repoName": repo}, page)
+    cache.get("deepwiki", "read_wiki_contents", {"repoName": "a/a"})
+    cache.put("deepwiki", "read_wiki_contents", {"repoName": "c/c"}, page)
+
+    assert cache.get("deepwiki", "read_wiki_contents", {"repoName": "b/b"}) is None
+    assert cache.get("deepwiki", "read_wiki_contents", {"repoName": "a/a"}) == page
+    metrics = cache.get_metrics()
+    assert (metrics["evictions"], metrics["bytes"]) == (1, 2 * size)
+
+
+def test_disk_tier_is_compressed_and_survives_a_new_cache(tmp_path) -> None:
+    path = str(tmp_path / "mcp_results.sqlite")
+    contents = text_result("LangGraph wiki page. " * 2000)
+    MCPResultCache(path=path).put("deepwiki", "read_wiki_contents", WIKI, contents)
+
+    cache = MCPResultCache(path=path)
+
+    assert cache.get("deepwiki", "read_wiki_contents", WIKI) == contents
+    assert cache.get("deepwiki", "read_wiki_contents", WIKI) == contents
+    metrics = cache.get_metrics()
+    assert (metrics["disk_hits"], metrics["memory_hits"]) == (1, 1)
+    assert metrics["bytes"] < len(contents.model_dump_json()) / 10
+    cache.close()
+
+
+def test_disk_tier_is_bounded(tmp_path) -> None:
+    page = text_result("x" * 100)
+    cache = MCPResultCache(path=str(tmp_path / "mcp_results.sqlite"), max_bytes=0)
+    size = compressed_size(page)
+    cache.max_disk_bytes = 2 * size
+    for repo in ("a/a", "b/b", "c/c"):
+        cache.put("deepwiki", "read_wiki_contents", {"repoName": repo}, page)
+
+    assert cache.get("deepwiki", "read_wiki_contents", {"repoName": "a/a"}) is None
+    assert cache.get("deepwiki", "read_wiki_contents", {"repoName": "c/c"}) == page
+    cache.close()
+
+
+@pytest.mark.parametrize(("size", "enabled"), [("0", False), ("1", True)])
+def test_result_cache_env_vars(monkeypatch, size, enabled) -> None:
+    monkeypatch.setenv("MCP_RESULT_CACHE_MB", size)
+    monkeypatch.setenv("MCP_RESULT_CACHE_TTLS", "ask_question=0, search=60")
+    monkeypatch.setattr("common.mcp_cache._cache_loaded", False)
+    monkeypatch.setattr("common.mcp_cache._cache", None)
+
+    cache = get_result_cache()
+
+    assert (cache is not None) is enabled
+    if cache is not None:
+        assert cache.max_bytes == 1024 * 1024
+        assert (cache.ttl("deepwiki", "ask_question"), cache.ttl("x", "search")) == (
+            0,
+            60,
+        )
@@ -0,0 +1,118 @@
+"""Unit tests for shaping large MCP tool outputs."""
+
+import pytest
+from mcp.types import CallToolResult, ImageContent, TextContent
+
+from common.mcp_output import (
+    clear_stored_outputs,
+    estimate_tokens,
+    get_stored_outputs,
+    output_query,
+    read_mcp_output,
+    score_sections,
+    shape_result,
+    shape_text,
+    split_sections,
+)
+
+
+def wiki(pages: int = 20) -> str:
+    """A DeepWiki-like document with one page per topic."""
+    topics = ["overview", "graphs", "nodes", "edges", "state", "streaming"]
+    topics += [f"topic{i}" for i in range(pages - len(topics) - 1)]
+    topics.insert(pages // 2, "checkpointer")
+    return "\n\n".join(
+        f"# Page: {topic.title()}\n\n"
+        + f"This page explains {topic} in detail. " * 40
+        + f"\n\nThe {topic} API is documented below."
+        for topic in topics
+    )
+
+
+@pytest.fixture(autouse=True)
+def stored_outputs():
+    clear_stored_outputs()
+    yield
+    clear_stored_outputs()
+
+
+def test_split_sections_at_headings_and_size() -> None:
+    text = "Intro\n\n# A\n\n" + "a" * 100 + "\n\n" + "b" * 100 + "\n\n## B\n\nb"
+
+    sections = split_sections(text, max_tokens=30)
+
+    assert sections == ["Intro", "# A\n\n" + "a" * 100, "b" * 100, "## B\n\nb"]
+
+
+def test_score_sections_prefers_query_terms() -> None:
+    sections = ["# Nodes\n\nNodes run steps.", "# Checkpointer\n\nSaves state."]
+
+    scores = score_sections(sections, "How does the checkpointer save state?")
+
+    assert scores[1] > scores[0] == 0
+    assert score_sections(sections, "how does it") == [0.0, 0.0]
+
+
+def test_short_outputs_are_unchanged() -> None:
+    assert shape_text("short", "query", max_tokens=100) == "short"
+    assert shape_text(wiki(), "query", max_tokens=0) == wiki()
+
+
+def test_long_output_keeps_the_relevant_sections_within_budget() -> None:
+    text = wiki()
+
+    shaped = shape_text(text, "How do I configure a checkpointer?", max_tokens=1000)
+
+    assert estimate_tokens(shaped) <= 1000
+    assert "# Page: Checkpointer" in shaped
+    assert "# Page: Topic12" not in shaped
+    assert "section(s) omitted" in shaped
+    assert "most relevant to the question" in shaped
+    [(output_id, tokens)] = get_stored_outputs().items()
+    assert f'output_id="{output_id}"' in shaped
+    assert tokens == estimate_tokens(text)
+
+
+def test_without_query_terms_the_output_is_cut_from_the_end() -> None:
+    shaped = shape_text(wiki(), "", max_tokens=1000)
+
+    assert shaped.startswith("# Page: Overview")
+    assert "# Page: Checkpointer" not in shaped
+    assert "keeping the sections first" in shaped
+
+
+async def test_full_output_can_be_paged_in(monkeypatch) -> None:
+    monkeypatch.setenv("MCP_OUTPUT_MAX_TOKENS", "1000")
+    text = wiki()
+    shape_text(text, "", max_tokens=1000)
+    [output_id] = get_stored_outputs()
+
+    first = await read_mcp_output(output_id)
+    pages = int(first.split("\n")[0].split(" of ")[1])
+    contents = [first] + [
+        await read_mcp_output(output_id, page) for page in range(2, pages + 1)
+    ]
+
+    assert first.startswith(f"[Page 1 of {pages} of output {output_id}]")
+    assert all(estimate_tokens(page) <= 1020 for page in contents)
+    assert "\n\n".join(page.split("\n\n", 1)[1] for page in contents) == text
+    assert "does not exist" in await read_mcp_output(output_id, pages + 1)
+    assert "Unknown output_id" in await read_mcp_output("missing")
+
+
+def test_shape_result_uses_the_run_question_and_arguments(monkeypatch) -> None:
+    monkeypatch.setenv("MCP_OUTPUT_MAX_TOKENS", "1000")
+    image = ImageContent(type="image", data="", mimeType="image/png")
+    result = CallToolResult(content=[TextContent(type="text", text=wiki()), image])
+
+    with output_query("How do I resume from a checkpointer?"):
+        shaped = shape_result(
+            "read_wiki_contents", {"repoName": "langchain-ai/langgraph"}, result
+        )
+
+    [text, kept_image] = shaped.content
+    assert "# Page: Checkpointer" in text.text
+    assert estimate_tokens(text.text) <= 1000
+    assert kept_image == image
+    # The original result, which may be cached, is left whole
+    assert result.content[0].text == wiki()
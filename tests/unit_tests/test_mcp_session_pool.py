@@ -0,0 +1,290 @@
+"""Tests for the MCP session pool, against the local mock MCP server."""
+
+import asyncio
+import json
+import socket
+import time
+from unittest.mock import patch
+
+import langchain_mcp_adapters.tools
+import pytest
+from langchain_core.tools import ToolException
+from mcp import ClientSession
+
+from common import mcp as mcp_module
+from common.mcp import (
+    add_mcp_server,
+    clear_mcp_cache,
+    get_mcp_tools,
+    get_mcp_tools_cache_state,
+    get_session_pool,
+    remove_mcp_server,
+)
+from common.mcp_output import estimate_tokens, output_query, read_mcp_output
+
+
+def tool_named(tools, name: str):
+    [tool] = [t for t in tools if t.name == name]
+    return tool
+
+
+async def ask(tools, question: str) -> str:
+    tool = tool_named(tools, "ask_question")
+    return await tool.ainvoke(
+        {"repoName": "langchain-ai/langgraph", "question": question}
+    )
+
+
+async def test_tool_calls_reuse_one_session(stand_in) -> None:
+    tools = await get_mcp_tools("stand_in")
+
+    answers = [await ask(tools, f"q{i}") for i in range(5)]
+
+    assert answers[0] == "langchain-ai/langgraph: q0"
+    assert len(set(stand_in.sessions)) == 1
+    metrics = get_session_pool().get_metrics()["stand_in"]
+    assert (metrics["opened"], metrics["reused"], metrics["idle"]) == (1, 4, 1)
+
+
+async def test_concurrent_calls_are_capped_at_max_sessions(
+    stand_in, monkeypatch
+) -> None:
+    monkeypatch.setenv("MCP_MAX_SESSIONS", "2")
+    stand_in.settings.latency = 0.05
+    tools = await get_mcp_tools("stand_in")
+
+    answers = await asyncio.gather(*(ask(tools, f"q{i}") for i in range(6)))
+
+    assert len(answers) == 6
+    assert len(set(stand_in.sessions)) == 2
+    metrics = get_session_pool().get_metrics()["stand_in"]
+    assert (metrics["opened"], metrics["open"]) == (2, 2)
+
+
+async def test_unhealthy_session_is_replaced(stand_in, monkeypatch) -> None:
+    monkeypatch.setenv("MCP_HEALTH_CHECK_INTERVAL", "0")
+    tools = await get_mcp_tools("stand_in")
+    await ask(tools, "first")
+
+    with patch.object(ClientSession, "send_ping", side_effect=ConnectionError):
+        assert await ask(tools, "second") == "langchain-ai/langgraph: second"
+
+    assert len(set(stand_in.sessions)) == 2
+    metrics = get_session_pool().get_metrics()["stand_in"]
+    assert (metrics["unhealthy"], metrics["opened"], metrics["open"]) == (1, 2, 1)
+
+
+async def test_cancelled_health_check_frees_the_session_slot(
+    stand_in, monkeypatch
+) -> None:
+    monkeypatch.setenv("MCP_MAX_SESSIONS", "1")
+    monkeypatch.setenv("MCP_HEALTH_CHECK_INTERVAL", "0")
+    tools = await get_mcp_tools("stand_in")
+    await ask(tools, "first")
+
+    async def hang(self):
+        await asyncio.sleep(10)
+
+    with patch.object(ClientSession, "send_ping", hang):
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(ask(tools, "cancelled"), 0.1)
+
+    # The only slot is free again: the session was closed, not leaked
+    answer = await asyncio.wait_for(ask(tools, "after"), 5)
+    assert answer == "langchain-ai/langgraph: after"
+    metrics = get_session_pool().get_metrics()["stand_in"]
+    assert (metrics["opened"], metrics["open"]) == (2, 1)
+
+
+async def test_concurrent_first_loads_open_one_connection(stand_in) -> None:
+    create_session = langchain_mcp_adapters.tools.create_session
+
+    with patch.object(
+        langchain_mcp_adapters.tools, "create_session", wraps=create_session
+    ) as connect:
+        results = await asyncio.gather(*(get_mcp_tools("stand_in") for _ in range(10)))
+
+    assert connect.call_count == 1
+    assert all(tools == results[0] for tools in results)
+    assert [tool.name for tool in results[0]] == [
+        "read_wiki_structure",
+        "read_wiki_contents",
+        "ask_question",
+    ]
+
+
+async def test_clear_cancels_loads_in_flight(stand_in, monkeypatch) -> None:
+    load_tools = mcp_module._load_mcp_tools
+    started = asyncio.Event()
+
+    async def slow_load(server_name):
+        started.set()
+        await asyncio.sleep(0.2)
+        return await load_tools(server_name)
+
+    monkeypatch.setattr(mcp_module, "_load_mcp_tools", slow_load)
+    load = asyncio.ensure_future(get_mcp_tools("stand_in"))
+    await started.wait()
+    [task] = mcp_module._tools_loads.values()
+
+    clear_mcp_cache()
+    with pytest.raises(asyncio.CancelledError):
+        await load
+    assert task.cancelled()
+    assert "stand_in" not in get_mcp_tools_cache_state()
+
+
+async def test_connect_is_retried_with_backoff(monkeypatch) -> None:
+    clear_mcp_cache()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    add_mcp_server(
+        "unreachable",
+        {"url": f"http://127.0.0.1:{port}/mcp", "transport": "streamable_http"},
+    )
+    monkeypatch.setattr(mcp_module, "RECONNECT_BACKOFF", 0.05)
+    pool = get_session_pool()
+
+    start = time.perf_counter()
+    with pytest.raises(Exception):
+        await pool.call_tool("unreachable", "ask_question", {})
+
+    # Backoff of 0.05 s, then 0.1 s between the three attempts
+    assert time.perf_counter() - start >= 0.15
+    metrics = pool.get_metrics()["unreachable"]
+    assert (metrics["connect_failed"], metrics["open"]) == (3, 0)
+    remove_mcp_server("unreachable")
+    clear_mcp_cache()
+
+
+async def test_tool_schemas_are_served_from_disk_and_revalidated(
+    stand_in, tmp_path, monkeypatch
+) -> None:
+    path = tmp_path / "mcp_tools.json"
+    monkeypatch.setenv("MCP_SCHEMA_CACHE_PATH", str(path))
+    await get_mcp_tools("stand_in")
+    saved = json.loads(path.read_text())
+    assert saved["version"] == mcp_module.SCHEMA_CACHE_VERSION
+    assert [t["name"] for t in saved["servers"]["stand_in"]["tools"]] == [
+        "read_wiki_structure",
+        "read_wiki_contents",
+        "ask_question",
+    ]
+
+    # A new worker: the server is slow to list its tools
+    clear_mcp_cache()
+    load = mcp_module._load_mcp_tools
+    revalidated = asyncio.Event()
+
+    async def slow_load(server_name):
+        await asyncio.sleep(0.3)
+        tools = await load(server_name)
+        revalidated.set()
+        return tools
+
+    monkeypatch.setattr(mcp_module, "_load_mcp_tools", slow_load)
+    start = time.perf_counter()
+    tools = await get_mcp_tools("stand_in")
+
+    assert time.perf_counter() - start < 0.2
+    assert get_mcp_tools_cache_state()["stand_in"]["source"] == "disk"
+    assert await ask(tools, "cached") == "langchain-ai/langgraph: cached"
+    await asyncio.wait_for(revalidated.wait(), 5)
+    await asyncio.sleep(0)
+    assert get_mcp_tools_cache_state()["stand_in"]["source"] == "server"
+
+
+async def test_concurrent_first_loads_from_disk_share_one_load(
+    stand_in, tmp_path, monkeypatch
+) -> None:
+    monkeypatch.setenv("MCP_SCHEMA_CACHE_PATH", str(tmp_path / "mcp_tools.json"))
+    await get_mcp_tools("stand_in")
+    clear_mcp_cache()
+    create_session = langchain_mcp_adapters.tools.create_session
+
+    with (
+        patch.object(
+            mcp_module, "_read_schema_cache", wraps=mcp_module._read_schema_cache
+        ) as read,
+        patch.object(
+            langchain_mcp_adapters.tools, "create_session", wraps=create_session
+        ) as connect,
+    ):
+        results = await asyncio.gather(*(get_mcp_tools("stand_in") for _ in range(10)))
+        # Every caller got the cached tools; one revalidation is in flight
+        assert get_mcp_tools_cache_state()["stand_in"]["source"] == "disk"
+        await mcp_module._tools_loads["stand_in"]
+
+    assert read.call_count == 1
+    assert connect.call_count == 1
+    assert all(tools == results[0] for tools in results)
+    assert get_mcp_tools_cache_state()["stand_in"]["source"] == "server"
+
+
+@pytest.mark.parametrize("change", ["version", "url"])
+async def test_stale_tool_schema_cache_is_ignored(
+    stand_in, tmp_path, monkeypatch, change
+) -> None:
+    path = tmp_path / "mcp_tools.json"
+    monkeypatch.setenv("MCP_SCHEMA_CACHE_PATH", str(path))
+    await get_mcp_tools("stand_in")
+    saved = json.loads(path.read_text())
+    if change == "version":
+        saved["version"] += 1
+    else:
+        saved["servers"]["stand_in"]["config"]["url"] = "http://127.0.0.1:1/mcp"
+    path.write_text(json.dumps(saved))
+    clear_mcp_cache()
+
+    await get_mcp_tools("stand_in")
+
+    assert get_mcp_tools_cache_state()["stand_in"]["source"] == "server"
+
+
+async def test_repeated_calls_are_answered_from_the_result_cache(stand_in) -> None:
+    tools = await get_mcp_tools("stand_in")
+    tool = tool_named(tools, "ask_question")
+
+    first = await ask(tools, "what is a checkpointer?")
+    again = await tool.ainvoke(
+        {"question": " what is a checkpointer?", "repoName": "LangChain-AI/LangGraph"}
+    )
+    other = await ask(tools, "what is a node?")
+
+    assert again == first
+    assert other == "langchain-ai/langgraph: what is a node?"
+    # The repeated question never reached the server
+    assert len(stand_in.sessions) == 2
+
+
+async def test_large_outputs_are_shortened_and_paged_in(stand_in, monkeypatch) -> None:
+    monkeypatch.setenv("MCP_OUTPUT_MAX_TOKENS", "1000")
+    tool = tool_named(await get_mcp_tools("stand_in"), "read_wiki_contents")
+
+    with output_query("How do I add a checkpointer?"):
+        shaped = await tool.ainvoke({"repoName": "langchain-ai/langgraph"})
+
+    assert estimate_tokens(shaped) <= 1000
+    assert "handles Checkpointer" in shaped
+    assert "handles Graphs" not in shaped
+    output_id = shaped.split('output_id="')[1].split('"')[0]
+    page = await read_mcp_output(output_id, 1)
+    assert "# Page: Overview" in page
+
+
+async def test_tool_errors_are_raised_and_not_cached(stand_in) -> None:
+    tool = tool_named(await get_mcp_tools("stand_in"), "read_wiki_structure")
+    stand_in.settings.fail_next = 1
+    args = {"repoName": "langchain-ai/langgraph"}
+
+    with pytest.raises(ToolException, match="Injected failure"):
+        await tool.ainvoke(args)
+    topics = await tool.ainvoke(args)
+    await tool.ainvoke(args)
+
+    assert "- Checkpointer" in topics
+    # The failed call is retried on the server, the successful one is cached
+    assert stand_in.calls["read_wiki_structure"] == 2
+    # A tool error does not break the session
+    assert get_session_pool().get_metrics()["stand_in"]["opened"] == 1
@@ -0,0 +1,72 @@
+"""Unit tests for the Prometheus-style metrics registry."""
+
+import urllib.request
+
+import pytest
+
+from common.metrics import (
+    clear_metrics,
+    get_counter,
+    get_histogram,
+    render_prometheus,
+    start_metrics_server,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    clear_metrics()
+    yield
+    clear_metrics()
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = get_histogram(
+        "test_seconds", "Test latency.", ("node",), buckets=(0.1, 1)
+    )
+
+    histogram.observe(0.05, "call_model")
+    histogram.observe(0.5, "call_model")
+    histogram.observe(3, "call_model")
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{node="call_model",le="0.1"} 1',
+        'test_seconds_bucket{node="call_model",le="1"} 2',
+        'test_seconds_bucket{node="call_model",le="+Inf"} 3',
+        'test_seconds_sum{node="call_model"} 3.55',
+        'test_seconds_count{node="call_model"} 3',
+    ]
+
+
+def test_counter_and_label_escaping() -> None:
+    counter = get_counter("test_errors_total", "Errors.", ("tool",))
+
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+
+    assert counter.value('say "hi"') == 3
+    assert 'test_errors_total{tool="say \\"hi\\""} 3' in render_prometheus()
+
+
+def test_registry_returns_same_metric_and_rejects_type_clash() -> None:
+    assert get_histogram("shared", "A.") is get_histogram("shared", "A.")
+    with pytest.raises(ValueError, match="already registered"):
+        get_counter("shared", "A.")
+
+
+def test_metrics_endpoint_serves_text_format() -> None:
+    get_counter("test_requests_total", "Requests.").inc()
+    server = start_metrics_server(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode("utf-8")
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "test_requests_total 1" in body
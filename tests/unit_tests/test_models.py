@@ -88,6 +88,23 @@ def test_create_qwq_model_with_env_region_international(mock_chat_qwq):
     )
 
 
+@patch("common.models.qwen.ChatQwen")
+@patch.dict(
+    os.environ,
+    {
+        "DASHSCOPE_API_KEY": "env-key",
+        "DASHSCOPE_API_BASE": "http://127.0.0.1:8765/v1",
+        "REGION": "prc",
+    },
+)
+def test_create_qwen_model_with_env_base_url(mock_chat_qwen):
+    """Test Qwen model creation using environment variable for base URL."""
+    assert mock_chat_qwen.return_value == create_qwen_model("qwen-plus")
+    mock_chat_qwen.assert_called_once_with(
+        model="qwen-plus", api_key="env-key", base_url="http://127.0.0.1:8765/v1"
+    )
+
+
 @patch("common.models.qwen.ChatQwQ")
 def test_create_qwq_model_with_custom_base_url(mock_chat_qwq):
     """Test QwQ model creation with custom base URL."""
@@ -206,6 +223,23 @@ def test_create_siliconflow_model_with_env_region_international(mock_chat_silico
     )
 
 
+@patch("common.models.siliconflow.ChatSiliconFlow")
+@patch.dict(
+    os.environ,
+    {
+        "SILICONFLOW_API_KEY": "env-key",
+        "SILICONFLOW_BASE_URL": "http://127.0.0.1:8765/v1",
+        "REGION": "international",
+    },
+)
+def test_create_siliconflow_model_with_env_base_url(mock_chat_siliconflow):
+    """Test SiliconFlow model creation using environment variable for base URL."""
+    assert mock_chat_siliconflow.return_value == create_siliconflow_model("Qwen/Qwen3-8B")
+    mock_chat_siliconflow.assert_called_once_with(
+        model="Qwen/Qwen3-8B", api_key="env-key", base_url="http://127.0.0.1:8765/v1"
+    )
+
+
 @patch("common.models.siliconflow.ChatSiliconFlow")
 def test_create_siliconflow_model_with_custom_base_url(mock_chat_siliconflow):
     """Test SiliconFlow model creation with custom base URL."""
@@ -0,0 +1,275 @@
+"""Unit tests for per-provider rate limiting."""
+
+import asyncio
+import json
+import os
+import time
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+
+from common.metrics import clear_latency_trackers
+from common.models.cache import SQLiteResponseCache
+from common.models.qwen import create_qwen_model
+from common.models.ratelimit import (
+    TokenBucketRateLimiter,
+    clear_rate_limiters,
+    configure_rate_limit,
+    get_rate_limiter,
+)
+from common.models.siliconflow import create_siliconflow_model
+
+
+@pytest.fixture(autouse=True)
+def clean_limiters():
+    clear_rate_limiters()
+    clear_latency_trackers()
+    yield
+    clear_rate_limiters()
+    clear_latency_trackers()
+
+
+def usage_result(total_tokens: int) -> LLMResult:
+    message = AIMessage(
+        content="ok",
+        usage_metadata={
+            "input_tokens": total_tokens,
+            "output_tokens": 0,
+            "total_tokens": total_tokens,
+        },
+    )
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+class SlowModel(BaseChatModel):
+    """Fake model whose calls take ``delay`` seconds."""
+
+    delay: float = 0.05
+    total_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _result(self) -> ChatResult:
+        message = AIMessage("ok")
+        if self.total_tokens:
+            message.usage_metadata = {
+                "input_tokens": self.total_tokens,
+                "output_tokens": 0,
+                "total_tokens": self.total_tokens,
+            }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.delay)
+        return self._result()
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        return self._result()
+
+
+def limited_model(limiter: TokenBucketRateLimiter, **kwargs) -> SlowModel:
+    return SlowModel(rate_limiter=limiter, callbacks=[limiter.callback], **kwargs)
+
+
+async def test_requests_per_second_queues_instead_of_failing() -> None:
+    limiter = TokenBucketRateLimiter("test", requests_per_second=20)
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(limiter.aacquire() for _ in range(5)))
+    elapsed = time.monotonic() - start
+
+    assert all(results)
+    # Five requests at 20/s need four intervals of 50ms
+    assert elapsed == pytest.approx(0.2, abs=0.08)
+    assert limiter.get_metrics()["queue_wait"]["count"] == 5
+    assert limiter.get_metrics()["queue_wait"]["p99"] == pytest.approx(0.2, abs=0.05)
+
+
+async def test_callers_are_admitted_in_arrival_order() -> None:
+    limiter = TokenBucketRateLimiter("test", requests_per_second=50)
+    order = []
+
+    async def caller(i: int) -> None:
+        await limiter.aacquire()
+        order.append(i)
+
+    await asyncio.gather(*(caller(i) for i in range(6)))
+
+    assert order == list(range(6))
+
+
+async def test_burst_admits_back_to_back() -> None:
+    limiter = TokenBucketRateLimiter("test", requests_per_second=1, burst=3)
+
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.aacquire() for _ in range(3)))
+
+    assert time.monotonic() - start < 0.05
+    assert limiter.acquire(blocking=False) is False
+
+
+async def test_tokens_per_minute_uses_reconciled_usage() -> None:
+    limiter = TokenBucketRateLimiter(
+        "test", tokens_per_minute=6000, tokens_per_request=100
+    )
+    assert await limiter.aacquire(blocking=False)
+
+    # Real usage drains the whole bucket, so the next caller must wait ~1s
+    run_id = uuid4()
+    limiter.callback.on_chat_model_start({}, [], run_id=run_id)
+    limiter.callback.on_llm_end(usage_result(6000), run_id=run_id)
+
+    assert await limiter.aacquire(blocking=False) is False
+    assert limiter.get_metrics()["model_latency"]["count"] == 1
+
+
+def test_non_blocking_acquire_does_not_book() -> None:
+    limiter = TokenBucketRateLimiter("test", requests_per_second=1)
+    assert limiter.acquire(blocking=False)
+    assert limiter.acquire(blocking=False) is False
+    assert limiter.acquire(blocking=False) is False
+    assert limiter.get_metrics()["queue_wait"]["count"] == 1
+
+
+def test_model_limit_takes_precedence_over_provider_limit() -> None:
+    configure_rate_limit("qwen", requests_per_second=5)
+    configure_rate_limit("qwen", "qwen-plus", requests_per_second=1)
+
+    flash = get_rate_limiter("qwen", "qwen-flash")
+    turbo = get_rate_limiter("qwen", "qwen-turbo")
+    plus = get_rate_limiter("qwen", "qwen-plus")
+
+    # Provider limits are shared across the provider's models
+    assert flash is turbo
+    assert flash.requests_per_second == 5
+    assert plus.requests_per_second == 1
+    assert get_rate_limiter("siliconflow", "Qwen/Qwen3-8B") is None
+
+
+@patch.dict(
+    os.environ,
+    {"RATE_LIMITS": json.dumps({"siliconflow:Qwen/Qwen3-8B": {"rps": 2, "tpm": 1000}})},
+)
+def test_rate_limits_env_var() -> None:
+    limiter = get_rate_limiter("siliconflow", "Qwen/Qwen3-8B")
+
+    assert limiter is not None
+    assert limiter.requests_per_second == 2
+    assert limiter.tokens_per_minute == 1000
+    assert get_rate_limiter("siliconflow", "THUDM/GLM-4-9B-0414") is None
+
+
+def test_rate_limits_env_var_is_parsed_once() -> None:
+    raw = json.dumps({"qwen": {"rps": 3}})
+    with patch.dict(os.environ, {"RATE_LIMITS": raw}):
+        with patch("json.loads", wraps=json.loads) as loads:
+            first = get_rate_limiter("qwen", "qwen-flash")
+            second = get_rate_limiter("qwen", "qwen-plus")
+
+    assert first is second
+    assert loads.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "{not json",
+        '["qwen"]',
+        '{"qwen": 5}',
+        '{"qwen": {"rpm": 5}}',
+        '{"qwen": {"rps": "fast"}}',
+        '{"qwen": {"tpm": -1}}',
+        '{"qwen": {"rps": 1, "burst": 0}}',
+    ],
+)
+def test_invalid_rate_limits_env_var_fails_fast(raw: str) -> None:
+    with patch.dict(os.environ, {"RATE_LIMITS": raw}):
+        with pytest.raises(ValueError, match="Invalid RATE_LIMITS"):
+            get_rate_limiter("qwen", "qwen-flash")
+
+
+@patch("common.models.qwen.ChatQwen")
+@patch.dict(os.environ, {"REGION": ""}, clear=False)
+def test_create_qwen_model_attaches_limiter(mock_chat_qwen) -> None:
+    configure_rate_limit("qwen", requests_per_second=5)
+    limiter = get_rate_limiter("qwen", "qwen-flash")
+
+    create_qwen_model("qwen-flash", api_key="test-key")
+
+    mock_chat_qwen.assert_called_once_with(
+        model="qwen-flash",
+        api_key="test-key",
+        rate_limiter=limiter,
+        callbacks=[limiter.callback],
+    )
+
+
+@patch("common.models.siliconflow.ChatSiliconFlow")
+@patch.dict(os.environ, {"REGION": ""}, clear=False)
+def test_create_siliconflow_model_attaches_limiter(mock_chat_siliconflow) -> None:
+    configure_rate_limit("siliconflow", "Qwen/Qwen3-8B", tokens_per_minute=1000)
+    limiter = get_rate_limiter("siliconflow", "Qwen/Qwen3-8B")
+
+    create_siliconflow_model("Qwen/Qwen3-8B", api_key="test-key")
+
+    assert mock_chat_siliconflow.call_args.kwargs["rate_limiter"] is limiter
+
+
+async def test_async_model_latency_excludes_queue_wait() -> None:
+    limiter = TokenBucketRateLimiter("test", requests_per_second=5)
+    model = limited_model(limiter)
+
+    # The second and third calls queue behind the first for 0.2s and 0.4s
+    await asyncio.gather(*(model.ainvoke("hi") for _ in range(3)))
+
+    metrics = limiter.get_metrics()
+    assert metrics["queue_wait"]["count"] == 3
+    assert metrics["queue_wait"]["p99"] == pytest.approx(0.4, abs=0.08)
+    assert metrics["model_latency"]["count"] == 3
+    assert metrics["model_latency"]["p99"] < 0.15
+
+
+async def test_async_batch_model_latency_excludes_queue_wait() -> None:
+    limiter = TokenBucketRateLimiter("test", requests_per_second=5)
+
+    await limited_model(limiter).abatch(["a", "b", "c"])
+
+    metrics = limiter.get_metrics()
+    assert metrics["queue_wait"]["p99"] == pytest.approx(0.4, abs=0.08)
+    assert metrics["model_latency"]["count"] == 3
+    assert metrics["model_latency"]["p99"] < 0.15
+
+
+def test_sync_model_latency_excludes_queue_wait() -> None:
+    limiter = TokenBucketRateLimiter("test", requests_per_second=5)
+    model = limited_model(limiter)
+
+    for _ in range(2):
+        model.invoke("hi")
+
+    metrics = limiter.get_metrics()
+    assert metrics["queue_wait"]["p99"] == pytest.approx(0.2, abs=0.08)
+    assert metrics["model_latency"]["p99"] < 0.15
+
+
+async def test_cache_hits_do_not_count_as_admitted_calls(tmp_path) -> None:
+    limiter = TokenBucketRateLimiter("test", tokens_per_minute=60000)
+    cache = SQLiteResponseCache(str(tmp_path / "cache.sqlite"))
+    model = limited_model(limiter, cache=cache, total_tokens=500)
+    await model.ainvoke("hi")
+    estimate, token_tat = limiter._estimate, limiter._token_tat
+
+    await model.ainvoke("hi")
+
+    assert cache.get_metrics()["hits"] == 1
+    assert limiter.get_metrics()["model_latency"]["count"] == 1
+    assert (limiter._estimate, limiter._token_tat) == (estimate, token_tat)
@@ -0,0 +1,222 @@
+"""Unit tests for the persistent LLM response cache."""
+
+import os
+import time
+from typing import Any, List, Optional
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from common.models.cache import (
+    SQLiteResponseCache,
+    clear_response_caches,
+    get_response_cache,
+    request_key,
+)
+from common.models.hedge import HedgedChatModel
+from common.utils import load_chat_model
+
+
+class CountingModel(BaseChatModel):
+    """Fake chat model that answers with a tool call and counts provider calls."""
+
+    calls: int = 0
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting-fake"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"temperature": self.temperature}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        message = AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "lookup",
+                    "args": {"aircraft_id": "a_00123"},
+                    "id": f"call_live_{self.calls}",
+                }
+            ],
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteResponseCache(str(tmp_path / "llm_cache.sqlite"))
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    yield
+    clear_response_caches()
+
+
+async def test_identical_requests_are_replayed(cache) -> None:
+    model = CountingModel(cache=cache)
+
+    first = await model.ainvoke([HumanMessage(content="verify a_00123", id="run-1")])
+    # Same request from another run: different message id, same content
+    second = await model.ainvoke([HumanMessage(content="verify a_00123", id="run-2")])
+
+    assert model.calls == 1
+    assert second.tool_calls[0]["name"] == "lookup"
+    assert second.tool_calls[0]["args"] == {"aircraft_id": "a_00123"}
+    # Replayed tool calls get fresh ids so they never collide in a thread
+    assert second.tool_calls[0]["id"] != first.tool_calls[0]["id"]
+    assert second.id != first.id
+    assert cache.get_metrics()["hits"] == 1
+    assert cache.get_metrics()["misses"] == 1
+    assert cache.get_metrics()["hit_rate"] == 0.5
+
+
+async def test_sampling_params_and_tools_change_the_key(cache) -> None:
+    messages = [HumanMessage(content="hi")]
+    await CountingModel(cache=cache).ainvoke(messages)
+
+    hot = CountingModel(cache=cache, temperature=0.7)
+    await hot.ainvoke(messages)
+    assert hot.calls == 1
+
+    model = CountingModel(cache=cache)
+    await model.ainvoke(
+        messages, tools=[{"type": "function", "function": {"name": "x"}}]
+    )
+    assert model.calls == 1
+
+
+async def test_hedged_model_key_includes_inner_tools_and_settings(cache) -> None:
+    messages = [HumanMessage(content="hi")]
+    lookup = [{"type": "function", "function": {"name": "lookup"}}]
+    search = [{"type": "function", "function": {"name": "search"}}]
+
+    def hedged(tools: List[Any], temperature: float = 0.0) -> HedgedChatModel:
+        # Tools bound on the inner models, as HedgedChatModel.bind_tools does
+        return HedgedChatModel(
+            models=[
+                CountingModel(temperature=temperature).bind(tools=tools)
+                for _ in range(2)
+            ],
+            model_names=["fake:a", "fake:b"],
+            initial_delay=10.0,
+            cache=cache,
+        )
+
+    def calls(model: HedgedChatModel) -> int:
+        return model.models[0].bound.calls  # type: ignore[attr-defined]
+
+    await hedged(lookup).ainvoke(messages)
+    replayed = hedged(lookup)
+    await replayed.ainvoke(messages)
+    assert calls(replayed) == 0
+
+    other_tools = hedged(search)
+    await other_tools.ainvoke(messages)
+    assert calls(other_tools) == 1
+
+    hot = hedged(lookup, temperature=0.7)
+    await hot.ainvoke(messages)
+    assert calls(hot) == 1
+
+
+def test_tool_call_ids_are_normalized_in_the_key() -> None:
+    from langchain_core.load import dumps
+
+    def history(call_id: str) -> str:
+        return dumps(
+            [
+                HumanMessage(content="verify", id=f"h-{call_id}"),
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": "lookup", "args": {}, "id": call_id}],
+                ),
+                ToolMessage(content="ok", tool_call_id=call_id),
+            ]
+        )
+
+    assert request_key(history("call_a"), "params") == request_key(
+        history("call_b"), "params"
+    )
+    assert request_key(history("call_a"), "params") != request_key(
+        history("call_a"), "other"
+    )
+
+
+def test_llm_string_object_addresses_are_ignored() -> None:
+    prompt = "[]"
+    assert request_key(prompt, "limiter at 0x7f0001") == request_key(
+        prompt, "limiter at 0x7f0002"
+    )
+
+
+async def test_expired_entries_miss(cache) -> None:
+    cache.ttl = 0.05
+    model = CountingModel(cache=cache)
+
+    await model.ainvoke([HumanMessage(content="hi")])
+    time.sleep(0.1)
+    await model.ainvoke([HumanMessage(content="hi")])
+
+    assert model.calls == 2
+    assert cache.get_metrics()["expired"] >= 1
+
+
+def test_size_based_lru_eviction(tmp_path) -> None:
+    cache = SQLiteResponseCache(str(tmp_path / "small.sqlite"), max_bytes=4000)
+    generation = [ChatGeneration(message=AIMessage(content="x" * 500))]
+
+    for prompt in ("a", "b", "c"):
+        cache.update(prompt, "params", generation)
+    # Each entry is ~1.3KB, so the budget holds three of them.
+    # Touch "a" so "b" becomes the least recently used entry
+    assert cache.lookup("a", "params") is not None
+    cache.update("d", "params", generation)
+
+    assert cache.lookup("b", "params") is None
+    assert cache.lookup("a", "params") is not None
+    assert cache.lookup("d", "params") is not None
+    assert cache.get_metrics()["evictions"] >= 1
+    assert cache.get_metrics()["bytes"] <= 4000
+
+
+def test_cache_persists_across_instances(tmp_path) -> None:
+    path = str(tmp_path / "persist.sqlite")
+    SQLiteResponseCache(path).update(
+        "p", "params", [ChatGeneration(message=AIMessage(content="saved"))]
+    )
+
+    replayed = SQLiteResponseCache(path).lookup("p", "params")
+
+    assert replayed[0].message.content == "saved"
+
+
+@patch("common.models.create_qwen_model")
+def test_load_chat_model_attaches_cache(mock_create_qwen, tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+
+    model = load_chat_model("qwen:qwen-flash", cache_path=path)
+
+    assert model is mock_create_qwen.return_value
+    assert model.cache is get_response_cache(path)
+
+
+@patch.dict(os.environ, {"LLM_CACHE_MAX_MB": "1", "LLM_CACHE_TTL": "60"}, clear=False)
+def test_get_response_cache_reads_env(tmp_path) -> None:
+    cache = get_response_cache(str(tmp_path / "env.sqlite"))
+
+    assert cache.ttl == 60
+    assert cache.max_bytes == 1024 * 1024
@@ -0,0 +1,129 @@
+"""Unit tests for the offline scripted chat model."""
+
+import json
+import time
+
+import pandas as pd
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from common.context import Context
+from common.models.scripted import (
+    ScriptedChatModel,
+    create_scripted_model,
+    register_script,
+    sop_script,
+)
+from common.utils import load_chat_model
+from react_agent.graph import graph
+
+
+def test_load_chat_model_selects_scripted_provider(monkeypatch) -> None:
+    monkeypatch.setenv("SCRIPTED_LATENCY", "0.25")
+    model = load_chat_model("scripted:sop")
+
+    assert isinstance(model, ScriptedChatModel)
+    assert model.script_name == "sop"
+    assert model.latency == 0.25
+    assert model.token_delay == 0.0
+
+
+def test_unknown_script_raises() -> None:
+    with pytest.raises(ValueError, match="Unknown script"):
+        load_chat_model("scripted:missing")
+
+
+def test_script_must_end_with_an_answer() -> None:
+    with pytest.raises(ValueError, match="must end"):
+        register_script("loop", [{"tool_calls": [{"name": "x", "args": {}}]}])
+
+
+def test_script_advances_with_answered_tool_calls(tmp_path) -> None:
+    path = tmp_path / "script.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"tool_calls": [{"name": "a", "args": {}}, {"name": "b", "args": {}}]},
+                {"content": "done"},
+            ]
+        )
+    )
+    model = create_scripted_model(str(path))
+
+    first = model.invoke([HumanMessage(content="go")])
+    assert [call["name"] for call in first.tool_calls] == ["a", "b"]
+    assert first.usage_metadata["output_tokens"] > 0
+
+    results = [
+        ToolMessage(content="ok", tool_call_id=call["id"]) for call in first.tool_calls
+    ]
+    second = model.invoke([HumanMessage(content="go"), first, *results])
+    assert second.content == "done"
+    assert not second.tool_calls
+
+    # A new human message restarts the script
+    third = model.invoke(
+        [HumanMessage(content="go"), first, *results, second, HumanMessage("again")]
+    )
+    assert [call["name"] for call in third.tool_calls] == ["a", "b"]
+
+
+async def test_streaming_yields_tokens_with_delay() -> None:
+    model = create_scripted_model("answer", latency=0.02, token_delay=0.01)
+
+    start = time.perf_counter()
+    chunks = [chunk async for chunk in model.astream([HumanMessage(content="hi")])]
+    elapsed = time.perf_counter() - start
+
+    text = "".join(str(chunk.content) for chunk in chunks)
+    assert text == "<final_response>no tools needed</final_response>"
+    assert len(chunks) > 2
+    assert elapsed >= 0.02 + 0.01 * (len(chunks) - 2)
+    assert sum(chunks[1:], chunks[0]).usage_metadata["input_tokens"] > 0
+
+
+async def test_streamed_tool_calls_are_reassembled() -> None:
+    model = create_scripted_model("sop")
+
+    chunks = [chunk async for chunk in model.astream([HumanMessage(content="hi")])]
+    message = sum(chunks[1:], chunks[0])
+
+    assert [call["name"] for call in message.tool_calls] == ["VerifyAircraftClearance"]
+    assert message.tool_calls[0]["args"]["aircraft_id"] == "a_00127"
+
+
+@pytest.mark.parametrize("run_mode", ["full", "lean"])
+async def test_sop_script_drives_the_graph_offline(run_mode) -> None:
+    result = await graph.ainvoke(
+        {"messages": [HumanMessage(content="verify a_00127")]},
+        context=Context(model="scripted:sop", run_mode=run_mode),
+    )
+
+    assert result["final_response"].startswith("<final_response>")
+    assert result["usage"]["scripted:sop"]["calls"] == 7
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    if run_mode == "full":
+        assert len(tool_messages) == 7
+        assert all(m.status == "success" for m in tool_messages)
+    else:
+        assert isinstance(result["messages"][-1], AIMessage)
+        assert len(result["tool_summary"]) == 7
+
+
+async def test_sop_script_of_a_dataset_record() -> None:
+    df = pd.read_csv("./data/test_set_with_outputs.csv")
+    record = df[df["aircraft_ready"].eq(False)].iloc[0].to_dict()
+    register_script("sop_failed", sop_script(record))
+
+    result = await graph.ainvoke(
+        {"messages": [HumanMessage(content=f"verify {record['aircraft_id']}")]},
+        context=Context(model="scripted:sop_failed"),
+    )
+
+    clearance = result["messages"][1].tool_calls[0]
+    assert clearance["args"]["aircraft_id"] == record["aircraft_id"]
+    assert "aircraft_ready: False" in result["final_response"]
+    assert (
+        f"mechanical_inspection_result: {record['mechanical_inspection_result']}"
+        in result["final_response"]
+    )
@@ -0,0 +1,346 @@
+"""Unit tests for the non-blocking web search."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from common import search_backends
+from common.context import Context
+from common.metrics import get_counter
+from common.search import (
+    SearchCache,
+    configure_search,
+    merge_results,
+    normalize_query,
+    search,
+)
+from common.search_backends import (
+    duckduckgo_search,
+    get_search_backend,
+    register_search_backend,
+    tavily_search,
+)
+
+
+class SlowDDGS:
+    """DDGS stand-in whose searches take ``delay`` seconds."""
+
+    delay = 0.0
+    running = 0
+    peak = 0
+    queries: list = []
+    lock = threading.Lock()
+
+    def __init__(self, timeout: int) -> None:
+        self.timeout = timeout
+
+    def __enter__(self) -> "SlowDDGS":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def text(self, query: str, max_results: int) -> list:
+        SlowDDGS.queries.append(query)
+        with SlowDDGS.lock:
+            SlowDDGS.running += 1
+            SlowDDGS.peak = max(SlowDDGS.peak, SlowDDGS.running)
+        time.sleep(SlowDDGS.delay)
+        with SlowDDGS.lock:
+            SlowDDGS.running -= 1
+        return [
+            {"title": query, "href": f"https://example.com/{i}"}
+            for i in range(max_results)
+        ]
+
+
+@pytest.fixture(autouse=True)
+def slow_ddgs(monkeypatch):
+    SlowDDGS.delay, SlowDDGS.running, SlowDDGS.peak, SlowDDGS.queries = 0.0, 0, 0, []
+    monkeypatch.setenv("SEARCH_CACHE_TTL", "0")
+    configure_search(max_concurrency=2)
+    # A fresh circuit breaker per test
+    register_search_backend("duckduckgo", duckduckgo_search)
+    with patch.object(search_backends, "DDGS", SlowDDGS):
+        yield SlowDDGS
+    configure_search()
+    register_search_backend("duckduckgo", duckduckgo_search)
+
+
+def backend(delay: float = 0.0, urls=(), error: Exception | None = None):
+    """Search function answering ``urls`` after ``delay`` seconds."""
+    calls = []
+
+    def search_fn(query: str, max_results: int, timeout: float) -> list:
+        calls.append(query)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return [{"title": url, "url": url, "content": ""} for url in urls]
+
+    search_fn.calls = calls
+    return search_fn
+
+
+async def test_search_returns_results() -> None:
+    result = await search("langgraph", 3)
+
+    assert result["query"] == "langgraph"
+    assert len(result["results"]) == 3
+    assert "partial" not in result
+
+
+async def test_timeout_returns_partial_result_without_blocking_the_loop(
+    slow_ddgs,
+) -> None:
+    slow_ddgs.delay = 0.5
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    start = time.perf_counter()
+    result = await search("slow", 3, timeout=0.1)
+    elapsed = time.perf_counter() - start
+    ticker.cancel()
+
+    assert elapsed < 0.3
+    assert ticks >= 5
+    assert result["partial"] is True
+    assert result["results"] == []
+    assert "timed out" in result["error"]
+
+
+async def test_concurrent_searches_are_capped(slow_ddgs) -> None:
+    slow_ddgs.delay = 0.1
+
+    results = await asyncio.gather(*(search(f"q{i}", 1) for i in range(6)))
+
+    assert all(len(r["results"]) == 1 for r in results)
+    assert slow_ddgs.peak == 2
+
+
+async def test_cancelled_search_does_not_start(slow_ddgs) -> None:
+    slow_ddgs.delay = 0.2
+
+    running = [asyncio.create_task(search(f"busy{i}", 1)) for i in range(2)]
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(search("queued", 1))
+    await asyncio.sleep(0.01)
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    await asyncio.gather(*running)
+    await asyncio.sleep(0.05)
+
+    assert sorted(slow_ddgs.queries) == ["busy0", "busy1"]
+
+
+def test_normalize_query() -> None:
+    assert normalize_query("  LangGraph   Checkpointer?") == "langgraph checkpointer"
+    assert normalize_query("langgraph, checkpointer!") == "langgraph checkpointer"
+    assert (
+        normalize_query("ＬａｎｇＧｒａｐｈ checkpointer.") == "langgraph checkpointer"
+    )
+    assert normalize_query("C# async") != normalize_query("C async")
+    assert normalize_query('"exact phrase" -spam') == '"exact phrase" -spam'
+
+
+async def test_normalized_queries_share_a_cache_entry(slow_ddgs) -> None:
+    cache = SearchCache()
+    configure_search(max_concurrency=2, cache=cache)
+
+    first = await search("LangGraph checkpointer?", 2)
+    second = await search("  langgraph   CHECKPOINTER ", 2)
+    await search("langgraph checkpointer", 3)
+
+    assert slow_ddgs.queries == ["LangGraph checkpointer?", "langgraph checkpointer"]
+    assert second == {
+        "query": "  langgraph   CHECKPOINTER ",
+        "results": first["results"],
+    }
+    metrics = cache.get_metrics()
+    assert (metrics["memory_hits"], metrics["misses"]) == (1, 2)
+    assert metrics["hit_rate"] == pytest.approx(1 / 3)
+    assert get_counter("agent_search_cache_lookups_total", "").value("memory_hit") >= 1
+
+
+async def test_partial_results_are_not_cached(slow_ddgs) -> None:
+    configure_search(max_concurrency=2, cache=SearchCache())
+    slow_ddgs.delay = 0.2
+
+    assert (await search("slow", 1, timeout=0.05))["partial"] is True
+    await asyncio.sleep(0.2)
+    assert "partial" not in await search("slow", 1)
+    assert slow_ddgs.queries == ["slow", "slow"]
+
+
+async def test_stale_results_are_served_and_refreshed(slow_ddgs) -> None:
+    cache = SearchCache(ttl=0.3, stale_ttl=60)
+    configure_search(max_concurrency=2, cache=cache)
+    await search("langgraph", 1)
+    await asyncio.sleep(0.35)
+    slow_ddgs.delay = 0.05
+
+    start = time.perf_counter()
+    stale = await asyncio.gather(*(search("langgraph", 1) for _ in range(3)))
+    assert time.perf_counter() - start < 0.05
+    assert all(len(result["results"]) == 1 for result in stale)
+    await asyncio.sleep(0.1)
+
+    # One background refresh for the three stale hits, then fresh again
+    assert slow_ddgs.queries == ["langgraph", "langgraph"]
+    await search("langgraph", 1)
+    metrics = cache.get_metrics()
+    assert (metrics["stale_hits"], metrics["memory_hits"]) == (3, 1)
+
+
+def test_expired_entries_are_misses() -> None:
+    cache = SearchCache(ttl=0.01, stale_ttl=0.01)
+    cache.put("langgraph", 1, [{"title": "a"}])
+    time.sleep(0.05)
+
+    assert cache.get("langgraph", 1) is None
+
+
+def test_memory_tier_evicts_least_recently_used() -> None:
+    cache = SearchCache(max_entries=2)
+    cache.put("a", 1, [])
+    cache.put("b", 1, [])
+    cache.get("a", 1)
+    cache.put("c", 1, [])
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == ([], False)
+    assert cache.get_metrics()["evictions"] == 1
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path) -> None:
+    path = str(tmp_path / "search.sqlite")
+    SearchCache(path=path).put("LangGraph", 2, [{"title": "LangGraph"}])
+
+    cache = SearchCache(path=path)
+
+    assert cache.get("langgraph", 2) == ([{"title": "LangGraph"}], False)
+    assert cache.get("langgraph", 2) is not None
+    metrics = cache.get_metrics()
+    assert (metrics["disk_hits"], metrics["memory_hits"]) == (1, 1)
+    cache.close()
+
+
+async def test_first_strategy_returns_the_fastest_backend() -> None:
+    register_search_backend("fast", backend(0.01, ["https://fast.example"]))
+    register_search_backend("slow", backend(0.3, ["https://slow.example"]))
+
+    start = time.perf_counter()
+    result = await search("q", 5, backends=["slow", "fast"], strategy="first")
+
+    assert time.perf_counter() - start < 0.2
+    assert [r["url"] for r in result["results"]] == ["https://fast.example"]
+    assert "partial" not in result
+    # The abandoned backend is not held responsible
+    assert get_search_backend("slow").failures == 0
+
+
+async def test_merge_strategy_deduplicates_by_url() -> None:
+    register_search_backend(
+        "a", backend(0.01, ["https://a.example/1", "https://shared.example/page"])
+    )
+    register_search_backend(
+        "b", backend(0.05, ["http://www.shared.example/page/", "https://b.example/1"])
+    )
+
+    result = await search("q", 5, backends=["a", "b"], strategy="merge")
+
+    assert [r["url"] for r in result["results"]] == [
+        "https://shared.example/page",
+        "https://a.example/1",
+        "https://b.example/1",
+    ]
+    assert "partial" not in result
+
+
+async def test_merge_strategy_returns_partial_results_on_backend_timeout() -> None:
+    register_search_backend("ok", backend(0.01, ["https://ok.example"]))
+    register_search_backend(
+        "hung", backend(0.5, ["https://hung.example"]), timeout=0.05
+    )
+
+    start = time.perf_counter()
+    result = await search("q", 5, backends=["ok", "hung"], strategy="merge")
+
+    assert time.perf_counter() - start < 0.3
+    assert [r["url"] for r in result["results"]] == ["https://ok.example"]
+    assert result["partial"] is True
+    assert "hung timed out" in result["error"]
+
+
+async def test_circuit_breaker_skips_a_failing_backend() -> None:
+    failing = backend(error=RuntimeError("boom"))
+    register_search_backend("flaky", failing, failure_threshold=2, reset_timeout=0.1)
+    register_search_backend("ok", backend(urls=["https://ok.example"]))
+
+    for _ in range(2):
+        result = await search("q", 5, backends=["flaky"])
+        assert result["results"] == []
+        assert "flaky failed: boom" in result["error"]
+    assert get_search_backend("flaky").state == "open"
+
+    skipped = await search("q", 5, backends=["flaky"])
+    merged = await search("q", 5, backends=["flaky", "ok"], strategy="merge")
+
+    assert len(failing.calls) == 2
+    assert "unavailable" in skipped["error"]
+    assert [r["url"] for r in merged["results"]] == ["https://ok.example"]
+    assert "skipped" in merged["error"]
+
+    # After the reset timeout, one trial request closes the circuit again
+    await asyncio.sleep(0.1)
+    get_search_backend("flaky").search = backend(urls=["https://flaky.example"])
+    assert get_search_backend("flaky").state == "half_open"
+    assert (await search("q", 5, backends=["flaky"]))["results"]
+    assert get_search_backend("flaky").state == "closed"
+
+
+def test_tavily_search_passes_the_timeout_to_the_request(monkeypatch) -> None:
+    monkeypatch.setenv("TAVILY_API_KEY", "tvly-test")
+    response = MagicMock(status_code=200)
+    response.json.return_value = {
+        "results": [{"title": "LangGraph", "url": "https://x.dev", "content": "c"}]
+    }
+
+    with patch("requests.post", return_value=response) as post:
+        results = tavily_search("langgraph", 3, 2.5)
+
+    assert post.call_args.kwargs["timeout"] == 2.5
+    assert post.call_args.kwargs["json"] == {"query": "langgraph", "max_results": 3}
+    assert results == [{"title": "LangGraph", "url": "https://x.dev", "content": "c"}]
+
+
+def test_merge_results_ranks_results_found_by_several_backends_first() -> None:
+    ranked = [
+        [{"url": "https://x.example"}, {"url": "https://y.example"}],
+        [{"url": "https://z.example"}, {"url": "https://y.example"}],
+    ]
+
+    assert [r["url"] for r in merge_results(ranked, 2)] == [
+        "https://y.example",
+        "https://x.example",
+    ]
+
+
+def test_context_parses_numeric_env_vars(monkeypatch) -> None:
+    monkeypatch.setenv("MAX_SEARCH_RESULTS", "7")
+    monkeypatch.setenv("SEARCH_TIMEOUT", "2.5")
+
+    context = Context()
+
+    assert context.max_search_results == 7
+    assert context.search_timeout == 2.5
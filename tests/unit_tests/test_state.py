@@ -0,0 +1,130 @@
+"""Unit tests for the indexed message reducer."""
+
+import random
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, add_messages
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from react_agent.state import (
+    IndexedMessages,
+    InputState,
+    State,
+    add_messages_indexed,
+)
+
+
+def ids(messages):
+    return [m.id for m in messages]
+
+
+def test_appends_and_replaces_by_id() -> None:
+    left = add_messages_indexed([], [HumanMessage(content="hi", id="1")])
+    merged = add_messages_indexed(
+        left, [AIMessage(content="a", id="2"), HumanMessage(content="edited", id="1")]
+    )
+
+    assert isinstance(merged, IndexedMessages)
+    assert [m.content for m in merged] == ["edited", "a"]
+    # The previous version is left untouched
+    assert [m.content for m in left] == ["hi"]
+
+
+def test_assigns_missing_ids_and_coerces_tuples() -> None:
+    merged = add_messages_indexed([], [("user", "hi"), AIMessage(content="a")])
+
+    assert isinstance(merged[0], HumanMessage)
+    assert all(m.id for m in merged)
+
+
+def test_remove_and_remove_all() -> None:
+    merged = add_messages_indexed(
+        [], [HumanMessage(content=str(i), id=str(i)) for i in range(4)]
+    )
+
+    merged = add_messages_indexed(merged, [RemoveMessage(id="1")])
+    assert ids(merged) == ["0", "2", "3"]
+    # Positions shifted, so lookups must use the rebuilt index
+    merged = add_messages_indexed(merged, [HumanMessage(content="new", id="3")])
+    assert [m.content for m in merged] == ["0", "2", "new"]
+
+    with pytest.raises(ValueError, match="doesn't exist"):
+        add_messages_indexed(merged, [RemoveMessage(id="missing")])
+
+    cleared = add_messages_indexed(
+        merged,
+        [RemoveMessage(id=REMOVE_ALL_MESSAGES), HumanMessage(content="x", id="x")],
+    )
+    assert ids(cleared) == ["x"]
+
+
+def test_forked_versions_do_not_share_stale_positions() -> None:
+    base = add_messages_indexed([], [HumanMessage(content="0", id="0")])
+    branch_a = add_messages_indexed(base, [AIMessage(content="a", id="a")])
+    branch_b = add_messages_indexed(base, [AIMessage(content="b", id="b")])
+    branch_b = add_messages_indexed(branch_b, [AIMessage(content="a", id="a")])
+
+    # "a" sits at position 1 in branch A but at 2 in branch B
+    replaced = add_messages_indexed(branch_a, [AIMessage(content="a2", id="a")])
+
+    assert [m.content for m in replaced] == ["0", "a2"]
+    assert [m.content for m in branch_b] == ["0", "b", "a"]
+
+
+def test_in_place_modification_is_detected() -> None:
+    merged = add_messages_indexed([], [HumanMessage(content="0", id="0")])
+    merged.append(AIMessage(content="1", id="1"))
+
+    result = add_messages_indexed(merged, [AIMessage(content="1b", id="1")])
+
+    assert [m.content for m in result] == ["0", "1b"]
+
+
+def test_matches_add_messages_on_random_updates() -> None:
+    rng = random.Random(7)
+    expected: list = []
+    actual: list = []
+    next_id = 0
+    for _ in range(300):
+        existing = ids(expected)
+        update = []
+        for _ in range(rng.randint(1, 3)):
+            roll = rng.random()
+            if existing and roll < 0.2:
+                update.append(
+                    AIMessage(content=f"edit {next_id}", id=rng.choice(existing))
+                )
+            elif existing and roll < 0.3:
+                target = rng.choice(existing)
+                existing.remove(target)
+                update.append(RemoveMessage(id=target))
+            else:
+                update.append(HumanMessage(content=str(next_id), id=str(next_id)))
+            next_id += 1
+        expected = add_messages(expected, update)
+        actual = add_messages_indexed(actual, update)
+        assert ids(actual) == ids(expected)
+        assert [m.content for m in actual] == [m.content for m in expected]
+
+
+def test_agent_state_in_graph_with_checkpointer() -> None:
+    seen = []
+
+    def respond(state: State):
+        seen.append(state.messages)
+        return {"messages": [AIMessage(content=f"reply {len(state.messages)}")]}
+
+    builder = StateGraph(State, input_schema=InputState)
+    builder.add_node(respond)
+    builder.add_edge("__start__", "respond")
+    graph = builder.compile(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "t1"}}
+
+    graph.invoke({"messages": [HumanMessage(content="a")]}, config)
+    result = graph.invoke({"messages": [HumanMessage(content="b")]}, config)
+
+    assert [m.content for m in result["messages"]] == ["a", "reply 1", "b", "reply 3"]
+    # The agent state merges messages with the indexed reducer
+    assert all(isinstance(messages, IndexedMessages) for messages in seen)
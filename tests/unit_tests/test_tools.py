@@ -69,22 +69,38 @@ class TestGetTools:
     async def test_web_search_function(self) -> None:
         """Test the web_search function uses runtime context correctly."""
         mock_runtime = MagicMock()
-        mock_runtime.context.max_search_results = 10
+        mock_runtime.context.max_search_results = "10"
+        mock_runtime.context.search_timeout = 5.0
+        mock_runtime.context.search_backends = "duckduckgo"
+        mock_runtime.context.search_strategy = "first"
 
-        mock_tavily = MagicMock()
-        mock_tavily.ainvoke = AsyncMock(return_value={"results": ["test result"]})
+        mock_ddgs = MagicMock()
+        mock_ddgs.__enter__.return_value.text.return_value = [
+            {"title": "Test", "href": "https://example.com", "body": "test result"}
+        ]
 
         with (
             patch("common.tools.get_runtime", return_value=mock_runtime),
             patch(
-                "common.tools.TavilySearch", return_value=mock_tavily
-            ) as mock_tavily_class,
+                "common.search_backends.DDGS", return_value=mock_ddgs
+            ) as mock_ddgs_class,
         ):
             result = await web_search("test query")
 
-        mock_tavily_class.assert_called_once_with(max_results=10)
-        mock_tavily.ainvoke.assert_called_once_with({"query": "test query"})
-        assert result == {"results": ["test result"]}
+        mock_ddgs_class.assert_called_once_with(timeout=5)
+        mock_ddgs.__enter__.return_value.text.assert_called_once_with(
+            "test query", max_results=10
+        )
+        assert result == {
+            "query": "test query",
+            "results": [
+                {
+                    "title": "Test",
+                    "url": "https://example.com",
+                    "content": "test result",
+                }
+            ],
+        }
 
 
 class TestToolsIntegration: